@@ -1,5 +1,4 @@
 import streamlit as st
-import joblib
 import numpy as np
 import pandas as pd
 import time
@@ -10,6 +9,12 @@ from supabase import create_client
 from dotenv import load_dotenv
 import os
 
+from data_broker import get_broker
+from local_replica import get_replica
+from model_registry import get_versioned_model
+from prediction_cache import get_prediction_cache
+from security_intervals import recent_intervals
+
 # ======================
 # ENVIRONMENT SETUP
 # ======================
@@ -21,6 +26,8 @@ if not SUPABASE_URL or not SUPABASE_KEY:
     st.error("🚫 Missing Supabase credentials in links.env file")
 else:
     supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    broker = get_broker(supabase)  # concurrent identical upstream reads share one call
+    replica = get_replica(broker)  # dashboard reads go to the local delta-synced copy
 
 # ======================
 # PAGE CONFIGURATION
@@ -74,32 +81,38 @@ st.markdown("""
 # ======================
 # MODEL LOADING
 # ======================
-model = joblib.load("water_quality_model.pkl")
+model_version, model = get_versioned_model()
+prediction_cache = get_prediction_cache()
 
 # ======================
 # DATA FUNCTIONS
 # ======================
 def get_latest_record():
-    data = supabase.table("lakefishcage").select("*").order("timestamp", desc=True).limit(1).execute().data[0]
-    return data["temperature"], data["turbidity"], data["ph"]
+    data = replica.table("lakefishcage").select("*").order("timestamp", desc=True).limit(1).execute().data[0]
+    return data["temperature"], data["turbidity"], data["ph"], data.get("predicted_quality"), data.get("model_version")
 
 # New: fetch last security update
 def get_last_security_update():
-    data = supabase.table("security_alerts").select("*").order("timestamp", desc=True).limit(1).execute().data
+    data = recent_intervals(replica, 1)
     if data:
-        return data[0]["status"], pd.to_datetime(data[0]["timestamp"])
+        return data[0]["status"], pd.to_datetime(data[0]["ended_at"])
     return None, None
 
 # Historical data fetch for trends and predictions
 def get_historical_data(limit=50, include_pred=False):
-    data = supabase.table("lakefishcage").select("*").order("timestamp", desc=True).limit(limit).execute().data
+    data = replica.table("lakefishcage").select("*").order("timestamp", desc=True).limit(limit).execute().data
     df = pd.DataFrame(data)
     df["timestamp"] = pd.to_datetime(df["timestamp"])
     df = df.sort_values("timestamp")
     if include_pred:
-        preds = model.predict(df[["temperature", "turbidity", "ph"]].values)
+        # Rows scored at ingest by the current model keep their stored code; only the rest are predicted here
+        stored = df["model_version"].eq(model_version) if "model_version" in df else pd.Series(False, index=df.index)
+        codes = df["predicted_quality"].where(stored) if "predicted_quality" in df else pd.Series(np.nan, index=df.index)
+        if (~stored).any():
+            codes[~stored] = prediction_cache.predict(df.loc[~stored, ["temperature", "turbidity", "ph"]].values,
+                                                      model_version, model.predict)
         label_map = {0: "🌟 Excellent", 1: "👍 Good", 2: "⚠ Poor"}
-        df["predicted_quality"] = [label_map[p] for p in preds]
+        df["predicted_quality"] = [label_map[int(p)] for p in codes]
     return df
 
 # ======================
@@ -114,6 +127,15 @@ st.sidebar.markdown("<h4>📊 Historical Data</h4>", unsafe_allow_html=True)
 num_records = st.sidebar.selectbox("Records to View", [10, 25, 50, 100], index=2)
 st.sidebar.markdown("---")
 st.sidebar.markdown("[📂 View on Supabase](#)", unsafe_allow_html=True)
+cache_stats = prediction_cache.stats()
+st.sidebar.caption(f"🧠 Model {model_version} · cache {cache_stats['hits']} hits / {cache_stats['misses']} misses / "
+                   f"{cache_stats['evictions']} evictions · ~{cache_stats['saved_seconds'] * 1e3:.0f} ms saved")
+with st.sidebar.expander("🔀 Query coalescing"):
+    broker_stats = broker.stats()
+    if broker_stats:
+        st.dataframe(pd.DataFrame.from_dict(broker_stats, orient="index")[["calls", "upstream", "coalesced", "saved_seconds"]])
+    else:
+        st.caption("No queries yet")
 
 # ======================
 # MAIN CONTENT
@@ -130,8 +152,11 @@ with tabs[0]:
         with st.spinner("Fetching latest data…"):
             time.sleep(1)
             try:
-                temp, turb, ph = get_latest_record()
-                pred = model.predict(np.array([[temp, turb, ph]]))[0]
+                temp, turb, ph, stored_pred, stored_version = get_latest_record()
+                if stored_pred is not None and stored_version == model_version:
+                    pred = stored_pred  # scored at ingest by the current model
+                else:
+                    pred = prediction_cache.predict([[temp, turb, ph]], model_version, model.predict)[0]
                 label_map = {0: "🌟 Excellent", 1: "👍 Good", 2: "⚠ Poor"}
 
                 # Display metrics
@@ -184,31 +209,46 @@ with tabs[1]:
 
     # Button & widget for last update
     if st.button("Show Latest Security Status"):
-        status, ts = get_last_security_update()
-        if status is None:
-            st.info("No security records found.")
+        try:
+            status, ts = get_last_security_update()
+        except Exception as e:
+            st.error(f"Error: {e}")
         else:
-            ts_str = ts.strftime('%Y-%m-%d %H:%M:%S')
-            if status:
-                st.error(f"🚨 Last update at {ts_str}: Not Safe")
+            if status is None:
+                st.info("No security records found.")
             else:
-                st.success(f"✅ Last update at {ts_str}: Safe")
+                ts_str = ts.strftime('%Y-%m-%d %H:%M:%S')
+                if status:
+                    st.error(f"🚨 Last update at {ts_str}: Not Safe")
+                else:
+                    st.success(f"✅ Last update at {ts_str}: Safe")
 
-    # Historical security alerts
-    def get_security_alerts(limit=20):
-        data = supabase.table("security_alerts").select("*").order("timestamp", desc=True).limit(limit).execute().data
-        df = pd.DataFrame(data)
-        df["timestamp"] = pd.to_datetime(df["timestamp"]) if not df.empty else df
-        return df.sort_values("timestamp", ascending=False)
+    # Historical security state, one row per run of identical heartbeats
+    def get_security_intervals(limit=20):
+        df = pd.DataFrame(recent_intervals(replica, limit))
+        if df.empty:
+            return df
+        df["started_at"] = pd.to_datetime(df["started_at"])
+        df["ended_at"] = pd.to_datetime(df["ended_at"])
+        return df.sort_values("started_at", ascending=False)
 
-    sec_df = get_security_alerts(limit=num_records)
+    try:
+        sec_df = get_security_intervals(limit=num_records)
+    except Exception as e:
+        st.error(f"Error loading security alerts: {e}")
+        sec_df = pd.DataFrame()
     if not sec_df.empty:
         sec_df["status_label"] = sec_df["status"].apply(lambda x: "🚨 Alert" if x else "✅ Normal")
+        # A single heartbeat still covers one posting interval on the timeline
+        sec_df["shown_until"] = sec_df["ended_at"].where(sec_df["ended_at"] > sec_df["started_at"],
+                                                         sec_df["started_at"] + pd.Timedelta(seconds=5))
         st.dataframe(
-            sec_df[["timestamp","status_label"]].rename(columns={"timestamp":"Time","status_label":"Status"}), use_container_width=True
+            sec_df[["started_at","ended_at","status_label","samples"]].rename(
+                columns={"started_at":"From","ended_at":"Until","status_label":"Status","samples":"Readings"}),
+            use_container_width=True
         )
-        fig2 = px.scatter(sec_df, x="timestamp", y="status_label", color="status_label",
-                          title="Alert Timeline", labels={"timestamp":"Time","status_label":"Status"})
+        fig2 = px.timeline(sec_df, x_start="started_at", x_end="shown_until", y="status_label", color="status_label",
+                           title="Alert Timeline", labels={"started_at":"From","shown_until":"Until","status_label":"Status"})
         st.plotly_chart(fig2, use_container_width=True)
     else:
         st.info("No alerts found.")
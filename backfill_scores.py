@@ -0,0 +1,166 @@
+import argparse
+import collections
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# ======================
+# LOCAL SCORE STORE
+# ======================
+# predicted_quality is stored as the model's class code (0 Excellent, 1 Good,
+# 2 Poor), which SQLite packs into a single byte per row. Rows are keyed on
+# the table's id, since several cages can post at the same timestamp. The
+# checkpoint is only advanced once every chunk before it has been written,
+# so a killed run resumes after the last fully scored id.
+
+STORE_PATH = "scores.db"
+CHUNK_SIZE = 10_000
+PAGE_ROWS = 1000  # PostgREST's default max-rows; a larger limit is silently capped
+COLUMNS = ["id", "timestamp", "temperature", "turbidity", "ph"]
+
+
+def open_store(path=STORE_PATH):
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    old = [c[1] for c in db.execute("PRAGMA table_info(predicted_quality)")]
+    if old and "id" not in old:
+        # Stores keyed on timestamp lost rows that shared one; they are rebuilt from scratch
+        print("⟳ Rebuilding a timestamp-keyed score store keyed on id")
+        with db:
+            db.execute("DROP TABLE predicted_quality")
+            db.execute("DROP TABLE IF EXISTS backfill_checkpoint")
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS predicted_quality (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT,
+            predicted_quality INTEGER NOT NULL,
+            model_version TEXT NOT NULL
+        )
+    """)
+    db.execute("CREATE TABLE IF NOT EXISTS backfill_checkpoint (source TEXT PRIMARY KEY, last_id INTEGER)")
+    return db
+
+
+def get_checkpoint(db, source):
+    row = db.execute("SELECT last_id FROM backfill_checkpoint WHERE source = ?", (source,)).fetchone()
+    return row[0] if row else None
+
+
+def write_chunk(db, source, ids, timestamps, codes, version):
+    with db:
+        db.executemany(
+            "INSERT OR REPLACE INTO predicted_quality VALUES (?, ?, ?, ?)",
+            zip(ids, timestamps, codes.tolist(), [version] * len(codes)),
+        )
+        db.execute("INSERT OR REPLACE INTO backfill_checkpoint VALUES (?, ?)", (source, ids[-1]))
+
+
+# ======================
+# ROW SOURCES
+# ======================
+# Both yield (ids, timestamps, X) chunks in id order, strictly after `since`
+# (the checkpoint id, whose row is already stored).
+def iter_supabase_chunks(client, since=None, chunk_size=CHUNK_SIZE):
+    rows, after = [], since or 0
+    while True:
+        # Paged at PAGE_ROWS until an empty page: a short page only means the server capped it
+        page = (client.table("lakefishcage").select(",".join(COLUMNS)).gt("id", after).order("id")
+                .limit(PAGE_ROWS).execute().data)
+        if page:
+            rows.extend(page)
+            after = page[-1]["id"]
+        while len(rows) >= chunk_size or (rows and not page):
+            data, rows = rows[:chunk_size], rows[chunk_size:]
+            yield ([r["id"] for r in data], [r["timestamp"] for r in data],
+                   np.array([[r["temperature"], r["turbidity"], r["ph"]] for r in data], dtype=np.float64))
+        if not page:
+            return
+
+
+def iter_csv_chunks(path, since=None, chunk_size=CHUNK_SIZE):
+    """A local lakefishcage export with the same columns as the table; without an id column, rows are
+    numbered from 1 in file order."""
+    import pandas as pd
+
+    for df in pd.read_csv(path, chunksize=chunk_size):
+        ids = df["id"] if "id" in df.columns else df.index.to_series() + 1
+        if since is not None:
+            df, ids = df[ids > since], ids[ids > since]
+        if len(df):
+            yield ids.tolist(), df["timestamp"].tolist(), df[COLUMNS[2:]].to_numpy(dtype=np.float64)
+
+
+# ======================
+# PARALLEL SCORING
+# ======================
+def _score_chunk(X):
+    from model_registry import get_versioned_model
+
+    version, model = get_versioned_model()
+    codes = np.searchsorted(model.classes_, model.predict(X)).astype(np.int8)
+    return version, codes
+
+
+def backfill(chunks, db, source, workers=None):
+    workers = workers or os.cpu_count()
+    in_flight = collections.deque()
+    rows = 0
+    start = last_report = time.perf_counter()
+
+    def drain_one():
+        nonlocal rows, last_report
+        ids, timestamps, future = in_flight.popleft()
+        version, codes = future.result()
+        write_chunk(db, source, ids, timestamps, codes, version)
+        rows += len(codes)
+        now = time.perf_counter()
+        if now - last_report >= 5:
+            print(f"… {rows:,} rows, {rows / (now - start):,.0f} rows/s, up to id {ids[-1]}")
+            last_report = now
+
+    # Chunks are fetched while earlier ones score; results are written in order
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for ids, timestamps, X in chunks:
+            in_flight.append((ids, timestamps, pool.submit(_score_chunk, X)))
+            if len(in_flight) >= 2 * workers:
+                drain_one()
+        while in_flight:
+            drain_one()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Scored {rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s) with {workers} workers")
+    return rows
+
+
+# ======================
+# COMMAND LINE
+# ======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill predicted_quality for historical lakefishcage rows")
+    parser.add_argument("--csv", help="score a local lakefishcage export instead of Supabase")
+    parser.add_argument("--store", default=STORE_PATH)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    args = parser.parse_args()
+
+    db = open_store(args.store)
+    source = f"csv:{os.path.abspath(args.csv)}" if args.csv else "supabase:lakefishcage"
+    since = None if args.restart else get_checkpoint(db, source)
+    if since:
+        print(f"⟳ Resuming after id {since}")
+
+    if args.csv:
+        chunks = iter_csv_chunks(args.csv, since, args.chunk_size)
+    else:
+        from dotenv import load_dotenv
+        from supabase import create_client
+
+        load_dotenv("links.env")
+        client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+        chunks = iter_supabase_chunks(client, since, args.chunk_size)
+
+    backfill(chunks, db, source, args.workers)
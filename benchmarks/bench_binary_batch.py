@@ -0,0 +1,86 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from binary_batch import decode_batch, encode_batch, to_rows
+
+# ======================
+# BINARY BATCH BENCHMARK
+# ======================
+# The same --readings sensor readings, cut into batches of --batch, are
+# encoded once as the JSON arrays the gateway already accepts and once as
+# binary_batch payloads. Each format is decoded into columns (seq, epoch_s
+# and the three readings as NumPy arrays), the form a vectorized consumer
+# wants. Reports bytes per reading and decode throughput, plus the cost of
+# turning binary columns into the rows the upstream JSON insert needs. Run
+# from the repository root:
+#   python -m benchmarks.bench_binary_batch --readings 1000000 --batch 120
+
+POST_INTERVAL_S = 5  # the firmware posts every 5 s
+READINGS = ("temperature", "turbidity", "ph")
+
+
+def readings(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "seq": np.arange(n, dtype=np.uint32),
+        "epoch_s": (1_760_000_000 + POST_INTERVAL_S * np.arange(n)).astype(np.uint32),
+        "temperature": np.round(rng.normal(26, 2, n), 2),
+        "turbidity": np.round(rng.uniform(0, 100, n), 1),
+        "ph": np.round(rng.normal(7.2, 0.4, n), 2),
+    }
+
+
+def json_payloads(data, batch):
+    keys = ("seq", "epoch_s") + READINGS
+    columns = [data[k].tolist() for k in keys]
+    rows = [dict(zip(keys, values)) for values in zip(*columns)]
+    return [json.dumps(rows[i:i + batch]).encode() for i in range(0, len(rows), batch)]
+
+
+def binary_payloads(data, batch):
+    n = len(data["seq"])
+    return [encode_batch(7, 12345, *(data[k][i:i + batch] for k in ("seq", "epoch_s") + READINGS))
+            for i in range(0, n, batch)]
+
+
+def decode_json(payload):
+    rows = json.loads(payload)
+    columns = {k: np.array([r[k] for r in rows], dtype=np.uint32) for k in ("seq", "epoch_s")}
+    columns.update({k: np.array([r[k] for r in rows], dtype=np.float64) for k in READINGS})
+    return columns
+
+
+def timed(fn, payloads):
+    start = time.perf_counter()
+    out = [fn(p) for p in payloads]
+    return time.perf_counter() - start, out
+
+
+def main(n, batch):
+    data = readings(n)
+    encoded = {"json": json_payloads(data, batch), "binary": binary_payloads(data, batch)}
+    decoders = {"json": decode_json, "binary": lambda p: decode_batch(p)[2]}
+    print(f"{n:,} readings in {len(encoded['json']):,} batches of {batch}")
+    print(f"{'format':<8} {'bytes/reading':>14} {'decode (s)':>11} {'readings/s':>13}")
+    decoded = {}
+    for name, payloads in encoded.items():
+        elapsed, decoded[name] = timed(decoders[name], payloads)
+        size = sum(len(p) for p in payloads)
+        print(f"{name:<8} {size / n:>14.1f} {elapsed:>11.3f} {n / elapsed:>13,.0f}")
+    for k in ("seq", "epoch_s") + READINGS:
+        a = np.concatenate([c[k] for c in decoded["json"]])
+        b = np.concatenate([c[k] for c in decoded["binary"]])
+        assert np.allclose(a, b), k
+    elapsed, _ = timed(lambda c: to_rows(7, c), decoded["binary"])
+    print(f"binary columns -> upstream rows: {elapsed:.3f}s ({n / elapsed:,.0f} readings/s); both formats decode identically")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--readings", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=120)
+    args = parser.parse_args()
+    main(args.readings, args.batch)
@@ -0,0 +1,54 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from forest_engine import load_compiled_forest
+
+# ======================
+# EARLY-EXIT VOTING BENCHMARK
+# ======================
+# Run from the repository root:  python -m benchmarks.bench_early_exit
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    forest = load_compiled_forest("water_quality_model.pkl")
+    df = pd.read_csv("WQD_selected.csv")
+    X = df[["Temp", "Turbidity", "pH"]].values
+    rng = np.random.default_rng(0)
+    X_rand = rng.uniform([0, 0, 0], [40, 100, 14], size=(10_000, 3))
+
+    failed = False
+    for name, data in [("WQD_selected.csv", X), ("uniform 10k", X_rand)]:
+        full = forest.predict(data)
+        print(f"\n{name} ({len(data)} rows)")
+        print(f"{'block':>6} {'same labels':>12} {'mean trees':>11} {'full (ms)':>10} {'early (ms)':>11}")
+        t_full = best_of(lambda: forest.predict(data), 3) * 1e3
+        for block in [1, 5, 10, 25]:
+            labels, used = forest.predict_early_exit(data, block=block)
+            same = np.array_equal(labels, full)
+            failed |= not same
+            t_early = best_of(lambda: forest.predict_early_exit(data, block=block), 3) * 1e3
+            print(f"{block:>6} {str(same):>12} {used.mean():>11.1f} {t_full:>10.1f} {t_early:>11.1f}")
+
+    one = X[:1]
+    t_full = best_of(lambda: forest.predict(one), 200) * 1e3
+    t_early = best_of(lambda: forest.predict_early_exit(one), 200) * 1e3
+    print(f"\nsingle row: full {t_full:.3f} ms, early exit {t_early:.3f} ms")
+    if failed:
+        print("❌ Early exit changed a label")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from forest_engine import compile_forest
+
+# ======================
+# EQUIVALENCE CHECK + LATENCY BENCHMARK
+# ======================
+# Run from the repository root:  python -m benchmarks.bench_forest_engine
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    clf = joblib.load("water_quality_model.pkl")
+    forest = compile_forest(clf)
+
+    df = pd.read_csv("WQD_selected.csv")
+    X_csv = df[["Temp", "Turbidity", "pH"]].values
+    rng = np.random.default_rng(0)
+    X_rand = np.column_stack([
+        rng.uniform(-5, 90, 10_000),
+        rng.uniform(0, 100, 10_000),
+        rng.uniform(0, 15, 10_000),
+    ])
+
+    # Equivalence: labels and probabilities must match sklearn exactly
+    failed = False
+    for name, X in [("WQD_selected.csv", X_csv), ("uniform 10k", X_rand)]:
+        same_labels = np.array_equal(clf.predict(X), forest.predict(X))
+        same_proba = np.array_equal(clf.predict_proba(X), forest.predict_proba(X))
+        print(f"{name:<18} labels equal: {same_labels}  proba equal: {same_proba}")
+        failed |= not (same_labels and same_proba)
+    if failed:
+        print("❌ Compiled forest disagrees with the sklearn model")
+        sys.exit(1)
+
+    one = X_csv[:1]
+    print(f"\nForest: {forest.n_estimators} trees, {forest.n_nodes} nodes, depth {forest.max_depth}")
+    print(f"{'batch':>8} {'sklearn (ms)':>14} {'compiled (ms)':>14} {'speedup':>8}")
+    for label, X, repeat in [("1", one, 200), ("100", X_rand[:100], 50), ("10k", X_rand, 5)]:
+        t_sk = best_of(lambda: clf.predict(X), repeat) * 1e3
+        t_cf = best_of(lambda: forest.predict(X), repeat) * 1e3
+        print(f"{label:>8} {t_sk:>14.3f} {t_cf:>14.3f} {t_sk / t_cf:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
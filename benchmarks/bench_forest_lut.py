@@ -0,0 +1,57 @@
+import sys
+import time
+
+import numpy as np
+
+from forest_engine import load_compiled_forest
+from forest_lut import GRID, LUT_DIR, LookupPredictor
+
+# ======================
+# LOOKUP TABLE BENCHMARK
+# ======================
+# Build the table first:  python forest_lut.py
+# Then from the repository root:  python -m benchmarks.bench_forest_lut
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def firmware_readings(rng, n):
+    cols = []
+    for name in ["temperature", "turbidity", "ph"]:
+        low, high, steps = GRID[name]
+        cols.append(rng.integers(round(low * steps), round(high * steps) + 1, n) / steps)
+    return np.column_stack(cols)
+
+
+def main():
+    forest = load_compiled_forest("water_quality_model.pkl")
+    start = time.perf_counter()
+    lut = LookupPredictor(forest, LUT_DIR)
+    print(f"Table opened (memory-mapped) in {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+    rng = np.random.default_rng(0)
+    X = firmware_readings(rng, 100_000)
+    mismatches = int((lut.predict(X) != forest.predict(X)).sum())
+    print(f"Labels differing from the forest on 100k firmware readings: {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+    off_grid = X[:1000] + 0.001
+    print(f"Off-grid fallback agrees: {np.array_equal(lut.predict(off_grid), forest.predict(off_grid))}")
+
+    print(f"\n{'batch':>8} {'forest (ms)':>12} {'table (ms)':>12} {'speedup':>8}")
+    for label, rows, repeat in [("1", X[:1], 200), ("100", X[:100], 50), ("10k", X[:10_000], 5)]:
+        t_f = best_of(lambda: forest.predict(rows), repeat) * 1e3
+        t_l = best_of(lambda: lut.predict(rows), repeat) * 1e3
+        print(f"{label:>8} {t_f:>12.3f} {t_l:>12.3f} {t_f / t_l:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
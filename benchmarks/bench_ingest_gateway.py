@@ -0,0 +1,89 @@
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+from ingest_gateway import IngestBatcher, serve_in_thread as serve_gateway
+from local_supabase import LOCAL_KEY, LocalStore, serve_in_thread
+
+# ======================
+# INGESTION GATEWAY BENCHMARK
+# ======================
+# DEVICES simulated cages post single readings as fast as they can, once
+# straight to the local Supabase stand-in and once through the gateway.
+# Each device keeps its connection open; the firmware opens a new TLS
+# connection per post, so real direct posts cost more than shown here.
+# Reports accepted rows/s, upstream insert requests and rows landed. Run
+# from the repository root:
+#   python -m benchmarks.bench_ingest_gateway --devices 32 --rows 200 --latency-ms 30
+
+READING = {"temperature": 25.0, "ph": 7.5, "turbidity": 20.0}
+HEADERS = {"apikey": LOCAL_KEY, "Authorization": f"Bearer {LOCAL_KEY}", "Content-Type": "application/json",
+           "Prefer": "return=representation"}
+
+
+def run_devices(url, devices, rows):
+    parts = urlsplit(url)
+    errors = [0]
+
+    def device():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port)
+        body = json.dumps(READING)
+        for _ in range(rows):
+            conn.request("POST", "/rest/v1/lakefishcage", body, HEADERS)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 201:
+                errors[0] += 1
+        conn.close()
+
+    threads = [threading.Thread(target=device) for _ in range(devices)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, errors[0]
+
+
+def main(devices, rows, latency_ms, flush_rows, flush_interval):
+    from supabase import create_client
+
+    total = devices * rows
+    print(f"{devices} devices × {rows} posts, {latency_ms:.0f} ms per upstream request")
+    print(f"{'path':<10} {'rows/s':>9} {'upstream req':>13} {'landed':>8} {'errors':>7} {'drain (s)':>10}")
+
+    store = LocalStore()
+    server, url = serve_in_thread(store, latency_ms=latency_ms)
+    seconds, errors = run_devices(url, devices, rows)
+    print(f"{'direct':<10} {total / seconds:>9,.0f} {total:>13,} {store.count('lakefishcage'):>8,} {errors:>7} {0:>10.2f}")
+    server.shutdown()
+
+    store = LocalStore()
+    server, url = serve_in_thread(store, latency_ms=latency_ms)
+    batcher = IngestBatcher(create_client(url, LOCAL_KEY), flush_rows=flush_rows, flush_interval=flush_interval).start()
+    gateway, gateway_url = serve_gateway(batcher)
+    seconds, errors = run_devices(gateway_url, devices, rows)
+    start = time.perf_counter()
+    while store.count("lakefishcage") < total and time.perf_counter() - start < 60:
+        time.sleep(0.01)
+    drain = time.perf_counter() - start
+    requests = batcher.stats()["lakefishcage"]["upstream_requests"]
+    print(f"{'gateway':<10} {total / seconds:>9,.0f} {requests:>13,} {store.count('lakefishcage'):>8,} {errors:>7} "
+          f"{drain:>10.2f}")
+    batcher.stop()
+    gateway.shutdown()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=32)
+    parser.add_argument("--rows", type=int, default=200, help="posts per device")
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--flush-rows", type=int, default=500)
+    parser.add_argument("--flush-interval", type=float, default=1.0)
+    args = parser.parse_args()
+    main(args.devices, args.rows, args.latency_ms, args.flush_rows, args.flush_interval)
@@ -0,0 +1,115 @@
+import argparse
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from ingest_gateway import IngestBatcher
+from ingest_spool import WriteAheadSpool
+from local_supabase import LOCAL_KEY, LocalStore, serve_in_thread
+
+# ======================
+# WRITE-AHEAD SPOOL BENCHMARK
+# ======================
+# 1. Durable ack rate: WRITERS threads each append single readings, with
+#    one fsync per reading and then with group commit.
+# 2. Outage: an hour of posts from --cages cages (a reading and a PIR status
+#    every 5 s each) arrive while the upstream is unreachable. The rows are
+#    spooled at the sustained rate shown.
+# 3. Recovery: the gateway restarts against the local Supabase stand-in and
+#    replays the spool. Reports drain time and checks every row landed once,
+#    in order.
+# Run from the repository root:
+#   python -m benchmarks.bench_ingest_spool --cages 100 --latency-ms 30
+
+WRITERS = 32
+POST_INTERVAL_S = 5  # SENSOR_POST_INTERVAL / PIR_POST_INTERVAL in sensor_sends.ino
+FSYNC_SAMPLE = 2000
+
+
+def parallel(n_items, work, shard=lambda i: i):
+    """Run work(i) for i in range(n_items) on WRITERS threads, split by shard(i); returns seconds."""
+    def writer(k):
+        for i in range(n_items):
+            if shard(i) % WRITERS == k:
+                work(i)
+    threads = [threading.Thread(target=writer, args=(k,)) for k in range(WRITERS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def durable_ack_rate(directory):
+    print(f"{'commit':<14} {'rows/s':>9} {'fsyncs':>8}")
+    for name, group_commit in (("per reading", None), ("group", 0.002)):
+        spool = WriteAheadSpool(f"{directory}/{name.replace(' ', '_')}", group_commit=group_commit)
+        row = {"temperature": 25.0, "ph": 7.5, "turbidity": 20.0, "timestamp": "2025-01-01T00:00:00+00:00"}
+        seconds = parallel(FSYNC_SAMPLE, lambda i: spool.wait_durable(spool.write("lakefishcage", [row])[-1]))
+        print(f"{name:<14} {FSYNC_SAMPLE / seconds:>9,.0f} {spool.stats()['fsyncs']:>8,}")
+        spool.close()
+
+
+def main(cages, latency_ms, max_buffer):
+    from supabase import create_client
+
+    with tempfile.TemporaryDirectory() as tmp:
+        durable_ack_rate(tmp)
+
+        posts = cages * 3600 // POST_INTERVAL_S
+        start_ts = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+        def reading(i):
+            ts = (start_ts + timedelta(seconds=POST_INTERVAL_S * (i // cages))).isoformat()
+            return {"cage_id": i % cages, "timestamp": ts, "temperature": 25.0, "ph": 7.5, "turbidity": 20.0}
+
+        spool = WriteAheadSpool(f"{tmp}/outage")
+        offline = create_client("http://127.0.0.1:9", LOCAL_KEY)  # nothing listens on the discard port
+        batcher = IngestBatcher(offline, max_buffer=max_buffer, spool=spool).start()
+
+        def post(i):
+            row = reading(i)
+            batcher.add("lakefishcage", [row])
+            batcher.add("security_alerts", [{"cage_id": row["cage_id"], "timestamp": row["timestamp"], "status": 0}])
+
+        seconds = parallel(posts, post, shard=lambda i: i % cages)  # each cage posts from one thread, in order
+        stats = spool.stats()
+        print(f"\noutage: {cages} cages × 1 h = {2 * posts:,} rows spooled in {seconds:.1f} s "
+              f"({2 * posts / seconds:,.0f} rows/s, {stats['fsyncs']:,} fsyncs, {stats['segments']} segments)")
+        batcher.stop(flush=False)
+        spool.close()
+
+        store = LocalStore()
+        server, url = serve_in_thread(store, latency_ms=latency_ms)
+        start = time.perf_counter()
+        spool = WriteAheadSpool(f"{tmp}/outage")
+        batcher = IngestBatcher(create_client(url, LOCAL_KEY), max_buffer=max_buffer, spool=spool).start()
+        while (store.count("lakefishcage") < posts or store.count("security_alerts") < posts) \
+                and time.perf_counter() - start < 600:
+            time.sleep(0.05)
+        seconds = time.perf_counter() - start
+        batcher.stop()
+        requests = sum(s["upstream_requests"] for s in batcher.stats().values())
+        landed = {t: store.count(t) for t in ("lakefishcage", "security_alerts")}
+        rows = store.select("lakefishcage", [("select", "cage_id,timestamp"), ("order", "id")])
+        last, in_order = {}, True
+        for r in rows:
+            in_order &= r["timestamp"] > last.get(r["cage_id"], "")
+            last[r["cage_id"]] = r["timestamp"]
+        print(f"replay: {sum(landed.values()):,} rows in {seconds:.1f} s ({sum(landed.values()) / seconds:,.0f} rows/s, "
+              f"{requests:,} upstream requests at {latency_ms:.0f} ms)")
+        print(f"landed {landed}, each cage in order without duplicates: {in_order}, "
+              f"{spool.stats()['segments']} segment(s) left")
+        spool.close()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cages", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    parser.add_argument("--max-buffer", type=int, default=100_000, help="gateway rows held in memory")
+    args = parser.parse_args()
+    main(args.cages, args.latency_ms, args.max_buffer)
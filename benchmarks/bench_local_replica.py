@@ -0,0 +1,64 @@
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from local_replica import LocalReplica
+from local_supabase import LOCAL_KEY, LocalStore, now_iso, seed_from_csv, serve_in_thread
+
+# ======================
+# REPLICA TRANSFER BENCHMARK
+# ======================
+# Dashboard refreshes against the local Supabase stand-in, with one minute
+# of new readings (12 rows, stamped 5 s apart) arriving between refreshes. Direct reads pull the
+# whole window every time; the replica pulls only the rows above its id
+# cursor. Run from the repository root:
+#   python -m benchmarks.bench_local_replica --latency-ms 30
+
+WINDOWS = [10, 100, 1000]
+REFRESHES = 20
+NEW_ROWS = 12
+
+
+def main(latency_ms):
+    from supabase import create_client
+
+    store = LocalStore()
+    seed_from_csv(store)
+    server, url = serve_in_thread(store, latency_ms=latency_ms)
+    client = create_client(url, LOCAL_KEY)
+    clock = datetime.fromisoformat(client.table("lakefishcage").select("timestamp").order("timestamp", desc=True)
+                                   .limit(1).execute().data[0]["timestamp"])
+
+    print(f"{'window':>7} {'direct rows':>12} {'direct (ms)':>12} {'replica rows':>13} {'replica (ms)':>13} {'same':>5}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n, window in enumerate(WINDOWS):
+            replica = LocalReplica(client, f"{tmp}/replica_{window}.db", sync_interval=0)
+            replica.latest("lakefishcage", window)  # bootstrap, not timed
+            fetched = replica.stats()["lakefishcage"]["rows_fetched"]
+            direct_rows = direct_s = replica_s = 0.0
+            same = True
+            for _ in range(REFRESHES):
+                stamps = [clock + timedelta(seconds=5 * (i + 1)) for i in range(NEW_ROWS)]
+                clock = stamps[-1]
+                store.insert("lakefishcage", [{"timestamp": now_iso(t), "temperature": 25.0, "turbidity": 20.0, "ph": 7.5}
+                                              for t in stamps])
+                start = time.perf_counter()
+                remote = client.table("lakefishcage").select("*").order("timestamp", desc=True).limit(window).execute().data
+                direct_s += time.perf_counter() - start
+                direct_rows += len(remote)
+                start = time.perf_counter()
+                local = replica.table("lakefishcage").select("*").order("timestamp", desc=True).limit(window).execute().data
+                replica_s += time.perf_counter() - start
+                same &= [r["id"] for r in local] == [r["id"] for r in remote]
+            replica_rows = replica.stats()["lakefishcage"]["rows_fetched"] - fetched
+            print(f"{window:>7} {direct_rows / REFRESHES:>12.0f} {direct_s / REFRESHES * 1e3:>12.1f} "
+                  f"{replica_rows / REFRESHES:>13.0f} {replica_s / REFRESHES * 1e3:>13.1f} {str(same):>5}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    args = parser.parse_args()
+    main(args.latency_ms)
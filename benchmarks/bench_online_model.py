@@ -0,0 +1,75 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_engine import compile_forest, load_compiled_forest
+from online_model import REFRESH_EVERY, RollingForest
+
+# ======================
+# ONLINE UPDATE BENCHMARK
+# ======================
+# Run from the repository root:  python -m benchmarks.bench_online_model
+#
+# A labelled stream is resampled from WQD_selected.csv with a slow seasonal
+# drift: the probe reads up to +6 °C warmer over the stream. Checkpoints are
+# spaced every few refreshes. At each one, the rolling forest's update cost
+# is compared with a full refit (water_quality_model.py's forest on every row
+# seen so far). Accuracy is scored on the rows that arrive next.
+
+STREAM_ROWS = 30_000
+CHECK_EVERY = 5  # refreshes between full-refit checkpoints
+
+
+def drifting_stream(rows, seed=0):
+    df = pd.read_csv("WQD_selected.csv")
+    X = df[["Temp", "Turbidity", "pH"]].values
+    y = df["Water Quality"].values
+    rng = np.random.default_rng(seed)
+    pick = rng.integers(0, len(y), rows)
+    Xs = X[pick] + rng.normal(0, [0.2, 0.5, 0.02], size=(rows, 3))
+    Xs[:, 0] += 6.0 * np.arange(rows) / rows
+    return Xs, y[pick]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def main():
+    base = load_compiled_forest("water_quality_model.pkl")
+    X, y = drifting_stream(STREAM_ROWS)
+    rolling = RollingForest(base)
+    step = REFRESH_EVERY * CHECK_EVERY
+
+    print(f"{'rows':>7} {'online (ms)':>12} {'refit (ms)':>11} {'speed-up':>9} "
+          f"{'acc frozen':>11} {'acc online':>11} {'acc refit':>10}")
+    online_total = refit_total = 0.0
+    failed = False
+    for seen in range(step, STREAM_ROWS - step + 1, step):
+        _, t_online = timed(lambda: (rolling.partial_fit(X[seen - step:seen], y[seen - step:seen]), rolling.model))
+        online_total += t_online
+        clf = RandomForestClassifier(n_estimators=100, random_state=42)
+        refit, t_refit = timed(lambda: compile_forest(clf.fit(X[:seen], y[:seen])))
+        refit_total += t_refit * CHECK_EVERY  # a full refit at every refresh point
+
+        X_next, y_next = X[seen:seen + step], y[seen:seen + step]
+        acc = [float(np.mean(m.predict(X_next) == y_next)) for m in (base, rolling.model, refit)]
+        failed |= rolling.model.n_estimators != base.n_estimators
+        print(f"{seen:>7,} {t_online * 1e3 / CHECK_EVERY:>12.1f} {t_refit * 1e3:>11.1f} "
+              f"{t_refit * CHECK_EVERY / t_online:>8.1f}x {acc[0]:>11.4f} {acc[1]:>11.4f} {acc[2]:>10.4f}")
+
+    rows = rolling.rows_seen
+    print(f"\nper row: online {online_total / rows * 1e6:.1f} us, "
+          f"full refit every {REFRESH_EVERY} rows {refit_total / rows * 1e6:.1f} us")
+    if failed:
+        print("❌ rolling forest changed size")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
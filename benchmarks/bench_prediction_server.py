@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import time
+
+import numpy as np
+
+from model_registry import get_versioned_model
+from prediction_server import MicroBatcher, make_app
+
+# ======================
+# LOAD GENERATOR
+# ======================
+# Closed-loop clients: each one sends a reading, waits for the answer and
+# sends the next. Run from the repository root:
+#   python -m benchmarks.bench_prediction_server            # in-process
+#   python -m benchmarks.bench_prediction_server --http     # over local HTTP
+
+CONCURRENCY = [1, 100, 10_000]
+
+
+def readings(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.integers(1500, 3500, n) / 100,
+        rng.integers(0, 1001, n) / 10,
+        rng.integers(500, 950, n) / 100,
+    ]).tolist()
+
+
+class Unbatched:
+    """Baseline: every request is its own predict_proba call."""
+
+    async def predict(self, reading):
+        version, model = get_versioned_model()
+        proba = model.predict_proba(np.asarray([reading]))[0]
+        return {"label": int(model.classes_[np.argmax(proba)]), "probabilities": proba.tolist(),
+                "model_version": version}
+
+
+async def run_clients(send, clients, duration):
+    latencies = []
+    stop = time.perf_counter() + duration
+    rows = readings(max(clients, 1000))
+
+    async def client(i):
+        reading = rows[i % len(rows)]
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            await send(reading)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    lat = np.array(latencies) * 1e3
+    return len(lat) / elapsed, np.percentile(lat, 50), np.percentile(lat, 99)
+
+
+async def main(args):
+    get_versioned_model()  # load the model before timing
+    print(f"{'mode':<22} {'clients':>8} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+
+    if args.http:
+        import aiohttp
+        from aiohttp import web
+
+        batcher = MicroBatcher(args.window_ms / 1e3)
+        runner = web.AppRunner(make_app(batcher))
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", args.port).start()
+        url = f"http://127.0.0.1:{args.port}/predict"
+        connector = aiohttp.TCPConnector(limit=args.connections)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            async def send(reading):
+                async with session.post(url, json=dict(zip(["temperature", "turbidity", "ph"], reading))) as resp:
+                    return await resp.json()
+
+            for clients in CONCURRENCY:
+                rps, p50, p99 = await run_clients(send, clients, args.duration)
+                print(f"{'http micro-batch':<22} {clients:>8} {rps:>10.0f} {p50:>10.2f} {p99:>10.2f}")
+        await runner.cleanup()
+        return
+
+    baseline = Unbatched()
+    batcher = MicroBatcher(args.window_ms / 1e3)
+    await batcher.start()
+    for clients in CONCURRENCY:
+        for name, target in [("unbatched", baseline), ("micro-batch", batcher)]:
+            rps, p50, p99 = await run_clients(target.predict, clients, args.duration)
+            print(f"{name:<22} {clients:>8} {rps:>10.0f} {p50:>10.2f} {p99:>10.2f}")
+    print(f"\nmean micro-batch size: {batcher.rows / max(batcher.batches, 1):.1f}")
+    await batcher.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--http", action="store_true")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--connections", type=int, default=100, help="HTTP connection pool size")
+    parser.add_argument("--window-ms", type=float, default=2.0)
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per concurrency level")
+    asyncio.run(main(parser.parse_args()))
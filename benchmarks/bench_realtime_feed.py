@@ -0,0 +1,96 @@
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+from local_supabase import LOCAL_KEY, LocalStore, now_iso, serve_in_thread
+from local_replica import SYNC_INTERVAL_S
+from realtime_feed import RealtimeFeed
+
+# ======================
+# REALTIME FEED LATENCY BENCHMARK
+# ======================
+# A device POSTs readings to the local Supabase stand-in at random moments.
+# The realtime feed receives them over the changefeed while a poller, like
+# the replica's SYNC_INTERVAL_S sync, asks for new rows on a fixed schedule.
+# Reports POST-to-delivery latency for both and the requests each one made.
+# On screen, add at most the dashboard's 1 s fragment tick to the push
+# numbers. Run from the repository root:
+#   python -m benchmarks.bench_realtime_feed --posts 40 --latency-ms 30
+
+
+def post(url, row):
+    request = urllib.request.Request(f"{url}/rest/v1/lakefishcage", data=json.dumps(row).encode(), method="POST",
+                                     headers={"apikey": LOCAL_KEY, "Content-Type": "application/json",
+                                              "Prefer": "return=representation"})
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())[0]["id"]
+
+
+def summary(name, latencies, requests):
+    ms = np.array(latencies) * 1e3
+    print(f"{name:<18} {np.percentile(ms, 50):>9.1f} {np.percentile(ms, 99):>9.1f} {ms.max():>9.1f} {requests:>9}")
+
+
+def main(posts, gap_s, poll_interval, latency_ms):
+    from supabase import create_client
+
+    store = LocalStore()
+    server, url = serve_in_thread(store, latency_ms=latency_ms)
+    client = create_client(url, LOCAL_KEY)
+
+    sent = {}  # id -> perf_counter at POST return
+    pushed, polled = {}, {}
+    feed = RealtimeFeed(url, LOCAL_KEY, tables=("lakefishcage",))
+    feed.subscribe("lakefishcage", "bench", lambda rows: pushed.update((r["id"], time.perf_counter()) for r in rows))
+    feed.start()
+    while not feed.stats()["lakefishcage"]["connected"]:
+        time.sleep(0.01)
+
+    stop = threading.Event()
+    poll_requests = [0]
+
+    def poller():
+        after = 0
+        while not stop.wait(poll_interval):
+            rows = client.table("lakefishcage").select("*").gt("id", after).order("id").execute().data
+            poll_requests[0] += 1
+            seen = time.perf_counter()
+            for r in rows:
+                polled[r["id"]] = seen
+                after = r["id"]
+
+    threading.Thread(target=poller, daemon=True).start()
+
+    rng = random.Random(0)
+    for _ in range(posts):
+        time.sleep(rng.uniform(0, 2 * gap_s))
+        start = time.perf_counter()
+        row_id = post(url, {"timestamp": now_iso(), "temperature": 25.0, "turbidity": 20.0, "ph": 7.5})
+        sent[row_id] = start
+    deadline = time.perf_counter() + poll_interval + 2
+    while (len(polled) < posts or len(pushed) < posts) and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    stop.set()
+    feed.stop()
+
+    print(f"{posts} posts, mean gap {gap_s:.2f} s, poll every {poll_interval:.1f} s, {latency_ms:.0f} ms per request")
+    print(f"{'':<18} {'p50 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9} {'requests':>9}")
+    summary("realtime feed", [pushed[i] - t for i, t in sent.items() if i in pushed], 1)
+    summary("polling", [polled[i] - t for i, t in sent.items() if i in polled], poll_requests[0])
+    print(f"delivered: feed {len(pushed)}/{posts}, polling {len(polled)}/{posts}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--posts", type=int, default=40)
+    parser.add_argument("--gap-s", type=float, default=0.5, help="mean time between posts")
+    parser.add_argument("--poll-interval", type=float, default=SYNC_INTERVAL_S)
+    parser.add_argument("--latency-ms", type=float, default=30.0)
+    args = parser.parse_args()
+    main(args.posts, args.gap_s, args.poll_interval, args.latency_ms)
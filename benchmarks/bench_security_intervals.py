@@ -0,0 +1,85 @@
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from local_supabase import LOCAL_KEY, LocalStore, now_iso, serve_in_thread
+from security_intervals import IntervalFolder
+
+# ======================
+# SECURITY INTERVAL BENCHMARK
+# ======================
+# --cages cages post a PIR status every 5 s for --hours hours, with motion
+# (status 1 for a few heartbeats) about --events-per-hour times an hour. The
+# heartbeats are written to the local Supabase stand-in twice, in gateway-
+# sized batches: once as raw security_alerts rows and once folded into
+# security_intervals. Reports rows stored, upstream requests, and the rows
+# and time a full-period timeline query costs. Run from the repository root:
+#   python -m benchmarks.bench_security_intervals --cages 20 --hours 24
+
+POST_INTERVAL_S = 5  # PIR_POST_INTERVAL in sensor_sends.ino
+BATCH_ROWS = 500  # ingest_gateway.FLUSH_ROWS
+
+
+def heartbeats(cages, hours, events_per_hour, seed=0):
+    rng = np.random.default_rng(seed)
+    steps = hours * 3600 // POST_INTERVAL_S
+    status = np.zeros((steps, cages), dtype=np.int64)
+    for cage in range(cages):
+        starts = np.flatnonzero(rng.random(steps) < events_per_hour * POST_INTERVAL_S / 3600)
+        for s, length in zip(starts, rng.integers(1, 7, len(starts))):
+            status[s:s + length, cage] = 1
+    start = datetime.now(timezone.utc) - timedelta(hours=hours)
+    stamps = [now_iso(start + timedelta(seconds=POST_INTERVAL_S * i)) for i in range(steps)]
+    return [{"cage_id": cage, "timestamp": stamps[i], "status": int(status[i, cage])}
+            for i in range(steps) for cage in range(cages)]
+
+
+def main(cages, hours, events_per_hour):
+    from supabase import create_client
+
+    rows = heartbeats(cages, hours, events_per_hour)
+    store = LocalStore()
+    server, url = serve_in_thread(store)
+    client = create_client(url, LOCAL_KEY)
+    batches = [rows[i:i + BATCH_ROWS] for i in range(0, len(rows), BATCH_ROWS)]
+
+    start = time.perf_counter()
+    for batch in batches:
+        client.table("security_alerts").insert(batch, returning="minimal").execute()
+    raw_write = time.perf_counter() - start
+
+    folder = IntervalFolder()
+    start = time.perf_counter()
+    for batch in batches:
+        folder.write(client, batch)
+    interval_write = time.perf_counter() - start
+
+    since = rows[0]["timestamp"]
+    start = time.perf_counter()
+    raw = client.table("security_alerts").select("*").gte("timestamp", since).order("timestamp").execute().data
+    raw_query = time.perf_counter() - start
+    start = time.perf_counter()
+    intervals = client.table("security_intervals").select("*").gte("ended_at", since).order("started_at").execute().data
+    interval_query = time.perf_counter() - start
+
+    samples = sum(i["samples"] for i in intervals)
+    print(f"{cages} cages × {hours} h, {len(rows):,} heartbeats, ~{events_per_hour:g} motion events per cage-hour")
+    print(f"{'storage':<12} {'rows':>9} {'requests':>9} {'write (s)':>10} {'timeline rows':>14} {'query (ms)':>11}")
+    print(f"{'raw':<12} {store.count('security_alerts'):>9,} {len(batches):>9,} {raw_write:>10.2f} "
+          f"{len(raw):>14,} {raw_query * 1e3:>11.1f}")
+    # plus one lookup of each cage's latest stored interval the first time the folder sees it
+    print(f"{'intervals':<12} {store.count('security_intervals'):>9,} {len(batches) + cages:>9,} {interval_write:>10.2f} "
+          f"{len(intervals):>14,} {interval_query * 1e3:>11.1f}")
+    print(f"intervals cover {samples:,} of {len(rows):,} heartbeats")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cages", type=int, default=20)
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--events-per-hour", type=float, default=2.0)
+    args = parser.parse_args()
+    main(args.cages, args.hours, args.events_per_hour)
@@ -0,0 +1,61 @@
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# ======================
+# COLD START BENCHMARK
+# ======================
+# Each scenario runs in a fresh interpreter, the way a dashboard process
+# starts. Run from the repository root:  python -m benchmarks.bench_startup
+
+BEFORE = """
+import time, json
+t0 = time.perf_counter()
+import numpy as np
+import joblib
+t1 = time.perf_counter()
+model = joblib.load("water_quality_model.pkl")
+t2 = time.perf_counter()
+model.predict(np.array([[25.0, 30.0, 7.0]]))
+t3 = time.perf_counter()
+print(json.dumps([t1 - t0, t2 - t1, t3 - t2]))
+"""
+
+AFTER = """
+import time, json
+t0 = time.perf_counter()
+import numpy as np
+from model_registry import get_model
+t1 = time.perf_counter()
+model = get_model()
+t2 = time.perf_counter()
+model.predict(np.array([[25.0, 30.0, 7.0]]))
+t3 = time.perf_counter()
+print(json.dumps([t1 - t0, t2 - t1, t3 - t2]))
+"""
+
+RUNS = 5
+
+
+def measure(code):
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        out = subprocess.run([sys.executable, "-W", "ignore", "-c", code],
+                             capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(out) + [time.perf_counter() - start])
+    return [statistics.median(col) * 1e3 for col in zip(*samples)]
+
+
+def main():
+    print(f"Median of {RUNS} fresh processes (ms)")
+    print(f"{'':<22} {'imports':>9} {'load':>9} {'1st pred':>9} {'process':>9}")
+    for name, code in [("joblib pickle", BEFORE), ("mmap artifact", AFTER)]:
+        imports, load, first, total = measure(code)
+        print(f"{name:<22} {imports:>9.1f} {load:>9.1f} {first:>9.2f} {total:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+# ======================
+# TRAINING DATA LOAD BENCHMARK
+# ======================
+# Compares pd.read_csv (what water_quality_model.py used to do) with the
+# memory-mapped columnar cache. Every measurement runs in a fresh process so
+# peak RSS is per scenario. Run from the repository root:
+#   python -m benchmarks.bench_training_data --rows 4300 1000000 50000000
+
+# ru_maxrss survives fork+exec from this (pandas-heavy) parent; VmHWM does not
+PEAK_RSS = """
+def peak_rss_kb():
+    with open("/proc/self/status") as fh:
+        return next(int(line.split()[1]) for line in fh if line.startswith("VmHWM"))
+"""
+
+READ_CSV = """
+import json, time
+{peak}
+import pandas as pd
+t = time.perf_counter()
+df = pd.read_csv({path!r})
+X = df[["Temp", "Turbidity", "pH"]].values; y = df["Water Quality"].values
+X.sum()
+print(json.dumps([time.perf_counter() - t, peak_rss_kb()]))
+"""
+
+CACHED = """
+import json, time
+{peak}
+from training_data import load_training_data
+t = time.perf_counter()
+X, y = load_training_data({path!r}, cache_dir={cache!r}, verbose=False)
+X.sum()
+print(json.dumps([time.perf_counter() - t, peak_rss_kb()]))
+"""
+
+
+def make_csv(rows, path):
+    src = pd.read_csv("WQD_selected.csv")
+    rng = np.random.default_rng(0)
+    with open(path, "w") as fh:
+        fh.write(",".join(src.columns) + "\n")
+        for start in range(0, rows, 1_000_000):
+            n = min(1_000_000, rows - start)
+            sample = src.iloc[rng.integers(0, len(src), n)].copy()
+            sample[["Temp", "Turbidity", "pH"]] += rng.normal(0, 0.01, (n, 3))
+            sample.to_csv(fh, header=False, index=False)
+
+
+def run(code):
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    seconds, rss_kb = json.loads(out)
+    return seconds, rss_kb / 1024
+
+
+def main(rows_list):
+    print(f"{'rows':>11} {'read_csv (s)':>13} {'RSS (MB)':>9} {'build (s)':>10} {'cached (s)':>11} {'RSS (MB)':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = os.path.join(tmp, "cache")
+        for rows in rows_list:
+            path = "WQD_selected.csv" if rows == 4300 else os.path.join(tmp, f"wqd_{rows}.csv")
+            if path != "WQD_selected.csv":
+                make_csv(rows, path)
+            csv_s, csv_rss = run(READ_CSV.format(peak=PEAK_RSS, path=path))
+            build_s, _ = run(CACHED.format(peak=PEAK_RSS, path=path, cache=cache))
+            cached_s, cached_rss = run(CACHED.format(peak=PEAK_RSS, path=path, cache=cache))
+            print(f"{rows:>11,} {csv_s:>13.3f} {csv_rss:>9.0f} {build_s:>10.3f} {cached_s:>11.3f} {cached_rss:>9.0f}")
+            if path != "WQD_selected.csv":
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[4300, 1_000_000])
+    main(parser.parse_args().rows)
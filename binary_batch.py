@@ -0,0 +1,129 @@
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+from local_supabase import FIRMWARE_DIGITS
+
+# ======================
+# BINARY SENSOR BATCHES
+# ======================
+# A compact alternative to one JSON object per HTTPS post. A device buffers
+# readings and posts them together to the gateway's usual
+# /rest/v1/lakefishcage path with Content-Type CONTENT_TYPE. Everything is
+# little-endian and fixed-layout, so the decoder is one np.frombuffer and a
+# few vectorized scalings, with no Python object per reading:
+#
+#   struct header { char magic[2] = "AQ"; uint8 version = 1; uint8 reserved;
+#                   uint32 device_id; uint32 boot_id; uint16 count; uint16 reserved; };
+#   struct record { uint32 seq; uint32 epoch_s;
+#                   int16 temperature_c100; uint16 turbidity_x10; uint16 ph_x100; };
+#   header, count records, then uint32 crc32 of everything before it
+#
+# Values use fixed point at the precision sensor_sends.ino formats them
+# with (2, 1 and 2 decimals); MISSING marks a failed sensor. A minute of
+# readings (12) is 188 bytes in one post, against ~55 bytes of JSON plus
+# TLS and HTTP headers for each reading.
+#
+# seq counts up from 0 on every boot; boot_id is random per boot. The
+# gateway drops records at or below the highest seq it has seen from that
+# (device_id, boot_id), so a device that retries a batch after a lost
+# response does not insert it twice. Rows carry the device_id as cage_id
+# (ingest_gateway.py --migration adds the column), so device_id must fit a
+# Postgres integer: batches with a device_id of 2^31 or more are refused. A device whose clock is
+# not set yet sends epoch_s 0, and the gateway stamps those readings on
+# receipt.
+
+CONTENT_TYPE = "application/x-aquaculture-batch"
+MAGIC = b"AQ"
+VERSION = 1
+HEADER = struct.Struct("<2sBBIIHH")  # magic, version, reserved, device_id, boot_id, count, reserved
+CRC = struct.Struct("<I")
+RECORD = np.dtype([("seq", "<u4"), ("epoch_s", "<u4"), ("temperature", "<i2"), ("turbidity", "<u2"), ("ph", "<u2")])
+SCALE = {name: 10.0 ** digits for name, digits in FIRMWARE_DIGITS.items()}
+MISSING = {"temperature": -32768, "turbidity": 65535, "ph": 65535}
+MAX_RECORDS = 4096
+MAX_DEVICE_ID = 2 ** 31 - 1  # cage_id is a Postgres integer
+
+
+class BatchError(ValueError):
+    pass
+
+
+def encode_batch(device_id, boot_id, seq, epoch_s, temperature, turbidity, ph):
+    """Pack equal-length arrays into one payload (the firmware's side, for tools and benchmarks)."""
+    records = np.zeros(len(seq), dtype=RECORD)
+    records["seq"] = seq
+    records["epoch_s"] = epoch_s
+    for name, values in (("temperature", temperature), ("turbidity", turbidity), ("ph", ph)):
+        values = np.asarray(values, dtype=np.float64)
+        scaled = np.round(np.nan_to_num(values, nan=0.0) * SCALE[name])
+        records[name] = np.where(np.isnan(values), MISSING[name], scaled)
+    body = HEADER.pack(MAGIC, VERSION, 0, device_id, boot_id, len(records), 0) + records.tobytes()
+    return body + CRC.pack(zlib.crc32(body))
+
+
+def decode_batch(payload):
+    """(device_id, boot_id, columns): seq and epoch_s arrays plus float64 readings, NaN where missing."""
+    if len(payload) < HEADER.size + CRC.size:
+        raise BatchError("payload shorter than a header")
+    magic, version, _, device_id, boot_id, count, _ = HEADER.unpack_from(payload)
+    if magic != MAGIC or version != VERSION:
+        raise BatchError("not an aquaculture batch (magic/version)")
+    if count > MAX_RECORDS or len(payload) != HEADER.size + count * RECORD.itemsize + CRC.size:
+        raise BatchError(f"length {len(payload)} does not match {count} records")
+    if CRC.unpack_from(payload, len(payload) - CRC.size)[0] != zlib.crc32(memoryview(payload)[:-CRC.size]):
+        raise BatchError("crc mismatch")
+    if device_id > MAX_DEVICE_ID:
+        raise BatchError(f"device_id {device_id} does not fit cage_id (at most {MAX_DEVICE_ID})")
+    records = np.frombuffer(payload, dtype=RECORD, count=count, offset=HEADER.size)
+    columns = {"seq": records["seq"], "epoch_s": records["epoch_s"]}
+    for name, scale in SCALE.items():
+        raw = records[name]
+        columns[name] = np.where(raw == MISSING[name], np.nan, raw / scale)
+    return device_id, boot_id, columns
+
+
+def to_rows(device_id, columns, mask=None):
+    """lakefishcage rows for the upstream JSON insert; timestamps formatted like local_supabase.now_iso."""
+    if mask is not None:
+        columns = {k: v[mask] for k, v in columns.items()}
+    stamps = np.char.add(np.datetime_as_string(columns["epoch_s"].astype("datetime64[s]").astype("datetime64[us]"),
+                                               unit="us"), "+00:00")
+    values = [np.where(np.isnan(columns[c]), None, columns[c].round(FIRMWARE_DIGITS[c])).tolist() for c in SCALE]
+    rows = [{"cage_id": device_id, "timestamp": ts, "temperature": t, "turbidity": u, "ph": p}
+            for ts, t, u, p in zip(stamps.tolist(), *values)]
+    for i in np.flatnonzero(columns["epoch_s"] == 0).tolist():
+        del rows[i]["timestamp"]  # no clock yet; IngestBatcher.add stamps it
+    return rows
+
+
+class SequenceFilter:
+    """Highest seq accepted per (device_id, boot_id)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = {}  # (device_id, boot_id) -> [lock, highest accepted seq]
+
+    def admit(self, device_id, boot_id, seq, accept):
+        """Mask the records not seen before, call accept(mask), and only if it returns, record them as seen.
+
+        Batches from one (device_id, boot_id) are admitted one at a time, so concurrent retries of the
+        same batch cannot both get through. Returns (mask, highest accepted seq).
+        """
+        with self._lock:
+            entry = self._last.setdefault((device_id, boot_id), [threading.Lock(), -1])
+        with entry[0]:
+            seq = seq.astype(np.int64)
+            # Fresh means above everything seen before it, in earlier batches or earlier in this one
+            mask = seq > np.maximum.accumulate(np.concatenate(([entry[1]], seq[:-1])))
+            accept(mask)
+            if len(seq):
+                entry[1] = max(entry[1], int(seq.max()))
+            return mask, entry[1]
+
+    def last_seq(self, device_id, boot_id):
+        with self._lock:
+            entry = self._last.get((device_id, boot_id))
+        return None if entry is None or entry[1] < 0 else entry[1]
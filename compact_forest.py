@@ -0,0 +1,196 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from forest_engine import CompiledForest, load_compiled_forest
+from model_artifact import save_artifact
+
+# ======================
+# FOREST VARIANTS
+# ======================
+# Every variant is derived from the trained forest's node tables, no refit:
+#   trees      keep the first N trees
+#   max_depth  nodes at that depth become leaves (with the node's class mix)
+#   prune      siblings that are both leaves voting for the same class merge
+#              into their parent, repeated bottom-up
+#   float32    thresholds and leaf values stored as float32; thresholds are
+#              rounded down so float32 inputs split exactly as before
+
+
+def compact(forest, trees=None, max_depth=None, prune=False, float32=False):
+    keep = range(forest.n_estimators if trees is None else min(trees, forest.n_estimators))
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    depth_reached = 0
+
+    for t in keep:
+        root = int(forest.roots[t])
+        leaf = {}
+
+        def mark(n, d):
+            l, r = int(forest.left[n]), int(forest.right[n])
+            if l == n or (max_depth is not None and d >= max_depth):
+                leaf[n] = True
+                return
+            mark(l, d + 1)
+            mark(r, d + 1)
+            leaf[n] = (prune and leaf[l] and leaf[r]
+                       and np.argmax(forest.value[l]) == np.argmax(forest.value[r]))
+
+        mark(root, 0)
+
+        # Re-number the surviving nodes in pre-order
+        base = len(feature)
+        stack = [(root, None, None, 0)]
+        while stack:
+            n, parent, side, d = stack.pop()
+            new = len(feature)
+            if parent is not None:
+                (left if side == "l" else right)[parent] = new
+            depth_reached = max(depth_reached, d)
+            value.append(forest.value[n])
+            if leaf[n]:
+                feature.append(0)
+                threshold.append(np.inf)
+                left.append(new)
+                right.append(new)
+            else:
+                feature.append(int(forest.feature[n]))
+                threshold.append(float(forest.threshold[n]))
+                left.append(-1)
+                right.append(-1)
+                stack.append((int(forest.right[n]), new, "r", d + 1))
+                stack.append((int(forest.left[n]), new, "l", d + 1))
+        roots.append(base)
+
+    threshold = np.asarray(threshold, dtype=np.float64)
+    value = np.asarray(value, dtype=np.float64)
+    if float32:
+        threshold = _round_down_float32(threshold)
+        value = value.astype(np.float32)
+    return CompiledForest(
+        feature=np.asarray(feature, dtype=np.intp),
+        threshold=threshold,
+        left=np.asarray(left, dtype=np.intp),
+        right=np.asarray(right, dtype=np.intp),
+        value=value,
+        roots=np.asarray(roots, dtype=np.intp),
+        classes=forest.classes_,
+        max_depth=depth_reached,
+        feature_names=forest.feature_names_in_,
+    )
+
+
+def _round_down_float32(threshold):
+    # x <= t for a float32 x holds exactly when x <= the largest float32 <= t
+    t32 = threshold.astype(np.float32)
+    over = t32.astype(np.float64) > threshold
+    t32[over] = np.nextafter(t32[over], np.float32(-np.inf))
+    return t32
+
+
+VARIANTS = [
+    ("baseline", {}),
+    ("trees=100", {"trees": 100}),
+    ("trees=50", {"trees": 50}),
+    ("trees=25", {"trees": 25}),
+    ("trees=10", {"trees": 10}),
+    ("depth=8", {"max_depth": 8}),
+    ("depth=6", {"max_depth": 6}),
+    ("depth=4", {"max_depth": 4}),
+    ("pruned", {"prune": True}),
+    ("float32", {"float32": True}),
+    ("50/depth=8/pruned/f32", {"trees": 50, "max_depth": 8, "prune": True, "float32": True}),
+    ("25/depth=6/pruned/f32", {"trees": 25, "max_depth": 6, "prune": True, "float32": True}),
+]
+
+
+# ======================
+# EVALUATION
+# ======================
+def holdout_split(csv_path="WQD_selected.csv"):
+    """The same stratified 80/20 split water_quality_model.py trains with."""
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+
+    df = pd.read_csv(csv_path)
+    X = df[["Temp", "Turbidity", "pH"]].values
+    y = df["Water Quality"].values
+    _, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    return X_test, y_test
+
+
+def artifact_bytes(forest):
+    path = tempfile.mkdtemp()
+    try:
+        save_artifact(forest, path)
+        return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+    finally:
+        shutil.rmtree(path)
+
+
+def row_latency(forest, X, repeat=200):
+    best = float("inf")
+    row = X[:1]
+    for _ in range(repeat):
+        start = time.perf_counter()
+        forest.predict(row)
+        best = min(best, time.perf_counter() - start)
+    start = time.perf_counter()
+    forest.predict(X)
+    return best, (time.perf_counter() - start) / len(X)
+
+
+def evaluate(forest, X_test, y_test, X_bench):
+    single, batched = row_latency(forest, X_bench)
+    return {
+        "trees": forest.n_estimators,
+        "nodes": forest.n_nodes,
+        "depth": forest.max_depth,
+        "accuracy": float(np.mean(forest.predict(X_test) == y_test)),
+        "bytes": artifact_bytes(forest),
+        "single_row_ms": single * 1e3,
+        "batch_row_us": batched * 1e6,
+    }
+
+
+# ======================
+# COMMAND LINE
+# ======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare smaller variants of the water quality forest")
+    parser.add_argument("--model", default="water_quality_model.pkl")
+    parser.add_argument("--data", default="WQD_selected.csv")
+    parser.add_argument("--publish", metavar="VARIANT", choices=[name for name, _ in VARIANTS], help="publish this variant to the model registry")
+    args = parser.parse_args()
+
+    forest = load_compiled_forest(args.model)
+    X_test, y_test = holdout_split(args.data)
+    X_bench = np.random.default_rng(0).uniform([0, 0, 0], [40, 100, 14], size=(10_000, 3))
+
+    print(f"{'variant':<24} {'trees':>5} {'nodes':>7} {'depth':>5} {'accuracy':>9} "
+          f"{'size (KB)':>10} {'1 row (ms)':>11} {'10k (us/row)':>13}")
+    built, results = {}, {}
+    for name, params in VARIANTS:
+        built[name] = variant = compact(forest, **params)
+        results[name] = r = evaluate(variant, X_test, y_test, X_bench)
+        print(f"{name:<24} {r['trees']:>5} {r['nodes']:>7} {r['depth']:>5} {r['accuracy']:>9.4f} "
+              f"{r['bytes'] / 1024:>10.1f} {r['single_row_ms']:>11.3f} {r['batch_row_us']:>13.2f}")
+
+    if args.publish:
+        from model_registry import ModelRegistry, file_sha256
+
+        params = dict(VARIANTS)[args.publish]
+        r = results[args.publish]
+        version = ModelRegistry().publish(built[args.publish], {
+            "source": f"compact_forest.py {args.model} {args.publish}",
+            "training_data": args.data,
+            "training_data_sha256": file_sha256(args.data),
+            "params": params,
+            "metrics": {"accuracy": r["accuracy"], "test_rows": len(y_test),
+                        "single_row_ms": r["single_row_ms"], "bytes": r["bytes"]},
+        })
+        print(f"✅ Published {args.publish} as {version}")
@@ -0,0 +1,43 @@
+import time
+
+# ======================
+# DASHBOARD FETCH
+# ======================
+# A rerun's queries all read the local replica (local_replica.py): SQLite
+# reads that share the table's sync, so running them on worker threads
+# would only serialize them on the replica's locks. They run one after
+# another on the session's thread instead. Errors are collected per query,
+# not raised, so the page can render whatever did arrive, and each query is
+# timed for the debug panel.
+
+
+class FetchResult:
+    def __init__(self):
+        self.results = {}
+        self.errors = {}
+        self.timings = {}  # name -> seconds
+        self.wall_seconds = 0.0
+
+    def get(self, name, default=None):
+        return self.results.get(name, default)
+
+    def timing_rows(self):
+        rows = [{"query": name, "ms": round(seconds * 1e3, 1), "status": "error" if name in self.errors else "ok"}
+                for name, seconds in self.timings.items()]
+        rows.sort(key=lambda r: -r["ms"])
+        return rows
+
+
+def fetch_all(queries):
+    """Run {name: zero-argument callable} in turn; returns a FetchResult."""
+    out = FetchResult()
+    start = time.perf_counter()
+    for name, fn in queries.items():
+        began = time.perf_counter()
+        try:
+            out.results[name] = fn()
+        except Exception as e:
+            out.errors[name] = e
+        out.timings[name] = time.perf_counter() - began
+    out.wall_seconds = time.perf_counter() - start
+    return out
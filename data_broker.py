@@ -0,0 +1,135 @@
+import threading
+import time
+from concurrent.futures import Future
+
+# ======================
+# SINGLE-FLIGHT DATA BROKER
+# ======================
+# Every dashboard session reruns the same handful of queries.
+# st.cache_data only helps after the first caller has finished, so thirty
+# sessions missing together still send thirty requests. The broker keys each
+# query on its full builder chain. The first caller of a key (the leader)
+# runs it upstream; every caller that arrives while it is in flight waits
+# for the leader's result instead. Nothing is cached after completion: the
+# next call after the leader returns goes upstream again.
+#
+# Coalesced callers share the leader's result object, so rows must be
+# treated as read-only (the dashboards copy them into DataFrames).
+#
+# The dashboards wrap the Supabase client in the broker and put the local
+# replica on top of it, so the counters describe real upstream calls: the
+# replica's syncs, and reads of tables it does not hold. Counters are kept
+# per query shape, with filter values left out, so the replica's moving id
+# cursor does not add a row per sync.
+
+NO_VALUE_STEPS = ("select", "order", "limit", "offset")  # steps whose arguments name the query shape
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._stats = {}
+
+    def do(self, key, fn, label=None):
+        """Run fn once for every caller of key that arrives while it is in flight; counted under label."""
+        with self._lock:
+            stats = self._stats.setdefault(label or key, {"calls": 0, "upstream": 0, "coalesced": 0, "errors": 0,
+                                                 "upstream_seconds": 0.0})
+            stats["calls"] += 1
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = Future()
+                stats["upstream"] += 1
+            else:
+                stats["coalesced"] += 1
+        if not leader:
+            return call.result()
+
+        start = time.perf_counter()
+        try:
+            result = fn()
+        except BaseException as e:
+            call.set_exception(e)
+            with self._lock:
+                stats["errors"] += 1
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                stats["upstream_seconds"] += time.perf_counter() - start
+                del self._inflight[key]
+
+    def stats(self):
+        """Per-query counters; saved_seconds estimates upstream time avoided from the mean call."""
+        with self._lock:
+            out = {}
+            for key, s in self._stats.items():
+                per_call = s["upstream_seconds"] / s["upstream"] if s["upstream"] else 0.0
+                out[key] = dict(s, saved_seconds=s["coalesced"] * per_call)
+            return out
+
+
+class DataBroker:
+    """Wraps a client exposing the postgrest builder chain (the Supabase client)."""
+
+    def __init__(self, source):
+        self.source = source
+        self.flight = SingleFlight()
+
+    def table(self, name):
+        return BrokerQuery(self, name)
+
+    def stats(self):
+        return self.flight.stats()
+
+    def totals(self):
+        stats = self.stats().values()
+        return {k: sum(s[k] for s in stats) for k in ("calls", "upstream", "coalesced", "saved_seconds")}
+
+
+class BrokerQuery:
+    def __init__(self, broker, table, steps=()):
+        self.broker = broker
+        self.name = table
+        self.steps = steps
+
+    def __getattr__(self, method):
+        # select / order / limit / eq / ... are recorded, then replayed upstream once per flight
+        def step(*args, **kwargs):
+            return BrokerQuery(self.broker, self.name, self.steps + ((method, args, tuple(sorted(kwargs.items()))),))
+        return step
+
+    def key(self, values=True):
+        """The full builder chain; with values=False, filter values are shown as … (the query's shape)."""
+        def shown(method, position, value):
+            return repr(value) if values or method in NO_VALUE_STEPS or position == 0 else "…"
+        calls = [(m, [shown(m, i, v) for i, v in enumerate(a)] + [f"{k}={shown(m, 1, v)}" for k, v in kw])
+                 for m, a, kw in self.steps]
+        return self.name + "".join(f".{m}({', '.join(shown_args)})" for m, shown_args in calls)
+
+    def execute(self):
+        def upstream():
+            query = self.broker.source.table(self.name)
+            for method, args, kwargs in self.steps:
+                query = getattr(query, method)(*args, **dict(kwargs))
+            return query.execute()
+        return self.broker.flight.do(self.key(), upstream, self.key(values=False))
+
+
+# ======================
+# PROCESS-WIDE BROKER
+# ======================
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker(source):
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = DataBroker(source)
+        return _broker
@@ -0,0 +1,230 @@
+import hashlib
+
+import numpy as np
+
+# ======================
+# COMPILED FOREST
+# ======================
+# The fitted RandomForestClassifier is flattened into one set of node tables
+# shared by all trees. Leaves point back at themselves with an infinite
+# threshold, so every row can take exactly `max_depth` steps through every
+# tree at once without any per-node branching in Python.
+
+ROW_CHUNK = 4096  # rows scored per traversal, bounds the (rows, trees, classes) gather
+
+
+class CompiledForest:
+    def __init__(self, feature, threshold, left, right, value, roots, classes,
+                 max_depth, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.max_depth = int(max_depth)
+        self.feature_names_in_ = feature_names
+        self.n_estimators = len(roots)
+        self.n_features_in_ = int(feature.max()) + 1 if len(feature) else 0
+
+    @classmethod
+    def from_sklearn(cls, clf):
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for est in clf.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            own = np.arange(offset, offset + n)
+
+            feature.append(np.where(is_leaf, 0, tree.feature))
+            threshold.append(np.where(is_leaf, np.inf, tree.threshold))
+            left.append(np.where(is_leaf, own, tree.children_left + offset))
+            right.append(np.where(is_leaf, own, tree.children_right + offset))
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba
+            counts = tree.value[:, 0, :]
+            norm = counts.sum(axis=1, keepdims=True)
+            norm[norm == 0.0] = 1.0
+            value.append(counts / norm)
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            feature=np.concatenate(feature).astype(np.intp),
+            threshold=np.concatenate(threshold).astype(np.float64),
+            left=np.concatenate(left).astype(np.intp),
+            right=np.concatenate(right).astype(np.intp),
+            value=np.concatenate(value).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            classes=np.asarray(clf.classes_),
+            max_depth=max_depth,
+            feature_names=getattr(clf, "feature_names_in_", None),
+        )
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def is_leaf(self):
+        return self.left == np.arange(self.n_nodes)
+
+    def fingerprint(self):
+        """Hash of the node tables, used to tie derived artifacts to one model."""
+        h = hashlib.sha256()
+        for arr in (self.feature, self.threshold, self.left, self.right, self.value, self.roots):
+            # Fixed dtypes, so int32 tables loaded from disk hash like compiled ones
+            dtype = np.int64 if np.issubdtype(arr.dtype, np.integer) else np.float64
+            h.update(np.ascontiguousarray(arr, dtype=dtype).tobytes())
+        return h.hexdigest()
+
+    def tree(self, t):
+        """Tree `t` on its own, as a one-tree CompiledForest."""
+        lo = self.roots[t]
+        hi = self.roots[t + 1] if t + 1 < self.n_estimators else self.n_nodes
+        return CompiledForest(
+            feature=np.array(self.feature[lo:hi]),
+            threshold=np.array(self.threshold[lo:hi]),
+            left=np.array(self.left[lo:hi]) - lo,
+            right=np.array(self.right[lo:hi]) - lo,
+            value=np.array(self.value[lo:hi]),
+            roots=np.zeros(1, dtype=np.intp),
+            classes=self.classes_,
+            max_depth=self.max_depth,
+            feature_names=self.feature_names_in_,
+        )
+
+    def apply(self, X, trees=None):
+        """Return the global leaf index reached in every tree, shape (rows, trees)."""
+        X = _as_float32(X)
+        roots = self.roots if trees is None else self.roots[trees]
+        idx = np.broadcast_to(roots, (X.shape[0], len(roots))).copy()
+        rows = np.arange(X.shape[0])[:, None]
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[idx]] <= self.threshold[idx]
+            idx = np.where(go_left, self.left[idx], self.right[idx])
+        return idx
+
+    def predict_proba(self, X):
+        X = _as_float32(X)
+        out = np.empty((X.shape[0], len(self.classes_)), dtype=np.float64)
+        for start in range(0, X.shape[0], ROW_CHUNK):
+            leaves = self.apply(X[start:start + ROW_CHUNK])
+            # Accumulate tree by tree like sklearn so ties break identically
+            acc = np.zeros((leaves.shape[0], len(self.classes_)), dtype=np.float64)
+            for t in range(self.n_estimators):
+                acc += self.value[leaves[:, t]]
+            out[start:start + ROW_CHUNK] = acc / self.n_estimators
+        return out
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    # ======================
+    # EARLY-EXIT VOTING
+    # ======================
+    # Trees are evaluated in their fixed order, a block at a time. A row stops
+    # as soon as its leading class stays ahead even if every remaining tree
+    # lands on the leaf least favourable to it, so labels always match predict.
+    def _exit_bounds(self):
+        if getattr(self, "_bounds", None) is None:
+            ends = np.append(self.roots[1:], self.n_nodes)
+            leaf = self.is_leaf()
+            n_classes = len(self.classes_)
+            # worst[t, a, b]: smallest value[a] - value[b] over the leaves of tree t
+            worst = np.empty((self.n_estimators, n_classes, n_classes))
+            for t, (lo, hi) in enumerate(zip(self.roots, ends)):
+                v = self.value[lo:hi][leaf[lo:hi]]
+                worst[t] = (v[:, :, None] - v[:, None, :]).min(axis=0)
+            # remaining[k]: the same bound summed over trees k..end
+            remaining = np.zeros((self.n_estimators + 1, n_classes, n_classes))
+            remaining[:-1] = np.cumsum(worst[::-1], axis=0)[::-1]
+            self._bounds = remaining
+        return self._bounds
+
+    def predict_early_exit(self, X, block=10, eps=1e-9):
+        """Return (labels, trees evaluated per row)."""
+        X = _as_float32(X)
+        remaining = self._exit_bounds()
+        n_classes = len(self.classes_)
+        votes = np.zeros((X.shape[0], n_classes))
+        used = np.full(X.shape[0], self.n_estimators)
+        active = np.arange(X.shape[0])
+
+        for start in range(0, self.n_estimators, block):
+            trees = np.arange(start, min(start + block, self.n_estimators))
+            leaves = self.apply(X[active], trees=trees)
+            for i in range(len(trees)):
+                votes[active] += self.value[leaves[:, i]]
+            done = trees[-1] + 1
+            if done == self.n_estimators:
+                break
+
+            # Leader must beat every other class by more than the worst case left
+            v = votes[active]
+            leader = np.argmax(v, axis=1)
+            margin = v[np.arange(len(active)), leader][:, None] - v + remaining[done][leader]
+            margin[np.arange(len(active)), leader] = np.inf
+            decided = (margin > eps).all(axis=1)
+            used[active[decided]] = done
+            active = active[~decided]
+            if not len(active):
+                break
+
+        return self.classes_.take(np.argmax(votes, axis=1), axis=0), used
+
+
+def _as_float32(X):
+    # sklearn trees compare float32 inputs against float64 thresholds
+    X = np.asarray(X, dtype=np.float32)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    return X
+
+
+def merge_forests(forests, classes=None):
+    """Concatenate the trees of several compiled forests into one.
+
+    Leaf values are re-aligned to `classes` (default: the union of all
+    classes), so forests fitted on data missing a class can be combined.
+    """
+    classes = np.unique(np.concatenate([f.classes_ for f in forests])) if classes is None else np.asarray(classes)
+    feature, threshold, left, right, value, roots = [], [], [], [], [], []
+    offset = 0
+    for f in forests:
+        feature.append(f.feature)
+        threshold.append(f.threshold)
+        left.append(np.asarray(f.left) + offset)
+        right.append(np.asarray(f.right) + offset)
+        aligned = np.zeros((f.n_nodes, len(classes)), dtype=f.value.dtype)
+        aligned[:, np.searchsorted(classes, f.classes_)] = f.value
+        value.append(aligned)
+        roots.append(np.asarray(f.roots) + offset)
+        offset += f.n_nodes
+    return CompiledForest(
+        feature=np.concatenate(feature).astype(np.intp),
+        threshold=np.concatenate(threshold),
+        left=np.concatenate(left).astype(np.intp),
+        right=np.concatenate(right).astype(np.intp),
+        value=np.concatenate(value),
+        roots=np.concatenate(roots).astype(np.intp),
+        classes=classes,
+        max_depth=max(f.max_depth for f in forests),
+        feature_names=forests[0].feature_names_in_,
+    )
+
+
+# ======================
+# LOADING
+# ======================
+def compile_forest(clf):
+    return CompiledForest.from_sklearn(clf)
+
+
+def load_compiled_forest(path="water_quality_model.pkl"):
+    import joblib
+    return compile_forest(joblib.load(path))
@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import time
+import warnings
+
+import numpy as np
+
+# ======================
+# SENSOR GRID
+# ======================
+# sensor_sends.ino posts temperature and pH with 2 decimals and turbidity with
+# 1 decimal, and clamps pH to 0-14 and turbidity to 0-100. Temperature is not
+# clamped on the device, so the table covers the dashboard gauge range and
+# anything outside it goes to the real model.
+GRID = {
+    "temperature": (0.0, 40.0, 100),  # low, high, steps per unit
+    "turbidity": (0.0, 100.0, 10),
+    "ph": (0.0, 14.0, 100),
+}
+FEATURES = ["temperature", "turbidity", "ph"]  # model column order: Temp, Turbidity, pH
+
+LUT_DIR = "water_quality_lut"
+TIE_EPS = 1e-9  # cells closer than this to a tie are re-scored with the exact forest
+
+# ======================
+# TABLE LAYOUT
+# ======================
+# A forest only compares each input against its own split thresholds, so every
+# grid value is first mapped to the index of the threshold interval it falls
+# in (one small int array per feature). Labels for every interval triple are
+# stored as 2-bit codes, four pH intervals per byte, in one cube:
+#
+#   labels[t_bin, u_bin, p_bin // 4] >> 2 * (p_bin % 4) & 3
+
+
+def grid_values(name, grid=GRID):
+    low, high, steps = grid[name]
+    return np.arange(round(low * steps), round(high * steps) + 1) / steps
+
+
+def _interval_bins(thresholds, values):
+    # Same float32 rounding sklearn applies before comparing with thresholds
+    rank = np.searchsorted(thresholds, values.astype(np.float32).astype(np.float64), side="left")
+    uniq, first, bins = np.unique(rank, return_index=True, return_inverse=True)
+    return bins.astype(np.int32), values[first]
+
+
+def build_lookup_table(forest, out_dir=LUT_DIR, grid=GRID, verbose=True):
+    start = time.perf_counter()
+    internal = ~forest.is_leaf()
+    n_classes = len(forest.classes_)
+
+    # Per feature: grid index -> forest-wide interval, plus one grid value per interval
+    grid_bins, reps = [], []
+    for f, name in enumerate(FEATURES):
+        thresholds = np.unique(forest.threshold[internal & (forest.feature == f)])
+        bins, rep = _interval_bins(thresholds, grid_values(name, grid))
+        grid_bins.append(bins)
+        reps.append(rep)
+    shape = tuple(len(r) for r in reps)
+
+    # Per tree: forest-wide interval -> the tree's own (coarser) interval, and a
+    # small dense table of leaf probabilities over the tree's own intervals.
+    ends = np.append(forest.roots[1:], forest.n_nodes)
+    local_maps, local_tables = [], []
+    for t, (lo, hi) in enumerate(zip(forest.roots, ends)):
+        maps, local_reps = [], []
+        for f in range(3):
+            nodes = slice(lo, hi)
+            own = np.unique(forest.threshold[nodes][internal[nodes] & (forest.feature[nodes] == f)])
+            bins, rep = _interval_bins(own, reps[f])
+            maps.append(bins)
+            local_reps.append(rep)
+        mesh = np.stack(np.meshgrid(*local_reps, indexing="ij"), axis=-1).reshape(-1, 3)
+        leaves = forest.apply(mesh, trees=[t])[:, 0]
+        local_maps.append(maps)
+        local_tables.append(forest.value[leaves].reshape(*(len(r) for r in local_reps), n_classes))
+
+    # Sweep along temperature. Moving to the next interval only changes the
+    # leaves of trees that split between the two, so the running vote total
+    # is patched for those trees instead of being re-summed over all trees.
+    def slab(t, t_bin):
+        m = local_maps[t]
+        return local_tables[t][m[0][t_bin]][np.ix_(m[1], m[2])]
+
+    temp_local = np.array([m[0] for m in local_maps])  # (trees, temperature intervals)
+    packed = np.zeros((shape[0], shape[1], (shape[2] + 3) // 4), dtype=np.uint8)
+    shifts = (2 * (np.arange(shape[2]) % 4)).astype(np.uint8)
+    ties = []
+    acc = np.zeros((shape[1], shape[2], n_classes))
+    for t in range(forest.n_estimators):
+        acc += slab(t, 0)
+    for k in range(shape[0]):
+        if k:
+            for t in np.flatnonzero(temp_local[:, k] != temp_local[:, k - 1]):
+                acc -= slab(t, k - 1)
+                acc += slab(t, k)
+        codes = np.argmax(acc, axis=-1).astype(np.uint8)
+        top2 = np.sort(acc, axis=-1)[..., -2:]
+        near = np.argwhere(top2[..., 1] - top2[..., 0] < TIE_EPS)
+        if len(near):
+            ties.append(np.column_stack([np.full(len(near), k), near]))
+        packed[k] = _pack(codes, shifts)
+
+    # Exact re-scoring of near ties so labels match the forest bit for bit
+    n_ties = 0
+    if ties:
+        cells = np.concatenate(ties)
+        n_ties = len(cells)
+        X = np.column_stack([reps[f][cells[:, f]] for f in range(3)])
+        codes = np.searchsorted(forest.classes_, forest.predict(X)).astype(np.uint8)
+        for (k, u, p), code in zip(cells, codes):
+            byte = packed[k, u, p // 4] & ~np.uint8(3 << 2 * (p % 4))
+            packed[k, u, p // 4] = byte | (code << 2 * (p % 4))
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "labels.npy"), packed)
+    for name, bins in zip(FEATURES, grid_bins):
+        np.save(os.path.join(out_dir, f"{name}_bins.npy"), bins)
+    header = {
+        "model_fingerprint": forest.fingerprint(),
+        "classes": forest.classes_.tolist(),
+        "grid": {name: list(grid[name]) for name in FEATURES},
+        "shape": list(shape),
+        "near_ties_rescored": n_ties,
+    }
+    with open(os.path.join(out_dir, "lut.json"), "w") as fh:
+        json.dump(header, fh, indent=2)
+
+    if verbose:
+        print(f"✅ Lookup table {shape} written to {out_dir} "
+              f"({packed.nbytes / 1e6:.1f} MB, {n_ties} near ties, "
+              f"{time.perf_counter() - start:.1f}s)")
+    return header
+
+
+def _pack(codes, shifts):
+    shifted = codes << shifts
+    pad = (-shifted.shape[1]) % 4
+    if pad:
+        shifted = np.pad(shifted, ((0, 0), (0, pad)))
+    return np.bitwise_or.reduce(shifted.reshape(shifted.shape[0], -1, 4), axis=-1)
+
+
+# ======================
+# LOOKUP PREDICTOR
+# ======================
+class LookupPredictor:
+    """Scores firmware-resolution readings by table lookup, other rows by `model`."""
+
+    def __init__(self, model, path=LUT_DIR):
+        with open(os.path.join(path, "lut.json")) as fh:
+            self.header = json.load(fh)
+        self.model = model
+        self.classes_ = np.asarray(self.header["classes"])
+        self.labels = np.load(os.path.join(path, "labels.npy"), mmap_mode="r")
+        self.bins = [np.load(os.path.join(path, f"{name}_bins.npy"), mmap_mode="r") for name in FEATURES]
+        self.grid = [tuple(self.header["grid"][name]) for name in FEATURES]
+
+    def __getattr__(self, name):
+        # Everything else (predict_proba, feature names, ...) comes from the model
+        return getattr(self.model, name)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        hit = np.ones(len(X), dtype=bool)
+        idx = []
+        for f, (low, high, steps) in enumerate(self.grid):
+            with np.errstate(invalid="ignore"):
+                q = np.rint(X[:, f] * steps)
+                # Only values exactly on the firmware grid are table hits
+                hit &= (q / steps == X[:, f]) & (q >= round(low * steps)) & (q <= round(high * steps))
+            idx.append(np.where(hit, q - round(low * steps), 0).astype(np.intp))
+
+        t, u, p = (self.bins[f][idx[f]] for f in range(3))
+        codes = (self.labels[t, u, p >> 2] >> (2 * (p & 3)).astype(np.uint8)) & 3
+        out = self.classes_[codes]
+        if not hit.all():
+            out[~hit] = self.model.predict(X[~hit])
+        return out
+
+
+def load_lookup_predictor(model, path=LUT_DIR):
+    """Wrap `model` with the lookup table in `path`, or return `model` unchanged
+    when no table has been built or it was built for a different model."""
+    if not os.path.exists(os.path.join(path, "lut.json")):
+        return model
+    predictor = LookupPredictor(model, path)
+    fingerprint = getattr(model, "fingerprint", None)
+    if fingerprint is None or predictor.header["model_fingerprint"] != fingerprint():
+        warnings.warn(f"Lookup table in {path} does not match the loaded model; ignoring it")
+        return model
+    return predictor
+
+
+# ======================
+# COMMAND LINE
+# ======================
+if __name__ == "__main__":
+    from forest_engine import load_compiled_forest
+
+    parser = argparse.ArgumentParser(description="Build the sensor-resolution lookup table for the water quality model")
+    parser.add_argument("--model", default="water_quality_model.pkl")
+    parser.add_argument("--out", default=LUT_DIR)
+    parser.add_argument("--temp-range", nargs=2, type=float, default=GRID["temperature"][:2],
+                        metavar=("LOW", "HIGH"), help="temperature span covered by the table (°C)")
+    args = parser.parse_args()
+
+    grid = dict(GRID, temperature=(args.temp_range[0], args.temp_range[1], GRID["temperature"][2]))
+    build_lookup_table(load_compiled_forest(args.model), args.out, grid=grid)
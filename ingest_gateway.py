@@ -0,0 +1,494 @@
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+from postgrest.exceptions import APIError
+
+from binary_batch import CONTENT_TYPE, BatchError, SequenceFilter, decode_batch, to_rows
+from ingest_spool import SPOOL_DIR, WriteAheadSpool
+from local_supabase import now_iso
+from score_on_ingest import score_rows
+from security_intervals import IntervalFolder
+
+# ======================
+# INGESTION GATEWAY
+# ======================
+# Sits between the cages and Supabase. It accepts the same POST
+# /rest/v1/<table> JSON bodies that sensor_sends.ino sends, one object or an
+# array. Each post is acknowledged with 201 as soon as its rows are buffered.
+# Rows are sent upstream as one bulk insert per table when FLUSH_ROWS have
+# queued up or when the oldest has waited FLUSH_INTERVAL_S, whichever comes
+# first. Bulk inserts use return=minimal, so nothing is echoed back over
+# the uplink.
+#
+# The firmware's payloads carry no timestamp; the table default would stamp
+# them at flush time, so the gateway stamps each row on receipt instead.
+# Upstream failures keep the rows queued and retry with backoff.
+#
+# With a spool (ingest_spool.py, the default from the command line), a post
+# is acknowledged only once its rows are durable on local disk. At most
+# MAX_BUFFER_ROWS are held in memory; during a long outage the rest stay on
+# disk and are read back in order as the backlog drains. Without a spool,
+# posts get 503 once MAX_BUFFER_ROWS are waiting, so devices retry later.
+#
+# lakefishcage rows are scored at flush time (score_on_ingest.py): one
+# vectorized prediction per batch, stored with the reading. If scoring fails
+# the rows go up unscored and the rescore job fills them in later.
+#
+# security_alerts heartbeats are folded into run-length intervals
+# (security_intervals.py) rather than inserted one row each.
+#
+# Posts are checked against COLUMNS before they are acknowledged, so a row
+# with an unknown column, a non-numeric reading, an unparsable timestamp or
+# an out-of-range integer gets 400 instead of blocking the table's bulk
+# inserts. A batch that is still refused (a client error from Supabase, or
+# a ValueError from a scorer or writer) is split in halves and retried until
+# the refused rows are isolated; only those are appended to DEAD_LETTER_PATH
+# and skipped, the rest of the batch goes up.
+#
+# lakefishcage also takes binary batches (binary_batch.py): a device posts
+# many readings at once with Content-Type CONTENT_TYPE and gets back
+# {"accepted", "duplicates", "last_seq"}. Retried batches are dropped by
+# sequence number. JSON posts are unchanged.
+# Point sensorURL / securityURL at http://<gateway>:54330/rest/v1/... to use it.
+# Supabase needs the cage_id columns once (python ingest_gateway.py --migration).
+
+HOST = "0.0.0.0"
+PORT = 54330
+TABLES = ("lakefishcage", "security_alerts")
+FLUSH_ROWS = 500
+FLUSH_INTERVAL_S = 1.0
+MAX_BUFFER_ROWS = 100_000
+RETRY_MAX_S = 30.0
+DEAD_LETTER_PATH = "ingest_dead_letter.jsonl"
+# Columns a device may send, with the JSON types they accept (int also fits float columns;
+# datetime is an ISO 8601 string)
+COLUMNS = {
+    "lakefishcage": {"timestamp": datetime, "cage_id": int, "temperature": float, "turbidity": float, "ph": float},
+    "security_alerts": {"timestamp": datetime, "cage_id": int, "status": int},
+}
+INT_RANGE = (-2 ** 31, 2 ** 31 - 1)  # Postgres integer
+# cage_id is not in the original tables; multi-cage posts and binary batches need it
+MIGRATION_SQL = """\
+alter table lakefishcage add column if not exists cage_id integer;
+alter table security_alerts add column if not exists cage_id integer;
+"""
+
+
+class BufferFull(Exception):
+    pass
+
+
+def check_rows(table, rows, columns=COLUMNS):
+    """Raise ValueError for the first row Supabase would reject for its columns or types."""
+    known = columns.get(table)
+    if known is None:
+        return
+    for i, row in enumerate(rows):
+        for name, value in row.items():
+            kind = known.get(name)
+            if kind is None:
+                raise ValueError(f'row {i}: column "{name}" of relation "{table}" does not exist')
+            if value is None:
+                continue
+            if kind is datetime:
+                ok = isinstance(value, str) and _parses(value)
+            else:
+                ok = (isinstance(value, kind) or (kind is float and isinstance(value, int))) \
+                    and not isinstance(value, bool)
+                if ok and kind is int and not INT_RANGE[0] <= value <= INT_RANGE[1]:
+                    raise ValueError(f'row {i}: value {value} for "{name}" is out of range for type integer')
+            if not ok:
+                raise ValueError(f'row {i}: invalid {kind.__name__} value for "{name}": {value!r}')
+
+
+def _parses(timestamp):
+    try:
+        datetime.fromisoformat(timestamp)
+    except ValueError:
+        return False
+    return True
+
+
+def _rejected(error):
+    """True for errors caused by the data itself, which a retry cannot fix: 4xx responses from
+    Supabase, and ValueErrors from a scorer or writer."""
+    if isinstance(error, ValueError):
+        return True
+    code = getattr(error, "code", None)
+    if not isinstance(error, APIError) or not code:
+        return False
+    if code.startswith("PGRST"):
+        return not code.startswith("PGRST0")  # PGRST0xx: database unreachable
+    return code[:2] in ("22", "23", "42")  # data exception, constraint violation, undefined column
+
+
+class IngestBatcher:
+    def __init__(self, client, tables=TABLES, flush_rows=FLUSH_ROWS, flush_interval=FLUSH_INTERVAL_S,
+                 max_buffer=MAX_BUFFER_ROWS, spool=None, scorers=None, writers=None,
+                 dead_letter=DEAD_LETTER_PATH):
+        """scorers: {table: fn(rows) -> rows} applied to each batch just before it is sent.
+        writers: {table: fn(client, rows)} sending a table's batches instead of a bulk insert."""
+        self.client = client
+        self.dead_letter = dead_letter
+        self.spool = spool
+        self.scorers = scorers or {}
+        self.writers = writers or {}
+        self.tables = tuple(tables)
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._queues = {t: [] for t in self.tables}  # (received monotonic, seq, row)
+        # Spool records up to _loaded are in memory or upstream; while _spilled, later ones are on disk only.
+        # A fresh gateway starts spilled so anything left from before a restart is replayed first.
+        self._loaded = spool.replay_from() if spool is not None else 0
+        self._spilled = spool is not None
+        self._refilling = False  # one flusher reads the spool at a time
+        self._stop = threading.Event()
+        self._threads = []
+        self._stats = {t: {"received": 0, "flushed": 0, "upstream_requests": 0, "upstream_errors": 0,
+                           "largest_batch": 0, "score_errors": 0, "dead_lettered": 0,
+                           "last_error": None} for t in self.tables}
+
+    def start(self):
+        # One flusher per table: tables flush concurrently, each table's rows in arrival order
+        for table in self.tables:
+            thread = threading.Thread(target=self._run, args=(table,), name=f"flush-{table}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, flush=True):
+        """Stop the flushers, by default after sending whatever is still queued."""
+        with self._lock:
+            self._stop.set()
+            self._ready.notify_all()
+        for thread in self._threads:
+            thread.join()
+        if flush:
+            for table in self.tables:
+                while self._queues[table] and self._flush(table):
+                    pass
+
+    def add(self, table, rows):
+        """Queue rows for table (durably, with a spool); raises KeyError for unknown tables, ValueError for
+        rows with unknown columns or mistyped values, and BufferFull under backpressure."""
+        if table not in self._queues:
+            raise KeyError(table)
+        check_rows(table, rows)
+        received = time.monotonic()
+        stamp = now_iso()
+        rows = [r if "timestamp" in r else dict(r, timestamp=stamp) for r in rows]
+        if not rows:
+            return rows
+        with self._lock:
+            full = self._buffered() + len(rows) > self.max_buffer
+            if self.spool is None:
+                if full:
+                    raise BufferFull(f"{self.max_buffer} rows already waiting")
+                seqs = [None] * len(rows)
+            else:
+                # Written under our lock, so spool order is queue order
+                seqs = self.spool.write(table, rows)
+                self._spilled |= full
+                if not self._spilled:
+                    self._loaded = seqs[-1]
+            queue = self._queues[table]
+            idle = not queue
+            if not self._spilled or self.spool is None:
+                queue.extend(zip([received] * len(rows), seqs, rows))
+            self._stats[table]["received"] += len(rows)
+            # An idle flusher waits without a timeout, so the first rows must wake it to start the clock
+            if idle or len(queue) >= self.flush_rows or self._spilled:
+                self._ready.notify_all()
+        if self.spool is not None:
+            self.spool.wait_durable(seqs[-1])  # group commit: one fsync acknowledges many posts
+        return rows
+
+    def stats(self):
+        with self._lock:
+            return {t: dict(s, buffered=len(self._queues[t]), spilled=self._spilled) for t, s in self._stats.items()}
+
+    def _buffered(self):
+        return sum(len(q) for q in self._queues.values())
+
+    def _refill(self):
+        """Load spilled records back from the spool once memory has drained to half.
+
+        Called with the lock held; it is released while the spool is read, so posts are not blocked.
+        Posts meanwhile only go to the spool (we are spilled), and are picked up before leaving it.
+        """
+        while self._spilled and not self._refilling:
+            room = self.max_buffer - self._buffered()
+            if room < self.max_buffer // 2:
+                return
+            after, written = self._loaded, self.spool.stats()["seq"]
+            self._refilling = True
+            self._lock.release()
+            try:
+                records = self.spool.read(after, room)
+            finally:
+                self._lock.acquire()
+                self._refilling = False
+            for seq, table, row in records:
+                if table in self._queues:
+                    self._queues[table].append((0.0, seq, row))  # already late: due at once
+            if records:
+                self._ready.notify_all()  # other tables' flushers may be waiting without a timeout
+            if len(records) == room:
+                self._loaded = records[-1][0]
+                return  # memory is full again
+            # The read reached the end of the log, so everything written before it started is loaded
+            self._loaded = max(written, records[-1][0] if records else after)
+            if self.spool.stats()["seq"] == self._loaded:
+                self._spilled = False  # caught up: new posts go straight to memory again
+
+    def _due(self, table):
+        queue = self._queues[table]
+        if not queue:
+            return None
+        if len(queue) >= self.flush_rows:
+            return 0.0
+        return max(0.0, queue[0][0] + self.flush_interval - time.monotonic())
+
+    def _flush(self, table):
+        """Send the front of the queue; returns False when it must be retried after a backoff."""
+        with self._lock:
+            batch = self._queues[table][:self.flush_rows]
+        if not batch:
+            return True
+        stats = self._stats[table]
+        # A refused part is split in halves until the refused rows are alone; parts go up in order
+        pending, done, refused = [batch], 0, False
+        while pending:
+            part = pending.pop()
+            error = self._send(table, [r for _, _, r in part])
+            refused |= error is not None
+            if error is None:
+                done += len(part)
+                with self._lock:
+                    stats["flushed"] += len(part)
+                    stats["largest_batch"] = max(stats["largest_batch"], len(part))
+                continue
+            if not _rejected(error):
+                break  # retried with backoff, from the first part not yet sent
+            if len(part) > 1:
+                pending += [part[len(part) // 2:], part[:len(part) // 2]]
+                continue
+            # Retrying a row Supabase refuses would block the table (and, spooled, survive restarts)
+            with self._lock:
+                self._dead_letter(table, [part[0][2]], error)
+                stats["dead_lettered"] += 1
+            done += 1
+            error = None
+        with self._lock:
+            if not refused:
+                stats["last_error"] = None
+            # Only this table's flusher removes rows, so the batch is still at the front
+            del self._queues[table][:done]
+            if done:
+                self._ready.notify_all()  # room freed: a spilled backlog can be refilled
+        if self.spool is not None and done:
+            self.spool.ack(table, batch[done - 1][1])
+        return error is None
+
+    def _send(self, table, rows):
+        """Score and write rows upstream; returns the error, or None once they are written."""
+        stats = self._stats[table]
+        try:
+            if table in self.scorers:
+                try:
+                    rows = self.scorers[table](rows)
+                except ValueError:
+                    raise  # the rows themselves cannot be scored
+                except Exception:
+                    with self._lock:
+                        stats["score_errors"] += 1  # sent unscored; the rescore job fills them in
+            if table in self.writers:
+                self.writers[table](self.client, rows)
+            else:
+                self.client.table(table).insert(rows, returning="minimal").execute()
+            error = None
+        except Exception as e:
+            error = e
+        with self._lock:
+            stats["upstream_requests"] += 1
+            if error is not None:
+                stats["upstream_errors"] += 1
+                stats["last_error"] = f"{type(error).__name__}: {error}"
+        return error
+
+    def _dead_letter(self, table, rows, error):
+        """Keep a batch Supabase refused, one JSON line per row, for inspection and manual replay."""
+        with open(self.dead_letter, "a", encoding="utf-8") as f:  # called with the lock held
+            for row in rows:
+                f.write(json.dumps({"table": table, "error": str(error), "row": row}) + "\n")
+
+    def _run(self, table):
+        backoff = 1.0
+        while True:
+            with self._lock:
+                while not self._stop.is_set():
+                    if self._spilled:
+                        self._refill()
+                    wait = self._due(table)
+                    if wait == 0.0:
+                        break
+                    self._ready.wait(wait)
+                if self._stop.is_set():
+                    return
+            if self._flush(table):
+                backoff = 1.0
+            else:
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, RETRY_MAX_S)
+
+
+# ======================
+# HTTP FRONT END
+# ======================
+class GatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    batcher = None
+    sequences = None
+
+    def _reply(self, status, payload=None):
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._reply(status, {"code": "PGRST100", "details": None, "hint": None, "message": message})
+
+    def do_GET(self):
+        if urlsplit(self.path).path.rstrip("/") != "/gateway/stats":
+            return self._error(404, "not found")
+        self._reply(200, self.batcher.stats())
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        prefix = "/rest/v1/"
+        table = path[len(prefix):].strip("/") if path.startswith(prefix) else None
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = self.rfile.read(length)
+        if (self.headers.get("Content-Type") or "").split(";")[0].strip() == CONTENT_TYPE:
+            return self._post_batch(table, payload)
+        try:
+            body = json.loads(payload or b"[]")
+        except ValueError as e:
+            return self._error(400, str(e))
+        rows = [body] if isinstance(body, dict) else body
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            return self._error(400, "expected a JSON object or an array of objects")
+        try:
+            rows = self.batcher.add(table, rows)
+        except KeyError:
+            return self._error(404, f'relation "public.{table}" does not exist')
+        except ValueError as e:
+            return self._error(400, str(e))
+        except BufferFull as e:
+            return self._error(503, str(e))
+        # Rows are not inserted yet, so there are no ids to echo; the firmware only logs this
+        returning = "return=representation" in (self.headers.get("Prefer") or "")
+        self._reply(201, rows if returning else None)
+
+    def _post_batch(self, table, payload):
+        if table != "lakefishcage":
+            return self._error(415, f"binary batches carry lakefishcage readings only, not {table}")
+        try:
+            device_id, boot_id, columns = decode_batch(payload)
+        except BatchError as e:
+            return self._error(400, str(e))
+        try:
+            fresh, last_seq = self.sequences.admit(
+                device_id, boot_id, columns["seq"], lambda mask: self.batcher.add(table, to_rows(device_id, columns, mask)))
+        except KeyError:
+            return self._error(404, f'relation "public.{table}" does not exist')
+        except ValueError as e:
+            return self._error(400, str(e))
+        except BufferFull as e:
+            return self._error(503, str(e))
+        self._reply(201, {"accepted": int(fresh.sum()), "duplicates": int(len(fresh) - fresh.sum()),
+                          "last_seq": last_seq})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_gateway(batcher, host=HOST, port=PORT):
+    handler = type("Handler", (GatewayHandler,), {"batcher": batcher, "sequences": SequenceFilter()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_in_thread(batcher, host="127.0.0.1", port=0):
+    """Start a gateway on a free port for benchmarks; returns (server, url)."""
+    server = make_gateway(batcher, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+# ======================
+# COMMAND LINE
+# ======================
+if __name__ == "__main__":
+    from supabase import create_client
+
+    load_dotenv("links.env")
+    parser = argparse.ArgumentParser(description="Batch ESP32 posts into bulk Supabase inserts")
+    parser.add_argument("--migration", action="store_true", help="print the SQL that adds the cage_id columns")
+    parser.add_argument("--upstream", default=os.getenv("SUPABASE_URL"), help="Supabase URL (default: SUPABASE_URL)")
+    parser.add_argument("--key", default=os.getenv("SUPABASE_KEY"), help="API key (default: SUPABASE_KEY)")
+    parser.add_argument("--flush-rows", type=int, default=FLUSH_ROWS)
+    parser.add_argument("--flush-interval", type=float, default=FLUSH_INTERVAL_S, help="seconds")
+    parser.add_argument("--max-buffer", type=int, default=MAX_BUFFER_ROWS, help="rows held in memory")
+    parser.add_argument("--spool", default=SPOOL_DIR, help="write-ahead spool directory")
+    parser.add_argument("--no-spool", action="store_true", help="acknowledge from memory only (rows lost on crash)")
+    parser.add_argument("--dead-letter", default=DEAD_LETTER_PATH, help="file for batches Supabase rejects")
+    parser.add_argument("--no-score", action="store_true", help="insert lakefishcage rows without predictions")
+    parser.add_argument("--raw-alerts", action="store_true",
+                        help="insert every security_alerts heartbeat instead of folding them into intervals")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+    if args.migration:
+        print(MIGRATION_SQL, end="")
+        raise SystemExit
+    if not args.upstream or not args.key:
+        raise SystemExit("🚫 Missing Supabase credentials (links.env, SUPABASE_URL/SUPABASE_KEY or --upstream/--key)")
+
+    spool = None if args.no_spool else WriteAheadSpool(args.spool)
+    if spool is not None:
+        print(f"✅ Spool {args.spool}: {spool.stats()['seq'] - spool.replay_from():,} records to replay at most")
+    client = create_client(args.upstream, args.key)
+    writers = None if args.raw_alerts else {"security_alerts": IntervalFolder().write}
+    batcher = IngestBatcher(client, flush_rows=args.flush_rows, flush_interval=args.flush_interval,
+                            max_buffer=args.max_buffer, spool=spool,
+                            scorers=None if args.no_score else {"lakefishcage": score_rows}, writers=writers,
+                            dead_letter=args.dead_letter).start()
+    server = make_gateway(batcher, args.host, args.port)
+    print(f"✅ Gateway on http://{args.host}:{args.port} → {args.upstream} "
+          f"(flush at {args.flush_rows} rows or {args.flush_interval:g} s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.stop()
+        if spool is not None:
+            spool.close()
+        print(f"✅ Flushed: {json.dumps(batcher.stats())}")
@@ -0,0 +1,252 @@
+import json
+import os
+import threading
+import time
+import zlib
+
+# ======================
+# WRITE-AHEAD INGEST SPOOL
+# ======================
+# Every reading the gateway accepts is appended to a log on local disk
+# before it is acknowledged. The rows survive an uplink outage or a restart,
+# and are replayed upstream in order once Supabase can be reached again.
+#
+# Layout: SPOOL_DIR/<first seq>.wal segments of "<crc32> [seq, table, row]"
+# lines, rolled over at SEGMENT_BYTES, plus a "checkpoint" file holding the
+# last seq acknowledged upstream per table. A segment is deleted once every
+# row in it is acknowledged. On open, a torn last line (crash mid-write)
+# is cut off.
+#
+# Group commit: writers append under a lock and then wait for durability;
+# one committer thread fsyncs for everyone who wrote since the last fsync,
+# so one fsync covers a whole burst of posts instead of one per reading.
+# Delivery is at-least-once: a crash between an upstream insert and the
+# checkpoint update replays that batch.
+
+SPOOL_DIR = "ingest_spool"
+SEGMENT_BYTES = 16 * 1024 * 1024
+GROUP_COMMIT_S = 0.002  # extra time the committer waits to gather a group
+CHECKPOINT = "checkpoint"
+
+
+def _encode(seq, table, row):
+    body = json.dumps([seq, table, row], separators=(",", ":")).encode()
+    return b"%08x %s\n" % (zlib.crc32(body), body)
+
+
+def _decode(line):
+    """(seq, table, row), or None for a torn or corrupt line."""
+    if not line.endswith(b"\n") or len(line) < 10:
+        return None
+    body = line[9:-1]
+    if int(line[:8], 16) != zlib.crc32(body):
+        return None
+    return json.loads(body)
+
+
+def _seq_of(line):
+    try:
+        return int(line[10:line.index(b",", 10)])
+    except ValueError:
+        return None  # torn or corrupt: left for _decode to reject
+
+
+class WriteAheadSpool:
+    def __init__(self, directory=SPOOL_DIR, segment_bytes=SEGMENT_BYTES, group_commit=GROUP_COMMIT_S):
+        """group_commit=None syncs inline on every write (one fsync per call, for comparison)."""
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.group_commit = group_commit
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()  # held across fsync; rotation takes it too
+        self._written = threading.Condition(self._lock)
+        self._durable = threading.Condition()
+        self._checkpoint_lock = threading.Lock()  # checkpoint writes land in ack order
+        self.acked = self._read_checkpoint()
+        self.last_appended = dict(self.acked)
+        self._segments = sorted(int(name[:-4]) for name in os.listdir(directory) if name.endswith(".wal"))
+        self._seq = self._recover()
+        self._synced = self._seq
+        self._fd = None
+        self._size = 0
+        self._stop = False
+        self._stats = {"records": 0, "fsyncs": 0, "segments_deleted": 0}
+        self._open_segment(self._seq + 1)
+        self._committer = None
+        if group_commit is not None:
+            self._committer = threading.Thread(target=self._commit_loop, name="spool-commit", daemon=True)
+            self._committer.start()
+
+    # ----- files -----
+    def _path(self, first):
+        return os.path.join(self.directory, f"{first:020d}.wal")
+
+    def _read_checkpoint(self):
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT)) as f:
+                return {t: int(s) for t, s in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+
+    def _write_checkpoint(self, acked):
+        path = os.path.join(self.directory, CHECKPOINT)
+        with open(path + ".tmp", "w") as f:
+            json.dump(acked, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+
+    def _recover(self):
+        """Highest intact seq on disk; truncates a torn tail of the last segment."""
+        last = max(self.acked.values(), default=0)
+        for first in self._segments:
+            path = self._path(first)
+            good = 0
+            with open(path, "rb") as f:
+                for line in f:
+                    record = _decode(line)
+                    if record is None:
+                        break
+                    good += len(line)
+                    seq, table, _ = record
+                    last = max(last, seq)
+                    self.last_appended[table] = max(self.last_appended.get(table, 0), seq)
+            if good < os.path.getsize(path):
+                os.truncate(path, good)
+        return last
+
+    def _open_segment(self, first):
+        if self._fd is not None:
+            with self._sync_lock:
+                os.fsync(self._fd)
+                os.close(self._fd)
+                self._fd = None
+                self._stats["fsyncs"] += 1
+            self._mark_durable(self._seq)
+        if not self._segments or self._segments[-1] != first:
+            self._segments.append(first)
+        self._fd = os.open(self._path(first), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = os.fstat(self._fd).st_size
+
+    # ----- writing -----
+    def write(self, table, rows):
+        """Append rows to the log; returns their seqs. Call wait_durable(seqs[-1]) before acknowledging."""
+        with self._lock:
+            if self._size >= self.segment_bytes:
+                self._open_segment(self._seq + 1)
+            first = self._seq + 1
+            data = b"".join(_encode(first + i, table, row) for i, row in enumerate(rows))
+            os.write(self._fd, data)
+            self._size += len(data)
+            self._seq += len(rows)
+            self._stats["records"] += len(rows)
+            self.last_appended[table] = self._seq
+            if self.group_commit is None:
+                os.fsync(self._fd)
+                self._stats["fsyncs"] += 1
+                self._mark_durable(self._seq)
+            else:
+                self._written.notify()
+            return list(range(first, self._seq + 1))
+
+    def wait_durable(self, seq):
+        with self._durable:
+            while self._synced < seq:
+                self._durable.wait()
+
+    def _mark_durable(self, seq):
+        with self._durable:
+            if seq > self._synced:
+                self._synced = seq
+                self._durable.notify_all()
+
+    def _commit_loop(self):
+        while True:
+            with self._lock:
+                while self._synced >= self._seq and not self._stop:
+                    self._written.wait()
+                if self._stop:
+                    return
+            if self.group_commit:
+                time.sleep(self.group_commit)
+            with self._lock:
+                fd, target = self._fd, self._seq
+            with self._sync_lock:
+                if fd == self._fd:  # a rotation in between already synced and closed it
+                    os.fsync(fd)
+                    self._stats["fsyncs"] += 1
+            self._mark_durable(target)
+
+    # ----- replay -----
+    def read(self, after, limit):
+        """Up to limit unacknowledged (seq, table, row) records with seq > after, in order."""
+        with self._lock:
+            segments = list(self._segments)
+            acked = dict(self.acked)
+        out = []
+        for i, first in enumerate(segments):
+            if i + 1 < len(segments) and segments[i + 1] <= after + 1:
+                continue  # wholly at or before the cursor
+            try:
+                f = open(self._path(first), "rb")
+            except FileNotFoundError:
+                continue  # deleted by a concurrent ack
+            with f:
+                for line in f:
+                    seq = _seq_of(line)
+                    if seq is not None and seq <= after:
+                        continue  # before the cursor: skip without decoding
+                    record = _decode(line)
+                    if record is None:
+                        break  # the tail still being written
+                    seq, table, _ = record
+                    if seq > acked.get(table, 0):
+                        out.append(record)
+                        if len(out) >= limit:
+                            return out
+        return out
+
+    def ack(self, table, seq):
+        """Record that rows of table up to seq are upstream; drops fully acknowledged segments."""
+        with self._lock:
+            if seq <= self.acked.get(table, 0):
+                return
+            self.acked[table] = seq
+            # Every record at or below the low-water mark is acknowledged, whatever its table
+            low_water = self._replay_from()
+            doomed = [first for first, nxt in zip(self._segments, self._segments[1:]) if nxt - 1 <= low_water]
+            self._segments = [s for s in self._segments if s not in doomed]
+        with self._checkpoint_lock:
+            with self._lock:
+                acked = dict(self.acked)
+            self._write_checkpoint(acked)
+        for first in doomed:
+            os.remove(self._path(first))
+        with self._lock:
+            self._stats["segments_deleted"] += len(doomed)
+
+    def replay_from(self):
+        """A read() cursor: every record at or below it is already acknowledged."""
+        with self._lock:
+            return self._replay_from()
+
+    def _replay_from(self):
+        pending = [self.acked.get(t, 0) for t, last in self.last_appended.items() if last > self.acked.get(t, 0)]
+        return min(pending, default=self._seq)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, seq=self._seq, segments=len(self._segments), acked=dict(self.acked))
+
+    def close(self):
+        with self._lock:
+            self._stop = True
+            self._written.notify_all()
+        if self._committer is not None:
+            self._committer.join()
+        with self._lock, self._sync_lock:
+            os.fsync(self._fd)
+            os.close(self._fd)
+            self._fd = None
+        self._mark_durable(self._seq)
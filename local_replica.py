@@ -0,0 +1,201 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# ======================
+# LOCAL TIME-SERIES REPLICA
+# ======================
+# The dashboards read lakefishcage and security_alerts from a local SQLite
+# copy. Each sync asks Supabase only for rows with an id above the highest
+# id already synced, paged by that id cursor. Upstream assigns ids at
+# insert, so a row is picked up by the next sync however old its timestamp
+# is (spool replays, backfills), and transfer per sync grows with the new
+# rows only, not with the window a dashboard shows. Rows are upserted on
+# their id, so a row the realtime feed already delivered is stored once.
+#
+# A fresh replica starts from the newest BOOTSTRAP_ROWS rows of each table.
+# Syncs are throttled to one per SYNC_INTERVAL_S, shared by every session in
+# the process. If Supabase cannot be reached, queries are served from the
+# local rows and the error is kept in stats().
+
+REPLICA_PATH = "replica.db"
+TABLES = ("lakefishcage", "security_alerts")
+SYNC_INTERVAL_S = 5.0  # the firmware posts every 5 s
+BOOTSTRAP_ROWS = 1000
+PAGE_ROWS = 1000  # PostgREST's default max-rows
+
+
+def _epoch(ts):
+    return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+
+
+class LocalReplica:
+    def __init__(self, client, path=REPLICA_PATH, tables=TABLES, sync_interval=SYNC_INTERVAL_S):
+        self.client = client
+        self.sync_interval = sync_interval
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        with self.db:
+            for table in tables:
+                # Rows are kept whole as JSON so select("*") returns what Supabase did;
+                # t is the epoch timestamp, since Supabase's ISO strings vary in width
+                self.db.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (key TEXT PRIMARY KEY, t REAL NOT NULL, row TEXT NOT NULL)')
+                self.db.execute(f'CREATE INDEX IF NOT EXISTS "{table}_t" ON "{table}" (t)')
+            # Highest upstream id each table has synced through; rows pushed by the feed do not move it
+            self.db.execute("CREATE TABLE IF NOT EXISTS sync_cursor (name TEXT PRIMARY KEY, last_id INTEGER NOT NULL)")
+        self._lock = threading.Lock()  # the SQLite connection
+        self._sync_locks = {t: threading.Lock() for t in tables}  # tables sync concurrently, each one at a time
+        self._synced_at = {t: 0.0 for t in tables}
+        self._stats = {t: {"syncs": 0, "rows_fetched": 0, "rows_new": 0, "last_error": None} for t in tables}
+
+    # ----- sync -----
+    def _store(self, table, rows, last_id=None):
+        with self._lock, self.db:
+            before = self.db.total_changes
+            self.db.executemany(
+                f'INSERT INTO "{table}" VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE SET t = excluded.t, row = excluded.row '
+                f'WHERE row <> excluded.row',
+                [(str(r.get("id", r["timestamp"])), _epoch(r["timestamp"]), json.dumps(r)) for r in rows],
+            )
+            changed = self.db.total_changes - before
+            if last_id is not None:
+                self.db.execute("INSERT OR REPLACE INTO sync_cursor VALUES (?, ?)", (table, last_id))
+            return changed
+
+    def _fetch(self, table, after):
+        if after is None:
+            page = self.client.table(table).select("*").order("id", desc=True).limit(BOOTSTRAP_ROWS).execute().data
+            return page[::-1]
+        rows = []
+        while True:
+            # PAGE_ROWS is PostgREST's default max-rows, so a short page is the last one
+            page = (self.client.table(table).select("*").gt("id", after).order("id")
+                    .limit(PAGE_ROWS).execute().data)
+            rows.extend(page)
+            if len(page) < PAGE_ROWS:
+                return rows
+            after = page[-1]["id"]
+
+    def sync(self, table, force=False):
+        """Pull rows above the id cursor; returns the number of new or changed rows."""
+        with self._sync_locks[table]:
+            now = time.monotonic()
+            if not force and now - self._synced_at[table] < self.sync_interval:
+                return 0
+            self._synced_at[table] = now
+            stats = self._stats[table]
+            with self._lock:
+                cursor = self.db.execute("SELECT last_id FROM sync_cursor WHERE name = ?", (table,)).fetchone()
+            after = None if cursor is None else cursor[0]
+            try:
+                rows = self._fetch(table, after)
+            except Exception as e:
+                stats["last_error"] = f"{type(e).__name__}: {e}"
+                if after is None:
+                    raise
+                return 0
+            last_id = rows[-1]["id"] if rows else (after or 0)
+            changed = self._store(table, rows, last_id)
+            stats["syncs"] += 1
+            stats["rows_fetched"] += len(rows)
+            stats["rows_new"] += changed
+            stats["last_error"] = None
+            return changed
+
+    def ingest(self, table, rows):
+        """Store rows pushed by a realtime feed; ignored until the table's first sync has bootstrapped it."""
+        if table not in self._stats or not self._stats[table]["syncs"]:
+            return 0
+        changed = self._store(table, rows) if rows else 0
+        self._stats[table]["rows_new"] += changed
+        return changed
+
+    def stats(self):
+        with self._lock:
+            out = {t: dict(s) for t, s in self._stats.items()}
+            for t in out:
+                out[t]["rows"] = self.db.execute(f'SELECT COUNT(*) FROM "{t}"').fetchone()[0]
+            return out
+
+    # ----- queries -----
+    def latest(self, table, limit, where=()):
+        """The newest `limit` rows, newest first, as Supabase would return them; where: (column, value)
+        equality filters, None matching null."""
+        self.sync(table)
+        clauses = "".join(f" AND json_extract(row, '$.\"{column}\"') IS ?" for column, _ in where)
+        with self._lock:
+            cur = self.db.execute(f'SELECT row FROM "{table}" WHERE 1{clauses} ORDER BY t DESC LIMIT ?',
+                                  [value for _, value in where] + [limit])
+            return [json.loads(r) for (r,) in cur]
+
+    def table(self, name):
+        if name not in self._stats:
+            return self.client.table(name)  # tables not replicated are read from Supabase directly
+        return ReplicaQuery(self, name)
+
+
+class ReplicaQuery:
+    """The select("*").order("timestamp", desc=True).limit(n) chain the dashboards use, with optional
+    eq() / is_(column, "null") filters."""
+
+    def __init__(self, replica, table):
+        self.replica = replica
+        self.name = table
+        self._limit = None
+        self._where = []
+
+    def select(self, columns="*"):
+        if columns != "*":
+            raise ValueError(f"the replica serves select('*') only, not select({columns!r}) on {self.name}")
+        return self
+
+    def order(self, column, desc=False):
+        if column != "timestamp" or not desc:
+            raise ValueError(f"the replica serves newest-first timestamp order only, not "
+                             f"order({column!r}, desc={desc}) on {self.name}")
+        return self
+
+    def eq(self, column, value):
+        self._where.append((column, value))
+        return self
+
+    def is_(self, column, value):
+        if value != "null":
+            raise ValueError(f"the replica serves is_({column!r}, 'null') only, not {value!r} on {self.name}")
+        self._where.append((column, None))
+        return self
+
+    def __getattr__(self, name):
+        # Filters (eq, gte, in_, ...) and anything else supabase-py offers
+        if name.startswith("_"):
+            raise AttributeError(name)
+        raise ValueError(f"the replica does not serve .{name}() on {self.name}; query Supabase directly")
+
+    def limit(self, n):
+        self._limit = n
+        return self
+
+    def execute(self):
+        return _Response(self.replica.latest(self.name, self._limit if self._limit is not None else -1, self._where))
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+# ======================
+# PROCESS-WIDE REPLICA
+# ======================
+_replica = None
+_replica_lock = threading.Lock()
+
+
+def get_replica(client, path=REPLICA_PATH):
+    global _replica
+    with _replica_lock:
+        if _replica is None:
+            _replica = LocalReplica(client, path)
+        return _replica
@@ -0,0 +1,454 @@
+import argparse
+import json
+import random
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+# ======================
+# LOCAL SUPABASE STAND-IN
+# ======================
+# Serves the slice of PostgREST that the dashboards, the batch tools and
+# sensor_sends.ino use, backed by SQLite:
+#
+#   GET  /rest/v1/<table>?select=a,b&order=col.desc&limit=N&offset=N&col=op.value
+#        ops: eq neq gt gte lt lte is in, each optionally prefixed with not.
+#   POST /rest/v1/<table>   one object or an array of objects;
+#        "Prefer: return=representation" echoes the inserted rows;
+#        "Prefer: resolution=merge-duplicates" (supabase-py's upsert) updates
+#        rows that collide on ?on_conflict= (default id)
+#   PATCH /rest/v1/<table>?col=op.value   sets the body's columns on matching rows
+#   GET  /realtime/v1/<table>?after=<id>
+#        changefeed: a Server-Sent Events stream of rows inserted after that
+#        id (default: from now on), pushed as soon as they commit
+#
+# Point the apps at it through the environment (it takes precedence over
+# links.env):
+#
+#   SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_KEY=local.stand.in streamlit run app.py
+
+HOST = "127.0.0.1"
+PORT = 54321
+LOCAL_KEY = "local.stand.in"  # create_client only checks that the key looks like a JWT
+
+SCHEMA = {
+    "lakefishcage": {
+        "id": "INTEGER PRIMARY KEY AUTOINCREMENT",
+        "timestamp": "TEXT NOT NULL",
+        "cage_id": "INTEGER",
+        "temperature": "REAL",
+        "turbidity": "REAL",
+        "ph": "REAL",
+        "water_quality": "INTEGER",
+        # written at ingest by score_on_ingest.py (see MIGRATION_SQL there)
+        "predicted_quality": "INTEGER",
+        "p_excellent": "REAL",
+        "p_good": "REAL",
+        "p_poor": "REAL",
+        "model_version": "TEXT",
+        # set whenever water_quality is labelled, as online_model.py's MIGRATION_SQL does upstream
+        "label_seq": "INTEGER",
+    },
+    "security_alerts": {
+        "id": "INTEGER PRIMARY KEY AUTOINCREMENT",
+        "timestamp": "TEXT NOT NULL",
+        "cage_id": "INTEGER",
+        "status": "INTEGER",
+    },
+    # run-length PIR state written by security_intervals.py (see MIGRATION_SQL there)
+    "security_intervals": {
+        "id": "INTEGER PRIMARY KEY AUTOINCREMENT",
+        "cage_id": "INTEGER NOT NULL",
+        "status": "INTEGER NOT NULL",
+        "started_at": "TEXT NOT NULL",
+        "ended_at": "TEXT NOT NULL",
+        "samples": "INTEGER NOT NULL",
+    },
+}
+UNIQUE = {"security_intervals": ("cage_id", "started_at")}
+_NEXT_LABEL_SEQ = "UPDATE lakefishcage SET label_seq = (SELECT COALESCE(MAX(label_seq), 0) + 1 FROM lakefishcage) " \
+                  "WHERE id = NEW.id"
+TRIGGERS = [
+    "CREATE INDEX IF NOT EXISTS lakefishcage_label_seq_idx ON lakefishcage (label_seq)",
+    f"CREATE TRIGGER IF NOT EXISTS lakefishcage_label_insert AFTER INSERT ON lakefishcage "
+    f"WHEN NEW.water_quality IS NOT NULL BEGIN {_NEXT_LABEL_SEQ}; END",
+    f"CREATE TRIGGER IF NOT EXISTS lakefishcage_label_update AFTER UPDATE OF water_quality ON lakefishcage "
+    f"WHEN NEW.water_quality IS NOT NULL AND NEW.water_quality IS NOT OLD.water_quality BEGIN {_NEXT_LABEL_SEQ}; END",
+]
+FEED_KEEPALIVE_S = 15.0
+FIRMWARE_DIGITS = {"temperature": 2, "turbidity": 1, "ph": 2}
+OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+class QueryError(ValueError):
+    pass
+
+
+def now_iso(ts=None):
+    """PostgREST's timestamptz rendering; fixed width, so it also sorts as text."""
+    ts = ts or datetime.now(timezone.utc)
+    return ts.strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+
+
+class LocalStore:
+    def __init__(self, path=":memory:"):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        self.inserted = threading.Condition(self.lock)  # notified after every insert commits
+        with self.db:
+            for table, columns in SCHEMA.items():
+                cols = ", ".join(f'"{c}" {t}' for c, t in columns.items())
+                self.db.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({cols})')
+                # A --db file from before a column was added gets it here
+                have = {r["name"] for r in self.db.execute(f'PRAGMA table_info("{table}")')}
+                for c, t in columns.items():
+                    if c not in have:
+                        self.db.execute(f'ALTER TABLE "{table}" ADD COLUMN "{c}" {t}')
+                if "timestamp" in columns:
+                    self.db.execute(f'CREATE INDEX IF NOT EXISTS "{table}_timestamp" ON "{table}" ("timestamp")')
+                if table in UNIQUE:
+                    cols = ", ".join(f'"{c}"' for c in UNIQUE[table])
+                    self.db.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{table}_key" ON "{table}" ({cols})')
+            for sql in TRIGGERS:
+                self.db.execute(sql)
+
+    def _columns(self, table, names):
+        if table not in SCHEMA:
+            raise QueryError(f'relation "public.{table}" does not exist')
+        for name in names:
+            if name not in SCHEMA[table]:
+                raise QueryError(f"column {table}.{name} does not exist")
+        return names
+
+    def select(self, table, params):
+        """params: PostgREST query string pairs, in order."""
+        self._columns(table, [])
+        columns, where, args, order, limit, offset = ["*"], [], [], [], None, None
+        for key, value in params:
+            if key == "select":
+                columns = [c.strip() for c in value.split(",") if c.strip()] or ["*"]
+                if columns != ["*"]:
+                    self._columns(table, columns)
+            elif key == "order":
+                for term in value.split(","):
+                    col, *mods = term.split(".")
+                    self._columns(table, [col])
+                    direction = "DESC" if "desc" in mods else "ASC"
+                    nulls = " NULLS FIRST" if "nullsfirst" in mods else " NULLS LAST" if "nullslast" in mods else ""
+                    order.append(f'"{col}" {direction}{nulls}')
+            elif key == "limit":
+                limit = int(value)
+            elif key == "offset":
+                offset = int(value)
+            else:
+                self._columns(table, [key])
+                clause, clause_args = _filter(key, value)
+                where.append(clause)
+                args.extend(clause_args)
+
+        cols = "*" if columns == ["*"] else ", ".join(f'"{c}"' for c in columns)
+        sql = f'SELECT {cols} FROM "{table}"'
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if order:
+            sql += " ORDER BY " + ", ".join(order)
+        if limit is not None or offset is not None:
+            sql += " LIMIT ? OFFSET ?"
+            args += [-1 if limit is None else limit, offset or 0]
+        with self.lock:
+            return [dict(r) for r in self.db.execute(sql, args)]
+
+    def insert(self, table, rows, returning=False, on_conflict=None):
+        """on_conflict: "col[,col]"; rows that collide on it update the given columns instead (upsert)."""
+        if isinstance(rows, dict):
+            rows = [rows]
+        supplied = {k for r in rows for k in r}
+        names = sorted(supplied | ({"timestamp"} & set(SCHEMA.get(table, ()))))
+        self._columns(table, names)
+        stamp = now_iso()
+        values = [[r.get(n, stamp) if n == "timestamp" else r.get(n) for n in names] for r in rows]
+        cols = ", ".join(f'"{n}"' for n in names)
+        marks = ", ".join("?" * len(names))
+        upsert = ""
+        if on_conflict is not None:
+            keys = self._columns(table, on_conflict.split(","))
+            key_cols = ", ".join(f'"{k}"' for k in keys)
+            # As PostgREST's merge-duplicates: only the columns the payload supplies are updated
+            sets = ", ".join(f'"{n}" = excluded."{n}"' for n in names if n in supplied and n not in keys)
+            upsert = f' ON CONFLICT({key_cols}) DO UPDATE SET {sets}' if sets else f' ON CONFLICT({key_cols}) DO NOTHING'
+        with self.lock, self.db:
+            first = self.db.execute(f'SELECT COALESCE(MAX(id), 0) FROM "{table}"').fetchone()[0] + 1
+            self.db.executemany(f'INSERT INTO "{table}" ({cols}) VALUES ({marks}){upsert}', values)
+            self.inserted.notify_all()  # waiters wake once the lock (and the transaction) is released
+            if not returning:
+                return None
+            if on_conflict is not None:
+                tuple_marks = ", ".join(f'({", ".join("?" * len(keys))})' for _ in rows)
+                return [dict(r) for r in self.db.execute(
+                    f'SELECT * FROM "{table}" WHERE ({key_cols}) IN (VALUES {tuple_marks}) OR id >= ? ORDER BY id',
+                    [r.get(k) for r in rows for k in keys] + [first])]
+            # AUTOINCREMENT ids of one statement batch are consecutive under the lock
+            return [dict(r) for r in self.db.execute(
+                f'SELECT * FROM "{table}" WHERE id >= ? ORDER BY id', (first,))]
+
+    def update(self, table, values, params, returning=False):
+        """Set values on the rows matching params' filters (PostgREST PATCH)."""
+        self._columns(table, list(values))
+        where, args = [], []
+        for key, value in params:
+            if key in ("select", "order", "limit", "offset"):
+                continue
+            self._columns(table, [key])
+            clause, clause_args = _filter(key, value)
+            where.append(clause)
+            args.extend(clause_args)
+        sets = ", ".join(f'"{n}" = ?' for n in values)
+        sql = f'UPDATE "{table}" SET {sets}' + (" WHERE " + " AND ".join(where) if where else "")
+        with self.lock, self.db:
+            if not returning:
+                self.db.execute(sql, list(values.values()) + args)
+                return None
+            return [dict(r) for r in self.db.execute(sql + " RETURNING *", list(values.values()) + args)]
+
+    def wait_for_rows(self, table, after, timeout):
+        """Rows with id > after, waiting up to timeout seconds for the first one."""
+        self._columns(table, [])
+        sql = f'SELECT * FROM "{table}" WHERE id > ? ORDER BY id'
+        with self.inserted:
+            rows = self.db.execute(sql, (after,)).fetchall()
+            if not rows:
+                self.inserted.wait(timeout)
+                rows = self.db.execute(sql, (after,)).fetchall()
+            return [dict(r) for r in rows]
+
+    def max_id(self, table):
+        self._columns(table, [])
+        with self.lock:
+            return self.db.execute(f'SELECT COALESCE(MAX(id), 0) FROM "{table}"').fetchone()[0]
+
+    def count(self, table):
+        self._columns(table, [])
+        with self.lock:
+            return self.db.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+
+def _filter(column, expr):
+    negate = expr.startswith("not.")
+    if negate:
+        expr = expr[4:]
+    op, _, value = expr.partition(".")
+    if op in OPERATORS:
+        clause, args = f'"{column}" {OPERATORS[op]} ?', [_literal(value)]
+    elif op == "is":
+        if value.lower() not in ("null", "true", "false"):
+            raise QueryError(f'"failed to parse filter (is.{value})"')
+        clause, args = f'"{column}" IS {value.upper()}', []
+    elif op == "in":
+        items = [_literal(v.strip().strip('"')) for v in value.strip("()").split(",") if v.strip()]
+        clause, args = f'"{column}" IN ({", ".join("?" * len(items))})', items
+    else:
+        raise QueryError(f'"failed to parse filter ({op}.{value})"')
+    return (f"NOT ({clause})" if negate else clause), args
+
+
+def _literal(value):
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+# ======================
+# SEED DATA
+# ======================
+def seed_from_csv(store, csv_path="WQD_selected.csv", alert_rate=0.01, seed=0):
+    """WQD_selected.csv as lakefishcage history at the firmware's 5 s cadence, ending now."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path).sample(frac=1, random_state=seed)
+    end = datetime.now(timezone.utc)
+    stamps = [now_iso(end - timedelta(seconds=5 * i)) for i in range(len(df))][::-1]
+    store.insert("lakefishcage", [
+        {"timestamp": t, "cage_id": 0, "temperature": round(temp, 2), "turbidity": round(turb, 1),
+         "ph": round(ph, 2), "water_quality": int(label)}
+        for t, temp, turb, ph, label in zip(stamps, df["Temp"], df["Turbidity"], df["pH"], df["Water Quality"])
+    ])
+    rng = random.Random(seed)
+    store.insert("security_alerts", [
+        {"timestamp": t, "cage_id": 0, "status": int(rng.random() < alert_rate)} for t in stamps
+    ])
+
+
+def seed_from_fleet(store, fleet_dir, max_rows=None):
+    """Parquet partitions written by synthetic_fleet.py."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    for table in SCHEMA:
+        data = ds.dataset(f"{fleet_dir}/{table}", format="parquet", partitioning="hive").to_table()
+        data = data.drop_columns([c for c in data.column_names if c not in SCHEMA[table]])
+        if max_rows is not None:
+            data = data.slice(0, max_rows)
+        stamps = pc.strftime(data["timestamp"].cast(pa.timestamp("us", tz="UTC")), format="%Y-%m-%dT%H:%M:%S+00:00")
+        data = data.set_column(data.column_names.index("timestamp"), "timestamp", stamps)
+        for name, digits in FIRMWARE_DIGITS.items():
+            if name in data.column_names:
+                # float32 on disk; back to the decimals the firmware sent
+                rounded = pc.round(data[name].cast(pa.float64()), digits)
+                data = data.set_column(data.column_names.index(name), name, rounded)
+        names = data.column_names
+        cols = ", ".join(f'"{n}"' for n in names)
+        with store.lock, store.db:
+            for batch in data.to_batches(100_000):
+                store.db.executemany(f'INSERT INTO "{table}" ({cols}) VALUES ({", ".join("?" * len(names))})',
+                                     zip(*(batch.column(i).to_pylist() for i in range(len(names)))))
+
+
+# ======================
+# HTTP SERVER
+# ======================
+class PostgrestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as supabase-py's httpx client expects
+    disable_nagle_algorithm = True  # headers and body are separate writes; don't wait on delayed ACKs
+    store = None
+    latency = (0.0, 0.0)  # (fixed, jitter) seconds added to every request
+
+    def _table(self, prefix="/rest/v1/"):
+        parts = urlsplit(self.path)
+        if not parts.path.startswith(prefix):
+            return None, []
+        return parts.path[len(prefix):].strip("/"), parse_qsl(parts.query, keep_blank_values=True)
+
+    def _reply(self, status, payload=None, headers=None):
+        fixed, jitter = self.latency
+        if fixed or jitter:
+            time.sleep(fixed + random.random() * jitter)
+        body = b"" if payload is None else json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._reply(status, {"code": "PGRST100", "details": None, "hint": None, "message": message})
+
+    def do_GET(self):
+        if self.path.startswith("/realtime/v1/"):
+            return self._changefeed()
+        table, params = self._table()
+        if table is None:
+            return self._error(404, "not found")
+        try:
+            rows = self.store.select(table, params)
+        except (QueryError, ValueError, sqlite3.Error) as e:
+            return self._error(404 if table not in SCHEMA else 400, str(e))
+        self._reply(200, rows, {"Content-Range": f"0-{len(rows) - 1}/*" if rows else "*/*"})
+
+    def _changefeed(self):
+        table, params = self._table("/realtime/v1/")
+        if table not in SCHEMA:
+            return self._error(404, f'relation "public.{table}" does not exist')
+        after = dict(params).get("after")
+        after = self.store.max_id(table) if after is None else int(after)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")  # the stream ends when either side hangs up
+        self.end_headers()
+        self.close_connection = True
+        try:
+            self.wfile.write(b": subscribed\n\n")
+            self.wfile.flush()
+            while True:
+                rows = self.store.wait_for_rows(table, after, FEED_KEEPALIVE_S)
+                if not rows:
+                    self.wfile.write(b": keepalive\n\n")
+                for row in rows:
+                    self.wfile.write(f"id: {row['id']}\nevent: insert\ndata: {json.dumps(row)}\n\n".encode())
+                    after = row["id"]
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def do_POST(self):
+        table, params = self._table()
+        if table is None:
+            return self._error(404, "not found")
+        length = int(self.headers.get("Content-Length") or 0)
+        prefer = self.headers.get("Prefer") or ""
+        # Upserts resolve on ?on_conflict=, or the primary key as in PostgREST
+        on_conflict = dict(params).get("on_conflict", "id") if "resolution=merge-duplicates" in prefer else None
+        try:
+            rows = json.loads(self.rfile.read(length) or b"[]")
+            returning = "return=representation" in prefer
+            inserted = self.store.insert(table, rows, returning, on_conflict)
+        except (QueryError, ValueError, sqlite3.Error) as e:
+            return self._error(400, str(e))
+        self._reply(201, inserted)
+
+    def do_PATCH(self):
+        table, params = self._table()
+        if table is None:
+            return self._error(404, "not found")
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            values = json.loads(self.rfile.read(length) or b"{}")
+            returning = "return=representation" in (self.headers.get("Prefer") or "")
+            updated = self.store.update(table, values, params, returning)
+        except (QueryError, ValueError, sqlite3.Error) as e:
+            return self._error(400, str(e))
+        self._reply(200, updated)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(store, host=HOST, port=PORT, latency_ms=0.0, jitter_ms=0.0):
+    handler = type("Handler", (PostgrestHandler,), {"store": store, "latency": (latency_ms / 1e3, jitter_ms / 1e3)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True  # changefeed streams never finish on their own
+    return server
+
+
+def serve_in_thread(store, host=HOST, port=0, latency_ms=0.0, jitter_ms=0.0):
+    """Start a stand-in on a free port for benchmarks; returns (server, url)."""
+    server = make_server(store, host, port, latency_ms, jitter_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+# ======================
+# COMMAND LINE
+# ======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local PostgREST/Supabase stand-in for offline benchmarking")
+    parser.add_argument("--db", default=":memory:", help="SQLite file to persist rows in (default: in memory)")
+    parser.add_argument("--seed-csv", help="seed lakefishcage from a WQD-style CSV (e.g. WQD_selected.csv)")
+    parser.add_argument("--seed-fleet", help="seed both tables from a synthetic_fleet.py output directory")
+    parser.add_argument("--max-rows", type=int, help="rows per table to take from --seed-fleet")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="delay added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="extra uniform random delay")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    store = LocalStore(args.db)
+    if args.seed_csv:
+        seed_from_csv(store, args.seed_csv)
+    if args.seed_fleet:
+        seed_from_fleet(store, args.seed_fleet, args.max_rows)
+    counts = ", ".join(f"{t} {store.count(t):,}" for t in SCHEMA)
+    server = make_server(store, args.host, args.port, args.latency_ms, args.jitter_ms)
+    print(f"✅ Serving {counts} rows on http://{args.host}:{args.port} "
+          f"(SUPABASE_KEY={LOCAL_KEY}, latency {args.latency_ms:g}+{args.jitter_ms:g} ms)")
+    server.serve_forever()
@@ -0,0 +1,100 @@
+import json
+import os
+import sys
+
+import numpy as np
+
+from forest_engine import CompiledForest
+from forest_lut import LUT_DIR, load_lookup_predictor
+
+# ======================
+# ARTIFACT FORMAT
+# ======================
+# A directory holding one raw .npy file per node table plus a small JSON
+# header. Arrays are memory-mapped on load, so opening the model costs a few
+# file opens instead of unpickling the forest, and scikit-learn is never
+# imported by the dashboards.
+#
+#   water_quality_model/
+#       model.json          format version, classes, feature names, fingerprint
+#       feature.npy  threshold.npy  left.npy  right.npy  value.npy  roots.npy
+
+ARTIFACT_DIR = "water_quality_model"
+PICKLE_PATH = "water_quality_model.pkl"
+FORMAT_VERSION = 1
+
+ARRAYS = {
+    "feature": np.int32,
+    "threshold": np.float64,
+    "left": np.int32,
+    "right": np.int32,
+    "value": np.float64,
+    "roots": np.int32,
+}
+
+
+def save_artifact(forest, path=ARTIFACT_DIR):
+    os.makedirs(path, exist_ok=True)
+    for name, dtype in ARRAYS.items():
+        arr = getattr(forest, name)
+        if arr.dtype == np.float32:
+            dtype = np.float32  # compacted forests keep their single-precision tables
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(arr, dtype=dtype))
+    names = forest.feature_names_in_
+    header = {
+        "format_version": FORMAT_VERSION,
+        "classes": forest.classes_.tolist(),
+        "feature_names": None if names is None else list(names),
+        "n_estimators": forest.n_estimators,
+        "n_nodes": forest.n_nodes,
+        "max_depth": forest.max_depth,
+        "fingerprint": forest.fingerprint(),
+    }
+    # Header last, so a half-written directory is never picked up as a model
+    tmp = os.path.join(path, "model.json.tmp")
+    with open(tmp, "w") as fh:
+        json.dump(header, fh, indent=2)
+    os.replace(tmp, os.path.join(path, "model.json"))
+    return header
+
+
+def load_artifact(path=ARTIFACT_DIR):
+    with open(os.path.join(path, "model.json")) as fh:
+        header = json.load(fh)
+    if header["format_version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact version {header['format_version']} in {path}")
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+    names = header["feature_names"]
+    return CompiledForest(
+        classes=np.asarray(header["classes"]),
+        max_depth=header["max_depth"],
+        feature_names=None if names is None else np.asarray(names, dtype=object),
+        **arrays,
+    )
+
+
+# ======================
+# LOADING
+# ======================
+def load_model(path=ARTIFACT_DIR, pickle_path=PICKLE_PATH, lut_path=LUT_DIR):
+    """Open the artifact (or compile the pickle if it was never exported)."""
+    if os.path.exists(os.path.join(path, "model.json")):
+        forest = load_artifact(path)
+    elif pickle_path and os.path.exists(pickle_path):
+        from forest_engine import load_compiled_forest
+        forest = load_compiled_forest(pickle_path)
+    else:
+        raise FileNotFoundError(f"No model artifact in '{path}' and no '{pickle_path}'")
+    return load_lookup_predictor(forest, lut_path)
+
+
+# ======================
+# COMMAND LINE
+# ======================
+if __name__ == "__main__":
+    from forest_engine import load_compiled_forest
+
+    src = sys.argv[1] if len(sys.argv) > 1 else PICKLE_PATH
+    dst = sys.argv[2] if len(sys.argv) > 2 else ARTIFACT_DIR
+    header = save_artifact(load_compiled_forest(src), dst)
+    print(f"✅ Exported {src} to {dst} ({header['n_estimators']} trees, {header['n_nodes']} nodes)")
@@ -0,0 +1,180 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from model_artifact import load_model, save_artifact
+
+# ======================
+# REGISTRY LAYOUT
+# ======================
+# Every published model is an immutable artifact directory plus metadata.
+# CURRENT names the active version and is only ever replaced atomically, so a
+# reader sees either the old or the new version, never a partial one.
+#
+#   models/
+#       CURRENT             "v0003"
+#       v0001/  model.json  *.npy  metadata.json  [lut/]
+#       v0002/  ...
+
+REGISTRY_DIR = "models"
+POLL_INTERVAL = 2.0  # seconds between stat() calls on CURRENT
+LEGACY_VERSION = "legacy"  # the water_quality_model/ artifact or pickle, used before anything is published
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ModelRegistry:
+    def __init__(self, path=REGISTRY_DIR, poll_interval=POLL_INTERVAL):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._current = None  # (version, model), swapped as one reference
+        self._etag = None
+        self._next_poll = 0.0
+        self._lock = threading.Lock()
+
+    # ----- publishing -----
+    def versions(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(d for d in os.listdir(self.path)
+                      if d.startswith("v") and os.path.exists(os.path.join(self.path, d, "metadata.json")))
+
+    def publish(self, forest, metadata=None, activate=True):
+        """Write `forest` as the next version and (by default) make it current."""
+        os.makedirs(self.path, exist_ok=True)
+        existing = self.versions()
+        version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+        staging = os.path.join(self.path, f".{version}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+
+        header = save_artifact(forest, staging)
+        meta = {
+            "version": version,
+            "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "fingerprint": header["fingerprint"],
+            "feature_order": header["feature_names"],
+            "classes": header["classes"],
+        }
+        meta.update(metadata or {})
+        with open(os.path.join(staging, "metadata.json"), "w") as fh:
+            json.dump(meta, fh, indent=2)
+        os.rename(staging, os.path.join(self.path, version))
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        if not os.path.exists(os.path.join(self.path, version, "metadata.json")):
+            raise ValueError(f"Unknown model version '{version}' in {self.path}")
+        tmp = os.path.join(self.path, "CURRENT.tmp")
+        with open(tmp, "w") as fh:
+            fh.write(version)
+        os.replace(tmp, os.path.join(self.path, "CURRENT"))
+
+    def metadata(self, version):
+        with open(os.path.join(self.path, version, "metadata.json")) as fh:
+            return json.load(fh)
+
+    # ----- serving -----
+    def current(self):
+        """Return (version, model). Cheap enough to call on every rerun."""
+        now = time.monotonic()
+        if self._current is None or now >= self._next_poll:
+            self._next_poll = now + self.poll_interval
+            self._poll()
+        return self._current
+
+    def _poll(self):
+        try:
+            st = os.stat(os.path.join(self.path, "CURRENT"))
+            etag = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except FileNotFoundError:
+            etag = None
+        if etag == self._etag and self._current is not None:
+            return
+
+        # Only one thread loads; everyone else keeps serving the model they have
+        blocking = self._current is None
+        if not self._lock.acquire(blocking=blocking):
+            return
+        try:
+            if etag == self._etag and self._current is not None:
+                return
+            if etag is None:
+                self._current = (LEGACY_VERSION, load_model())
+            else:
+                with open(os.path.join(self.path, "CURRENT")) as fh:
+                    version = fh.read().strip()
+                if self._current is None or self._current[0] != version:
+                    vdir = os.path.join(self.path, version)
+                    self._current = (version, load_model(vdir, pickle_path=None, lut_path=os.path.join(vdir, "lut")))
+            self._etag = etag
+        finally:
+            self._lock.release()
+
+
+# ======================
+# PROCESS-WIDE REGISTRY
+# ======================
+# Module state outlives Streamlit reruns and is shared by every session, so
+# the model is loaded once per version per process, not once per session.
+_registry = ModelRegistry()
+
+
+def get_registry():
+    return _registry
+
+
+def get_versioned_model():
+    return _registry.current()
+
+
+def get_model():
+    return _registry.current()[1]
+
+
+# ======================
+# COMMAND LINE
+# ======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local water quality model registry")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pub = sub.add_parser("publish", help="publish a pickled RandomForestClassifier")
+    pub.add_argument("model", nargs="?", default="water_quality_model.pkl")
+    pub.add_argument("--data", default="WQD_selected.csv", help="training CSV, hashed into the metadata")
+    pub.add_argument("--no-activate", action="store_true")
+    act = sub.add_parser("activate", help="make an existing version current (rollback)")
+    act.add_argument("version")
+    sub.add_parser("list", help="list published versions")
+    args = parser.parse_args()
+
+    registry = ModelRegistry()
+    if args.command == "publish":
+        from forest_engine import load_compiled_forest
+        meta = {"source": args.model}
+        if os.path.exists(args.data):
+            meta["training_data"] = args.data
+            meta["training_data_sha256"] = file_sha256(args.data)
+        version = registry.publish(load_compiled_forest(args.model), meta, activate=not args.no_activate)
+        print(f"✅ Published {args.model} as {version}")
+    elif args.command == "activate":
+        registry.activate(args.version)
+        print(f"✅ {args.version} is now current")
+    else:
+        current = registry.current()[0]
+        for version in registry.versions():
+            meta = registry.metadata(version)
+            marker = "*" if version == current else " "
+            print(f"{marker} {version}  {meta['created_at']}  {meta.get('metrics', {})}")
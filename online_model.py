@@ -0,0 +1,203 @@
+import argparse
+import os
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_engine import compile_forest, merge_forests
+
+# ======================
+# ROLLING-WINDOW FOREST
+# ======================
+# Next to the batch-trained forest, this keeps the forest fresh as labelled
+# readings arrive. Rows go into a fixed-size ring buffer (O(1) per row).
+# Every REFRESH_EVERY rows, TREES_PER_REFRESH new trees are fitted on the
+# window and replace the oldest trees of the current model. The window
+# size is fixed, so each refresh costs the same and the cost per row is
+# amortised constant. Old seasons age out tree by tree, with no full retrain.
+#
+# Labels are written after their readings, so labelled rows are followed by
+# label_seq rather than by timestamp or id: a trigger stamps it from a
+# sequence whenever water_quality is set, and every label gets a higher
+# number than the labels before it. Supabase needs the column and trigger
+# once (python online_model.py --migration prints the SQL).
+
+WINDOW = 20_000
+REFRESH_EVERY = 1_000
+TREES_PER_REFRESH = 10
+TREE_PARAMS = {"max_depth": 10, "min_samples_leaf": 2}
+LABEL_COLUMN = "water_quality"  # label column on lakefishcage for hand-labelled readings
+
+MIGRATION_SQL = """\
+alter table lakefishcage add column if not exists label_seq bigint;
+create sequence if not exists lakefishcage_label_seq;
+create or replace function lakefishcage_set_label_seq() returns trigger language plpgsql as $$
+begin
+  if new.water_quality is not null
+     and (tg_op = 'INSERT' or new.water_quality is distinct from old.water_quality) then
+    new.label_seq := nextval('lakefishcage_label_seq');
+  end if;
+  return new;
+end $$;
+drop trigger if exists lakefishcage_set_label_seq on lakefishcage;
+create trigger lakefishcage_set_label_seq before insert or update of water_quality on lakefishcage
+  for each row execute function lakefishcage_set_label_seq();
+create index if not exists lakefishcage_label_seq_idx on lakefishcage (label_seq);
+update lakefishcage set label_seq = nextval('lakefishcage_label_seq')
+  where water_quality is not null and label_seq is null;
+"""
+
+
+class RingBuffer:
+    def __init__(self, capacity, n_features=3):
+        self.X = np.empty((capacity, n_features), dtype=np.float32)
+        self.y = np.empty(capacity, dtype=np.int8)
+        self.capacity = capacity
+        self.pos = 0
+        self.size = 0
+
+    def extend(self, X, y):
+        X = np.asarray(X, dtype=np.float32).reshape(-1, self.X.shape[1])[-self.capacity:]
+        y = np.asarray(y, dtype=np.int8)[-self.capacity:]
+        idx = (self.pos + np.arange(len(y))) % self.capacity
+        self.X[idx] = X
+        self.y[idx] = y
+        self.pos = (self.pos + len(y)) % self.capacity
+        self.size = min(self.size + len(y), self.capacity)
+
+    def view(self):
+        return self.X[:self.size], self.y[:self.size]
+
+
+class RollingForest:
+    def __init__(self, base, window=WINDOW, refresh_every=REFRESH_EVERY,
+                 trees_per_refresh=TREES_PER_REFRESH, seed=42):
+        self.classes = np.asarray(base.classes_)
+        self.trees = [base.tree(t) for t in range(base.n_estimators)]
+        self.oldest = 0  # trees are replaced round-robin, oldest first
+        self.buffer = RingBuffer(window)
+        self.refresh_every = refresh_every
+        self.trees_per_refresh = trees_per_refresh
+        self.seed = seed
+        self.rows_seen = 0
+        self.refreshes = 0
+        self._pending = 0
+        self._model = base
+
+    def partial_fit(self, X, y):
+        """Add labelled rows; refits a slice of the forest every refresh_every rows."""
+        y = np.asarray(y)
+        X = np.asarray(X).reshape(len(y), -1)
+        start = 0
+        while start < len(y):
+            take = min(self.refresh_every - self._pending, len(y) - start)
+            self.buffer.extend(X[start:start + take], y[start:start + take])
+            self._pending += take
+            self.rows_seen += take
+            start += take
+            if self._pending >= self.refresh_every:
+                self._refresh()
+        return self
+
+    def _refresh(self):
+        Xw, yw = self.buffer.view()
+        clf = RandomForestClassifier(n_estimators=self.trees_per_refresh,
+                                     random_state=self.seed + self.refreshes, **TREE_PARAMS)
+        fresh = compile_forest(clf.fit(Xw, yw))
+        for t in range(fresh.n_estimators):
+            self.trees[self.oldest] = fresh.tree(t)
+            self.oldest = (self.oldest + 1) % len(self.trees)
+        self.refreshes += 1
+        self._pending = 0
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = merge_forests(self.trees, self.classes)
+        return self._model
+
+    def publish(self, registry, base_version=None):
+        return registry.publish(self.model, {
+            "source": "online_model.py",
+            "base_version": base_version,
+            "rows_seen": self.rows_seen,
+            "refreshes": self.refreshes,
+            "params": dict(TREE_PARAMS, window=self.buffer.capacity, refresh_every=self.refresh_every,
+                           trees_per_refresh=self.trees_per_refresh),
+        })
+
+
+# ======================
+# LABELLED ROW STREAMS
+# ======================
+def iter_supabase_labelled(client, label_column=LABEL_COLUMN, since=None, batch=1000, poll_seconds=5.0):
+    """Yield (timestamps, X, y) for newly labelled lakefishcage rows, forever.
+
+    since: a label_seq to resume after; rows relabelled later come round again with the new label.
+    """
+    columns = f"label_seq,timestamp,temperature,turbidity,ph,{label_column}"
+    after = since or 0
+    while True:
+        data = (client.table("lakefishcage").select(columns).not_.is_(label_column, "null")
+                .gt("label_seq", after).order("label_seq").limit(batch).execute().data)
+        if not data:
+            time.sleep(poll_seconds)
+            continue
+        after = data[-1]["label_seq"]
+        yield ([r["timestamp"] for r in data],
+               np.array([[r["temperature"], r["turbidity"], r["ph"]] for r in data]),
+               np.array([r[label_column] for r in data]))
+
+
+def iter_csv_labelled(path, label_column=LABEL_COLUMN, batch=1000):
+    import pandas as pd
+
+    for df in pd.read_csv(path, chunksize=batch):
+        yield df["timestamp"].tolist(), df[["temperature", "turbidity", "ph"]].to_numpy(), df[label_column].to_numpy()
+
+
+# ======================
+# COMMAND LINE
+# ======================
+if __name__ == "__main__":
+    from model_registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Keep the water quality forest fresh from newly labelled readings")
+    parser.add_argument("--migration", action="store_true", help="print the SQL that adds label_seq")
+    parser.add_argument("--csv", help="replay a labelled lakefishcage export instead of following Supabase")
+    parser.add_argument("--label-column", default=LABEL_COLUMN,
+                        help="followed from Supabase by label_seq, which tracks water_quality")
+    parser.add_argument("--window", type=int, default=WINDOW)
+    parser.add_argument("--refresh-every", type=int, default=REFRESH_EVERY)
+    parser.add_argument("--trees-per-refresh", type=int, default=TREES_PER_REFRESH)
+    parser.add_argument("--publish-every", type=int, default=5, help="publish after this many refreshes")
+    args = parser.parse_args()
+    if args.migration:
+        print(MIGRATION_SQL, end="")
+        raise SystemExit
+
+    registry = ModelRegistry()
+    base_version, base = registry.current()
+    rolling = RollingForest(getattr(base, "model", base), args.window, args.refresh_every, args.trees_per_refresh)
+
+    if args.csv:
+        stream = iter_csv_labelled(args.csv, args.label_column)
+    else:
+        from dotenv import load_dotenv
+        from supabase import create_client
+
+        load_dotenv("links.env")
+        client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+        stream = iter_supabase_labelled(client, args.label_column)
+
+    published_at = 0
+    for timestamps, X, y in stream:
+        rolling.partial_fit(X, y)
+        if rolling.refreshes - published_at >= args.publish_every:
+            version = rolling.publish(registry, base_version)
+            published_at = rolling.refreshes
+            print(f"✅ Published {version} after {rolling.rows_seen:,} rows (up to {timestamps[-1]})")
+    if args.csv and rolling.refreshes > published_at:
+        print(f"✅ Published {rolling.publish(registry, base_version)} after {rolling.rows_seen:,} rows")
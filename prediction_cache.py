@@ -0,0 +1,83 @@
+import collections
+import threading
+import time
+
+import numpy as np
+
+# ======================
+# PREDICTION MEMO CACHE
+# ======================
+# Cage readings change slowly, so the same (temperature, turbidity, pH) triple
+# at firmware precision keeps coming back. Predictions are memoised per model
+# version in one LRU shared by every dashboard session in the process.
+
+CACHE_SIZE = 8192
+DECIMALS = (2, 1, 2)  # temperature, turbidity, pH as posted by sensor_sends.ino
+
+
+class PredictionCache:
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._miss_seconds = 0.0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def predict(self, X, version, predict_fn):
+        """Labels for the rows of X, calling predict_fn only on uncached triples.
+
+        Rows are rounded to firmware precision first and predict_fn sees the
+        rounded values, so a cached label is always the label of its key.
+        """
+        X = np.asarray(X, dtype=np.float64).reshape(-1, 3)
+        rounded = np.column_stack([np.round(X[:, f], d) for f, d in enumerate(DECIMALS)])
+        keys = [(version, *row) for row in rounded.tolist()]
+        out = [None] * len(keys)
+        missing = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._data:
+                    self._data.move_to_end(key)
+                    out[i] = self._data[key]
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+
+        if missing:
+            rows = [positions[0] for positions in missing.values()]
+            start = time.perf_counter()
+            labels = list(predict_fn(rounded[rows]))
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.misses += len(rows)
+                self._miss_seconds += elapsed
+                for (key, positions), label in zip(missing.items(), labels):
+                    for i in positions:
+                        out[i] = label
+                    self._data[key] = label
+                    self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+                    self.evictions += 1
+        return np.asarray(out)
+
+    def stats(self):
+        with self._lock:
+            per_miss = self._miss_seconds / self.misses if self.misses else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "hit_rate": self.hits / max(self.hits + self.misses, 1),
+                "saved_seconds": self.hits * per_miss,  # estimated from the mean miss cost
+            }
+
+
+_cache = PredictionCache()
+
+
+def get_prediction_cache():
+    return _cache
@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import threading
+
+import numpy as np
+
+from model_registry import get_versioned_model
+
+# ======================
+# MICRO-BATCHING
+# ======================
+# Single readings are queued and scored together: the first reading opens a
+# window (2 ms by default), and everything that arrives before it closes (up
+# to max_batch) goes through one predict_proba call. Scoring runs in a worker
+# thread so the next batch keeps collecting while the previous one is scored.
+
+BATCH_WINDOW = 0.002
+MAX_BATCH = 1024
+FEATURES = ["temperature", "turbidity", "ph"]
+
+
+def to_features(reading):
+    """A reading as a float64 array of the three FEATURES."""
+    if isinstance(reading, dict):
+        reading = [reading[name] for name in FEATURES]
+    if isinstance(reading, (str, bytes)) or not hasattr(reading, "__len__") or len(reading) != len(FEATURES):
+        raise ValueError(f"expected {len(FEATURES)} values ({', '.join(FEATURES)})")
+    for value in reading:
+        if isinstance(value, bool) or not isinstance(value, (int, float, np.integer, np.floating)):
+            raise TypeError(f"expected a number, got {value!r}")
+    return np.asarray(reading, dtype=np.float64)
+
+
+class MicroBatcher:
+    def __init__(self, window=BATCH_WINDOW, max_batch=MAX_BATCH, model_source=get_versioned_model):
+        self.window = window
+        self.max_batch = max_batch
+        self.model_source = model_source
+        self.batches = 0
+        self.rows = 0
+        self._queue = None
+        self._task = None
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def predict(self, reading):
+        """Score one reading: a dict with temperature/turbidity/ph or a 3-sequence.
+
+        Raises KeyError, TypeError or ValueError for a malformed reading before it is queued, so it
+        cannot fail the batch it would have joined.
+        """
+        reading = to_features(reading)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((reading, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.window)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            loop.create_task(self._score(batch))
+
+    async def _score(self, batch):
+        futures = [f for _, f in batch]
+        try:
+            X = np.stack([r for r, _ in batch])
+            version, results = await asyncio.get_running_loop().run_in_executor(None, self._score_sync, X)
+        except Exception as e:
+            for f in futures:
+                if not f.done():
+                    f.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(batch)
+        for f, (label, proba) in zip(futures, results):
+            if not f.done():
+                f.set_result({"label": label, "probabilities": proba, "model_version": version})
+
+    def _score_sync(self, X):
+        version, model = self.model_source()
+        proba = model.predict_proba(X)
+        labels = model.classes_.take(np.argmax(proba, axis=1))
+        return version, list(zip(labels.tolist(), proba.tolist()))
+
+
+# ======================
+# IN-PROCESS MODE
+# ======================
+# Streamlit sessions run on plain threads, so the shared batcher lives on its
+# own event loop in a daemon thread and sessions submit readings to it.
+class PredictionService:
+    def __init__(self, window=BATCH_WINDOW, max_batch=MAX_BATCH):
+        self.batcher = MicroBatcher(window, max_batch)
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="prediction-service", daemon=True)
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.batcher.start(), self.loop).result()
+
+    def predict(self, reading, timeout=5.0):
+        return asyncio.run_coroutine_threadsafe(self.batcher.predict(reading), self.loop).result(timeout)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_prediction_service():
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = PredictionService()
+    return _service
+
+
+# ======================
+# HTTP MODE
+# ======================
+def make_app(batcher):
+    from aiohttp import web
+
+    async def predict(request):
+        try:
+            body = await request.json()
+        except ValueError as e:
+            return web.json_response({"error": f"Bad JSON: {e}"}, status=400)
+        try:
+            if isinstance(body, list):
+                results = await asyncio.gather(*(batcher.predict(r) for r in body))
+            else:
+                results = await batcher.predict(body)
+        except (KeyError, TypeError, ValueError) as e:
+            return web.json_response({"error": f"Bad reading: {e}"}, status=400)
+        return web.json_response(results)
+
+    async def health(request):
+        return web.json_response({"status": "ok", "batches": batcher.batches, "rows": batcher.rows})
+
+    async def on_startup(app):
+        await batcher.start()
+
+    async def on_cleanup(app):
+        await batcher.close()
+
+    app = web.Application()
+    app.router.add_post("/predict", predict)
+    app.router.add_get("/health", health)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+if __name__ == "__main__":
+    from aiohttp import web
+
+    parser = argparse.ArgumentParser(description="Micro-batching water quality prediction server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--window-ms", type=float, default=BATCH_WINDOW * 1e3)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    args = parser.parse_args()
+
+    web.run_app(make_app(MicroBatcher(args.window_ms / 1e3, args.max_batch)), host=args.host, port=args.port)
@@ -0,0 +1,217 @@
+import asyncio
+import collections
+import json
+import threading
+import time
+import urllib.request
+from datetime import datetime
+from urllib.parse import urlsplit
+
+# ======================
+# REALTIME FEED
+# ======================
+# New rows are pushed to the process instead of being polled for:
+#   - against local_supabase.py: one Server-Sent Events stream per table
+#     (GET /realtime/v1/<table>), resumed from the last id after a reconnect
+#   - against Supabase: Realtime postgres_changes INSERT subscriptions
+#     over the client's websocket, resubscribed with the same backoff when
+#     the socket fails or closes
+#
+# Every pushed row lands in a bounded per-table buffer. The table's version
+# number is bumped, which marks every view built on it dirty. The row is
+# also written into the local replica when one is attached, and passed to
+# any listeners. Sessions compare versions in memory (a cheap st.fragment
+# tick) and rerun only when something changed. Upstream load does not grow
+# with the number of viewers.
+
+TABLES = ("lakefishcage", "security_alerts", "security_intervals")
+BUFFER_ROWS = 1000
+READ_TIMEOUT_S = 45.0  # the stand-in sends a keepalive every 15 s
+RECONNECT_MAX_S = 30.0
+WATCH_INTERVAL_S = 1.0  # how often the Supabase path checks that its socket is still up
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+def _age_seconds(ts):
+    try:
+        return time.time() - datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+    except (AttributeError, ValueError):
+        return None
+
+
+class RealtimeFeed:
+    def __init__(self, url, key, tables=TABLES, buffer_rows=BUFFER_ROWS, replica=None):
+        self.url = url.rstrip("/")
+        self.key = key
+        self.tables = tuple(tables)
+        self.replica = replica
+        self._lock = threading.Lock()
+        self._buffers = {t: collections.deque(maxlen=buffer_rows) for t in self.tables}
+        self._versions = {t: 0 for t in self.tables}
+        self._listeners = {t: {} for t in self.tables}
+        self._stats = {t: {"rows": 0, "last_latency_s": None, "connected": False, "reconnects": 0,
+                           "last_error": None} for t in self.tables}
+        self._threads = []
+        self._stop = threading.Event()
+
+    @property
+    def local(self):
+        return urlsplit(self.url).hostname in LOCAL_HOSTS
+
+    def start(self):
+        if self._threads:
+            return self
+        if self.local:
+            targets = [(self._follow_sse, (t,), f"feed-{t}") for t in self.tables]
+        else:
+            targets = [(self._follow_supabase, (), "feed-supabase")]
+        for target, args, name in targets:
+            thread = threading.Thread(target=target, args=args, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    # ----- reading -----
+    def version(self, table):
+        with self._lock:
+            return self._versions[table]
+
+    def rows(self, table, n=None):
+        """The newest n buffered rows, newest first."""
+        with self._lock:
+            rows = list(self._buffers[table])
+        rows.reverse()
+        return rows if n is None else rows[:n]
+
+    def subscribe(self, table, name, fn):
+        """Call fn(rows) on the feed thread for every push; re-subscribing a name replaces it."""
+        with self._lock:
+            self._listeners[table][name] = fn
+
+    def stats(self):
+        with self._lock:
+            return {t: dict(s, version=self._versions[t], buffered=len(self._buffers[t]))
+                    for t, s in self._stats.items()}
+
+    # ----- delivery -----
+    def _push(self, table, rows):
+        if self.replica is not None:
+            self.replica.ingest(table, rows)
+        with self._lock:
+            self._buffers[table].extend(rows)
+            self._versions[table] += 1
+            stats = self._stats[table]
+            stats["rows"] += len(rows)
+            stats["last_latency_s"] = _age_seconds(rows[-1].get("timestamp"))
+            listeners = list(self._listeners[table].values())
+        for fn in listeners:
+            try:
+                fn(rows)
+            except Exception:
+                pass
+
+    def _connection(self, table, connected, error=None):
+        with self._lock:
+            stats = self._stats[table]
+            if connected and not stats["connected"] and stats["last_error"] is not None:
+                stats["reconnects"] += 1
+            stats["connected"] = connected
+            if error is not None:
+                stats["last_error"] = error
+
+    def _follow_sse(self, table):
+        after = None
+        backoff = 1.0
+        while not self._stop.is_set():
+            query = "" if after is None else f"?after={after}"
+            request = urllib.request.Request(f"{self.url}/realtime/v1/{table}{query}",
+                                             headers={"apikey": self.key, "Accept": "text/event-stream"})
+            try:
+                with urllib.request.urlopen(request, timeout=READ_TIMEOUT_S) as stream:
+                    self._connection(table, True)
+                    backoff = 1.0
+                    for raw in stream:
+                        if self._stop.is_set():
+                            return
+                        line = raw.decode().rstrip("\r\n")
+                        if line.startswith("data: "):
+                            row = json.loads(line[len("data: "):])
+                            after = row["id"]
+                            self._push(table, [row])
+                    raise ConnectionError("changefeed closed")
+            except Exception as e:
+                self._connection(table, False, f"{type(e).__name__}: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, RECONNECT_MAX_S)
+
+    def _follow_supabase(self):
+        # Same reconnect loop as the SSE path: any failure marks every table disconnected and retries
+        backoff = 1.0
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                asyncio.run(self._subscribe_supabase())  # returns only once stopped
+            except Exception as e:
+                for table in self.tables:
+                    self._connection(table, False, f"{type(e).__name__}: {e}")
+            if time.monotonic() - started > RECONNECT_MAX_S:
+                backoff = 1.0  # the connection held for a while: this is a fresh failure
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, RECONNECT_MAX_S)
+
+    async def _subscribe_supabase(self):
+        from realtime import RealtimeSubscribeStates
+        from supabase import acreate_client
+
+        client = await acreate_client(self.url, self.key)
+        # Reconnects are ours (_follow_supabase), so failures show in stats() at once
+        client.realtime.max_retries = 1
+        failed = asyncio.Event()
+
+        def on_state(state, error, table):
+            if state == RealtimeSubscribeStates.SUBSCRIBED:
+                self._connection(table, True)
+            else:
+                self._connection(table, False, f"{state}: {error}" if error else str(state))
+                failed.set()
+
+        try:
+            await client.realtime.connect()
+            for table in self.tables:
+                def on_insert(payload, table=table):
+                    data = payload.get("data", payload)
+                    record = data.get("record") or data.get("new")
+                    if record:
+                        self._push(table, [record])
+                channel = client.channel(f"realtime-feed-{table}")
+                channel.on_postgres_changes("INSERT", on_insert, table=table)
+                await channel.subscribe(lambda state, error, table=table: on_state(state, error, table))
+            # The client reads the socket in its own task; a dropped socket or a
+            # channel leaving SUBSCRIBED ends this session and _follow_supabase reconnects
+            while not self._stop.is_set():
+                if failed.is_set() or not client.realtime.is_connected:
+                    raise ConnectionError("realtime channel closed")
+                await asyncio.sleep(WATCH_INTERVAL_S)
+        finally:
+            try:
+                await client.realtime.close()
+            except Exception:
+                pass
+
+
+# ======================
+# PROCESS-WIDE FEED
+# ======================
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_realtime_feed(url, key, replica=None):
+    global _feed
+    with _feed_lock:
+        if _feed is None:
+            _feed = RealtimeFeed(url, key, replica=replica)
+        return _feed.start()
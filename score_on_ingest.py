@@ -0,0 +1,132 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from model_registry import get_versioned_model
+
+# ======================
+# SCORE ON INGEST
+# ======================
+# lakefishcage rows carry their own prediction. predicted_quality holds the
+# class code (0 Excellent, 1 Good, 2 Poor, as in backfill_scores.py), the
+# p_* columns hold the class probabilities, and model_version names the
+# model that scored them. The ingestion gateway scores every flush in one
+# vectorized predict_proba call before the bulk insert. Dashboards read the
+# stored columns and only predict rows whose model_version is not the
+# current one.
+#
+# Rows written some other way, and rows scored by an older model, are
+# picked up by rescore(): never-scored rows first, then stale ones, paged
+# by id. Each page is written back in one bulk upsert on id that carries only
+# the score columns. --watch repeats this, so publishing a model to the
+# registry rescores the table within WATCH_INTERVAL_S.
+#
+# Supabase needs the columns once (python score_on_ingest.py --migration
+# prints the SQL); the local stand-in already has them.
+
+FEATURES = ("temperature", "turbidity", "ph")
+PROBA_COLUMNS = ("p_excellent", "p_good", "p_poor")  # by class code
+PROBA_DIGITS = 3
+PAGE_ROWS = 1000
+WATCH_INTERVAL_S = 30.0
+
+MIGRATION_SQL = """\
+alter table lakefishcage
+  add column if not exists predicted_quality smallint,
+  add column if not exists p_excellent real,
+  add column if not exists p_good real,
+  add column if not exists p_poor real,
+  add column if not exists model_version text;
+create index if not exists lakefishcage_model_version on lakefishcage (model_version);
+"""
+
+
+def score_rows(rows, versioned_model=None):
+    """Copies of lakefishcage rows with the score columns filled in, in one vectorized pass.
+
+    Rows with a missing reading are returned unscored.
+    """
+    version, model = versioned_model or get_versioned_model()
+    X = np.array([[r.get(c) for c in FEATURES] for r in rows], dtype=np.float64)
+    ok = ~np.isnan(X).any(axis=1)
+    out = [dict(r) for r in rows]
+    if not ok.any():
+        return out
+    raw = model.predict_proba(X[ok])
+    # The class comes from the raw probabilities, as model.predict does; rounding first can flip near-ties
+    codes = model.classes_.take(np.argmax(raw, axis=1))
+    proba = np.round(raw, PROBA_DIGITS)
+    columns = [PROBA_COLUMNS[int(c)] for c in model.classes_]
+    for row, code, p in zip((r for r, valid in zip(out, ok) if valid), codes.tolist(), proba.tolist()):
+        row["predicted_quality"] = int(code)
+        row.update(zip(columns, p))
+        row["model_version"] = version
+    return out
+
+
+def iter_stale(client, version, page_rows=PAGE_ROWS):
+    """Pages of lakefishcage rows not scored by version: never-scored rows, then older versions."""
+    for op, value in (("is_", "null"), ("neq", version)):
+        after = 0
+        while True:
+            query = getattr(client.table("lakefishcage").select("*"), op)("model_version", value)
+            page = query.gt("id", after).order("id").limit(page_rows).execute().data
+            if page:
+                yield page
+            if len(page) < page_rows:
+                break
+            after = page[-1]["id"]
+
+
+def write_scores(client, scored):
+    """Set only the score columns of the scored rows, in one request. The upsert carries id and the
+    score columns alone, and merge-duplicates updates only the columns supplied, so concurrent edits
+    to other columns (the online trainer's water_quality labels) are not overwritten."""
+    score_columns = ("id", "predicted_quality") + PROBA_COLUMNS + ("model_version",)
+    client.table("lakefishcage").upsert([{c: row.get(c) for c in score_columns} for row in scored],
+                                        on_conflict="id", returning="minimal").execute()
+    return len(scored)
+
+
+def rescore(client, versioned_model=None, page_rows=PAGE_ROWS):
+    """Bring every row up to the current model; returns the number of rows written."""
+    versioned_model = versioned_model or get_versioned_model()
+    rows = 0
+    start = time.perf_counter()
+    for page in iter_stale(client, versioned_model[0], page_rows):
+        scored = [r for r in score_rows(page, versioned_model) if r.get("model_version") is not None]
+        if scored:
+            write_scores(client, scored)
+        rows += len(scored)
+    if rows:
+        elapsed = time.perf_counter() - start
+        print(f"✅ Scored {rows:,} rows with model {versioned_model[0]} in {elapsed:.1f}s "
+              f"({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    return rows
+
+
+# ======================
+# COMMAND LINE
+# ======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score lakefishcage rows in place with the current model")
+    parser.add_argument("--migration", action="store_true", help="print the SQL that adds the score columns")
+    parser.add_argument("--watch", action="store_true", help="keep rescoring every --interval seconds")
+    parser.add_argument("--interval", type=float, default=WATCH_INTERVAL_S)
+    parser.add_argument("--page-rows", type=int, default=PAGE_ROWS)
+    args = parser.parse_args()
+    if args.migration:
+        print(MIGRATION_SQL, end="")
+        raise SystemExit
+
+    from dotenv import load_dotenv
+    from supabase import create_client
+
+    load_dotenv("links.env")
+    client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    rescore(client, page_rows=args.page_rows)
+    while args.watch:
+        time.sleep(args.interval)
+        rescore(client, page_rows=args.page_rows)
@@ -0,0 +1,186 @@
+import argparse
+import os
+import time
+from datetime import datetime, timezone
+
+# ======================
+# SECURITY STATE INTERVALS
+# ======================
+# checkPIR() posts the PIR status every 5 s whether or not it changed. The
+# ingestion gateway folds those heartbeats into run-length intervals
+# (cage_id, status, started_at, ended_at, samples) instead of storing each
+# one. A heartbeat with the same status extends the cage's open interval;
+# a change, or a gap longer than MAX_GAP_S (the device was offline), starts
+# a new one. Rows, inserts and timeline queries grow with state changes,
+# not with time. Each flush upserts only the intervals it touched, keyed on
+# (cage_id, started_at).
+#
+# Folding is idempotent: heartbeats at or before a cage's last folded one
+# are skipped, so a retried flush or a spool replay does not double-count.
+# The first time a folder sees a cage, it loads that cage's latest stored
+# interval, however old, so a replay after a long outage or a restart
+# extends or skips it instead of opening an overlapping one.
+# Posts without a cage_id (the single-cage firmware) go to DEFAULT_CAGE.
+# Supabase needs the table once (python security_intervals.py --migration);
+# --backfill folds the existing security_alerts rows.
+#
+# Devices that post straight to security_alerts bypass the gateway, and
+# some deployments have not applied the migration. The readers therefore
+# go through recent_intervals(). It checks each cage among the newest
+# PAGE_ROWS heartbeats: if the cage's newest heartbeat is more than
+# MAX_GAP_S past its newest stored interval (or the table is missing), that
+# cage's newest FALLBACK_ROWS heartbeats are folded at read time. Each such
+# cage costs one extra query per read.
+
+TABLE = "security_intervals"
+CONFLICT = "cage_id,started_at"
+MAX_GAP_S = 30.0  # six missed 5 s heartbeats
+DEFAULT_CAGE = 0
+PAGE_ROWS = 1000
+FALLBACK_ROWS = 1000  # raw heartbeats folded at read time per cage (~80 min)
+COLUMNS = ("cage_id", "status", "started_at", "ended_at", "samples")
+
+MIGRATION_SQL = """\
+create table if not exists security_intervals (
+  id bigint generated by default as identity primary key,
+  cage_id integer not null,
+  status smallint not null,
+  started_at timestamptz not null,
+  ended_at timestamptz not null,
+  samples integer not null,
+  unique (cage_id, started_at)
+);
+create index if not exists security_intervals_ended_at on security_intervals (ended_at);
+"""
+
+
+def _epoch(ts):
+    return datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp()
+
+
+def _cage(row):
+    cage = row.get("cage_id")
+    return DEFAULT_CAGE if cage is None else cage
+
+
+class IntervalFolder:
+    def __init__(self, max_gap=MAX_GAP_S, open_intervals=()):
+        self.max_gap = max_gap
+        # cage -> its latest interval, None once looked up and found to have none;
+        # no id, so every upsert row has the same columns
+        self._open = {i["cage_id"]: {c: i[c] for c in COLUMNS} for i in open_intervals}
+
+    def fold(self, rows):
+        """Fold heartbeat rows into the open intervals; returns the intervals that changed."""
+        state, changed = dict(self._open), {}
+        for row in sorted(rows, key=lambda r: _epoch(r["timestamp"])):
+            cage = _cage(row)
+            t = _epoch(row["timestamp"])
+            current = state.get(cage)
+            if current is not None and t <= _epoch(current["ended_at"]):
+                continue  # already folded (retry or replay)
+            if current is not None and current["status"] == row["status"] \
+                    and t - _epoch(current["ended_at"]) <= self.max_gap:
+                current = dict(current, ended_at=row["timestamp"], samples=current["samples"] + 1)
+            else:
+                current = {"cage_id": cage, "status": row["status"], "started_at": row["timestamp"],
+                           "ended_at": row["timestamp"], "samples": 1}
+            state[cage] = current
+            changed[(cage, current["started_at"])] = current
+        return list(changed.values()), state
+
+    def load(self, client, cages):
+        """Look up the latest stored interval of each cage not seen before, whatever its age."""
+        for cage in sorted(set(cages) - set(self._open)):
+            latest = (client.table(TABLE).select(",".join(COLUMNS)).eq("cage_id", cage)
+                      .order("ended_at", desc=True).limit(1).execute().data)
+            self._open[cage] = latest[0] if latest else None
+
+    def write(self, client, rows):
+        """IngestBatcher writer: upsert the changed intervals, then keep the new state."""
+        self.load(client, {_cage(r) for r in rows})
+        changed, state = self.fold(rows)
+        if changed:
+            client.table(TABLE).upsert(changed, on_conflict=CONFLICT, returning="minimal").execute()
+        self._open = state
+        return changed
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
+def recent_intervals(source, limit, max_gap=MAX_GAP_S, fallback_rows=FALLBACK_ROWS):
+    """The newest `limit` intervals, newest ended_at first: the table's, with the intervals of cages it
+    is behind on folded from their raw heartbeats."""
+    recent = source.table("security_alerts").select("*").order("timestamp", desc=True).limit(PAGE_ROWS).execute().data
+    newest = {}  # raw cage_id (None for the single-cage firmware) -> its newest heartbeat
+    for row in recent:
+        newest.setdefault(row.get("cage_id"), _epoch(row["timestamp"]))
+    try:
+        intervals = source.table(TABLE).select("*").order("ended_at", desc=True).limit(limit).execute().data
+        current = [] if not newest else (
+            source.table(TABLE).select("cage_id,ended_at").gte("ended_at", _iso(min(newest.values()) - max_gap))
+            .order("ended_at", desc=True).limit(PAGE_ROWS).execute().data)
+    except Exception:
+        intervals, current = [], []  # migration not applied: every cage is folded
+    ended = {}
+    for i in current:
+        ended.setdefault(i["cage_id"], _epoch(i["ended_at"]))
+
+    folded = {}
+    for cage, t in newest.items():
+        key = DEFAULT_CAGE if cage is None else cage
+        if key in ended and t - ended[key] <= max_gap:
+            continue  # the table is current for this cage
+        query = source.table("security_alerts").select("*")
+        query = query.is_("cage_id", "null") if cage is None else query.eq("cage_id", cage)
+        raw = query.order("timestamp", desc=True).limit(fallback_rows).execute().data
+        folded.setdefault(key, []).extend(IntervalFolder(max_gap).fold(raw)[0])
+    # Stored intervals of a folded cage that overlap what was folded are superseded by it
+    first = {cage: min(_epoch(i["started_at"]) for i in runs) for cage, runs in folded.items() if runs}
+    kept = [i for i in intervals if i["cage_id"] not in first or _epoch(i["ended_at"]) < first[i["cage_id"]]]
+    merged = kept + [i for runs in folded.values() for i in runs]
+    return sorted(merged, key=lambda i: _epoch(i["ended_at"]), reverse=True)[:limit]
+
+
+def backfill(client, page_rows=PAGE_ROWS, max_gap=MAX_GAP_S):
+    """Fold every security_alerts row into intervals; safe to rerun."""
+    folder = IntervalFolder(max_gap)
+    rows, intervals = 0, set()
+    after = 0
+    start = time.perf_counter()
+    while True:
+        page = (client.table("security_alerts").select("*").gt("id", after).order("id")
+                .limit(page_rows).execute().data)
+        if not page:
+            break
+        intervals.update((i["cage_id"], i["started_at"]) for i in folder.write(client, page))
+        rows += len(page)
+        after = page[-1]["id"]
+        if len(page) < page_rows:
+            break
+    elapsed = time.perf_counter() - start
+    print(f"✅ Folded {rows:,} security_alerts rows into {len(intervals):,} intervals in {elapsed:.1f}s")
+    return rows
+
+
+# ======================
+# COMMAND LINE
+# ======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run-length security state intervals")
+    parser.add_argument("--migration", action="store_true", help="print the SQL that creates the table")
+    parser.add_argument("--backfill", action="store_true", help="fold existing security_alerts rows")
+    parser.add_argument("--max-gap", type=float, default=MAX_GAP_S, help="seconds without a heartbeat that end an interval")
+    args = parser.parse_args()
+    if args.migration:
+        print(MIGRATION_SQL, end="")
+    elif args.backfill:
+        from dotenv import load_dotenv
+        from supabase import create_client
+
+        load_dotenv("links.env")
+        backfill(create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY")), max_gap=args.max_gap)
+    else:
+        parser.print_help()
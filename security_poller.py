@@ -0,0 +1,105 @@
+import threading
+import time
+
+from security_intervals import recent_intervals
+
+# ======================
+# SHARED SECURITY POLLER
+# ======================
+# One daemon thread per process fetches the newest security state intervals
+# (security_intervals.recent_intervals, which folds raw security_alerts
+# heartbeats when the intervals table is missing or behind) every POLL_INTERVAL_S and publishes them as an
+# immutable snapshot under a lock.
+# Sessions never start threads or touch each other's state: each one reads
+# the snapshot from an st.fragment that re-runs on the same schedule, so the
+# thread count stays at one however many operators are watching.
+
+POLL_INTERVAL_S = 5.0  # PIR_POST_INTERVAL in sensor_sends.ino
+HISTORY_ROWS = 20
+
+
+class SecurityPoller:
+    def __init__(self, source, interval=POLL_INTERVAL_S, history=HISTORY_ROWS):
+        self.source = source
+        self.interval = interval
+        self.history = history
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._snapshot = {"status": None, "since": None, "timestamp": None, "intervals": [], "polled_at": None,
+                          "polls": 0, "changes": 0, "error": None}
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="security-poller", daemon=True)
+        self._poll_safely()  # the first session renders a real snapshot, not "waiting"
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def poll_now(self):
+        """Wake the poller for an immediate fetch (e.g. from a refresh button)."""
+        self._wake.set()
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot
+
+    def _poll(self):
+        rows = recent_intervals(self.source, self.history)
+        with self._lock:
+            old = self._snapshot
+            newest = rows[0] if rows else None
+            # A heartbeat only moves ended_at; a new interval is a change of state
+            changed = (newest or {}).get("started_at") != old["since"] or \
+                      (newest or {}).get("status") != old["status"]
+            # A fresh dict each time, so readers can use their copy without the lock
+            self._snapshot = {
+                "status": newest["status"] if newest else None,
+                "since": newest["started_at"] if newest else None,
+                "timestamp": newest["ended_at"] if newest else None,  # the last heartbeat
+                "intervals": rows,
+                "polled_at": time.time(),
+                "polls": old["polls"] + 1,
+                "changes": old["changes"] + int(changed),
+                "error": None,
+            }
+
+    def _poll_safely(self):
+        try:
+            self._poll()
+        except Exception as e:
+            with self._lock:
+                self._snapshot = dict(self._snapshot, error=f"{type(e).__name__}: {e}")
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            self._poll_safely()
+
+
+# ======================
+# PROCESS-WIDE POLLER
+# ======================
+_poller = None
+_poller_lock = threading.Lock()
+
+
+def get_security_poller(source):
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = SecurityPoller(source)
+        return _poller.start()
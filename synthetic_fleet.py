@@ -0,0 +1,223 @@
+import argparse
+import os
+import time
+
+import numpy as np
+from scipy.signal import lfilter
+from scipy.special import erfinv, ndtr
+
+# ======================
+# SYNTHETIC FLEET DATA
+# ======================
+# Fleet-scale lakefishcage and security_alerts data for benchmarks, derived
+# from WQD_selected.csv:
+#   - every cage drifts between water quality classes hour by hour (a sticky
+#     Markov chain using the CSV's class shares)
+#   - each class episode draws its baseline Temp/Turbidity/pH from that
+#     class's quantiles in the CSV, with a Gaussian copula keeping their
+#     correlation
+#   - on top of the baseline: a diurnal temperature cycle, sensor noise,
+#     turbidity spikes that decay over minutes, and WiFi dropouts during
+#     which neither the sensor nor the PIR posts
+#   - readings are rounded as the firmware sends them (2, 1 and 2 decimals)
+#
+# A whole day of a block of cages is generated as one (cages, 17280) array
+# and written straight to Parquet:
+#
+#   <out>/lakefishcage/date=YYYY-MM-DD/part-NNNNN.parquet
+#       timestamp, cage_id, temperature, turbidity, ph, water_quality
+#   <out>/security_alerts/date=YYYY-MM-DD/part-NNNNN.parquet
+#       timestamp, cage_id, status
+
+CADENCE_S = 5  # SENSOR_POST_INTERVAL / PIR_POST_INTERVAL in sensor_sends.ino
+STEPS_PER_DAY = 86_400 // CADENCE_S
+STEPS_PER_HOUR = 3_600 // CADENCE_S
+CAGES_PER_BLOCK = 64
+QUANTILES = np.linspace(0, 1, 201)
+
+STAY_PROB = 0.97  # chance a cage keeps its class into the next hour
+DIURNAL_AMPLITUDE = 1.5  # °C, warmest mid-afternoon
+NOISE = (0.05, 0.4, 0.02)  # per-reading sensor noise, Temp/Turbidity/pH
+SPIKES_PER_DAY = 2.0
+SPIKE_MEAN = 25.0  # NTU
+SPIKE_DECAY_S = 600.0
+DROPOUTS_PER_DAY = 1.0
+DROPOUT_MEAN_S = 900.0
+PACKET_LOSS = 0.005
+INTRUSIONS_PER_DAY = 0.5
+INTRUSION_MEAN_S = 60.0
+
+
+def fit_profiles(csv_path="WQD_selected.csv"):
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    X = df[["Temp", "Turbidity", "pH"]].to_numpy()
+    y = df["Water Quality"].to_numpy()
+    classes = np.unique(y)
+    profiles = {"classes": classes, "priors": np.array([np.mean(y == c) for c in classes]),
+                "quantiles": [], "copula": []}
+    for c in classes:
+        Xc = X[y == c]
+        profiles["quantiles"].append(np.quantile(Xc, QUANTILES, axis=0))
+        # Correlation of normal scores; ranks map to the copula's marginals
+        ranks = (np.argsort(np.argsort(Xc, axis=0), axis=0) + 0.5) / len(Xc)
+        scores = np.sqrt(2) * erfinv(2 * ranks - 1)
+        profiles["copula"].append(np.linalg.cholesky(np.corrcoef(scores.T) + 1e-9 * np.eye(3)))
+    return profiles
+
+
+def _baselines(profiles, labels, rng):
+    """One Temp/Turbidity/pH baseline per entry of labels (class index)."""
+    out = np.empty(labels.shape + (3,))
+    for k in range(len(profiles["classes"])):
+        hit = labels == k
+        n = int(hit.sum())
+        if not n:
+            continue
+        u = ndtr(rng.standard_normal((n, 3)) @ profiles["copula"][k].T)
+        q = profiles["quantiles"][k]
+        out[hit] = np.column_stack([np.interp(u[:, f], QUANTILES, q[:, f]) for f in range(3)])
+    return out
+
+
+def _intervals(rng, cages, rate_per_day, mean_s):
+    """Boolean (cages, STEPS_PER_DAY) mask of random on-intervals."""
+    n = rng.poisson(rate_per_day, cages)
+    row = np.repeat(np.arange(cages), n)
+    start = rng.integers(0, STEPS_PER_DAY, len(row))
+    end = np.minimum(start + np.ceil(rng.exponential(mean_s / CADENCE_S, len(row))).astype(int) + 1,
+                     STEPS_PER_DAY)
+    edges = np.zeros((cages, STEPS_PER_DAY + 1), dtype=np.int32)
+    np.add.at(edges, (row, start), 1)
+    np.add.at(edges, (row, end), -1)
+    return np.cumsum(edges[:, :-1], axis=1) > 0
+
+
+class FleetSimulator:
+    def __init__(self, profiles, cages, seed=0):
+        self.profiles = profiles
+        self.cages = cages
+        self.rng = np.random.default_rng(seed)
+        n_classes = len(profiles["classes"])
+        self.state = self.rng.choice(n_classes, cages, p=profiles["priors"])
+        self.baseline = _baselines(profiles, self.state, self.rng)
+        self.phase = self.rng.normal(0, 1800, cages)  # seconds, per-cage offset of the daily peak
+        self.spike = np.zeros(cages)  # turbidity spike carried across midnight
+
+    def day(self, start_s):
+        """Readings and PIR statuses for all cages over one day from start_s (epoch seconds)."""
+        rng, cages, profiles = self.rng, self.cages, self.profiles
+
+        # Hourly class episodes: a cage that switches class draws a new baseline
+        labels = np.empty((cages, 24), dtype=np.int8)
+        base = np.empty((cages, 24, 3))
+        for hour in range(24):
+            switch = rng.random(cages) > STAY_PROB
+            if switch.any():
+                self.state[switch] = rng.choice(len(profiles["classes"]), int(switch.sum()), p=profiles["priors"])
+                self.baseline[switch] = _baselines(profiles, self.state[switch], rng)
+            labels[:, hour] = self.state
+            base[:, hour] = self.baseline
+        labels = np.repeat(labels, STEPS_PER_HOUR, axis=1)
+        values = np.repeat(base, STEPS_PER_HOUR, axis=1)
+        values += rng.standard_normal(values.shape) * NOISE
+
+        seconds = np.arange(STEPS_PER_DAY) * CADENCE_S
+        day_angle = 2 * np.pi * (seconds[None, :] - 15 * 3600 - self.phase[:, None]) / 86_400
+        values[:, :, 0] += DIURNAL_AMPLITUDE * np.cos(day_angle)
+
+        impulses = np.zeros((cages, STEPS_PER_DAY))
+        n = rng.poisson(SPIKES_PER_DAY, cages)
+        row = np.repeat(np.arange(cages), n)
+        np.add.at(impulses, (row, rng.integers(0, STEPS_PER_DAY, len(row))), rng.exponential(SPIKE_MEAN, len(row)))
+        decay = np.exp(-CADENCE_S / SPIKE_DECAY_S)
+        impulses[:, 0] += self.spike * decay
+        spikes = lfilter([1.0], [1.0, -decay], impulses, axis=1)
+        self.spike = spikes[:, -1]
+        values[:, :, 1] += spikes
+
+        # Clamped as sensor_sends.ino clamps them: turbidity 0-100 %, pH 0-14
+        values[:, :, 1] = np.clip(values[:, :, 1], 0, 100)
+        values[:, :, 2] = np.clip(values[:, :, 2], 0, 14)
+
+        online = ~_intervals(rng, cages, DROPOUTS_PER_DAY, DROPOUT_MEAN_S)
+        sensor_ok = online & (rng.random(online.shape) > PACKET_LOSS)
+        pir_ok = online & (rng.random(online.shape) > PACKET_LOSS)
+        intrusion = _intervals(rng, cages, INTRUSIONS_PER_DAY, INTRUSION_MEAN_S)
+
+        timestamps = (start_s + seconds) * 1000
+        cage_ids = np.broadcast_to(np.arange(cages, dtype=np.int32)[:, None], online.shape)
+        stamps = np.broadcast_to(timestamps[None, :], online.shape)
+        readings = {
+            "timestamp": stamps[sensor_ok],
+            "cage_id": cage_ids[sensor_ok],
+            "temperature": np.round(values[:, :, 0][sensor_ok], 2).astype(np.float32),
+            "turbidity": np.round(values[:, :, 1][sensor_ok], 1).astype(np.float32),
+            "ph": np.round(values[:, :, 2][sensor_ok], 2).astype(np.float32),
+            "water_quality": profiles["classes"][labels[sensor_ok]].astype(np.int8),
+        }
+        alerts = {
+            "timestamp": stamps[pir_ok],
+            "cage_id": cage_ids[pir_ok],
+            "status": intrusion[pir_ok].astype(np.int8),
+        }
+        return readings, alerts
+
+
+# ======================
+# PARQUET OUTPUT
+# ======================
+def _write_partition(columns, out_dir, table, date, part, first_cage):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrays = {name: pa.array(col) for name, col in columns.items()}
+    arrays["timestamp"] = pa.array(columns["timestamp"], type=pa.timestamp("ms", tz="UTC"))
+    arrays["cage_id"] = pa.array(columns["cage_id"] + first_cage)
+    path = os.path.join(out_dir, table, f"date={date}")
+    os.makedirs(path, exist_ok=True)
+    pq.write_table(pa.table(arrays), os.path.join(path, f"part-{part:05d}.parquet"))
+    return len(columns["timestamp"])
+
+
+def generate_fleet(out_dir, cages, days, start="2026-01-01", csv_path="WQD_selected.csv",
+                   block=CAGES_PER_BLOCK, seed=0, verbose=True):
+    profiles = fit_profiles(csv_path)
+    start_s = int(np.datetime64(start, "s").astype(np.int64))
+    blocks = [(first, FleetSimulator(profiles, min(block, cages - first), seed + first))
+              for first in range(0, cages, block)]
+    totals = {"lakefishcage": 0, "security_alerts": 0}
+    began = time.perf_counter()
+    for d in range(days):
+        day_s = start_s + d * 86_400
+        date = str(np.datetime64(day_s, "s").astype("datetime64[D]"))
+        for part, (first, sim) in enumerate(blocks):
+            readings, alerts = sim.day(day_s)
+            totals["lakefishcage"] += _write_partition(readings, out_dir, "lakefishcage", date, part, first)
+            totals["security_alerts"] += _write_partition(alerts, out_dir, "security_alerts", date, part, first)
+        if verbose:
+            elapsed = time.perf_counter() - began
+            rows = sum(totals.values())
+            print(f"… {date}: {rows:,} rows, {rows / elapsed:,.0f} rows/s")
+    totals["seconds"] = time.perf_counter() - began
+    return totals
+
+
+# ======================
+# COMMAND LINE
+# ======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate fleet-scale synthetic sensor data as Parquet partitions")
+    parser.add_argument("--cages", type=int, default=100)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--start", default="2026-01-01", help="first day, YYYY-MM-DD (UTC)")
+    parser.add_argument("--out", default="fleet")
+    parser.add_argument("--data", default="WQD_selected.csv")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    totals = generate_fleet(args.out, args.cages, args.days, args.start, args.data, seed=args.seed)
+    rows = totals["lakefishcage"] + totals["security_alerts"]
+    print(f"✅ {totals['lakefishcage']:,} readings and {totals['security_alerts']:,} alerts in "
+          f"{totals['seconds']:.1f}s ({rows / totals['seconds']:,.0f} rows/s) under {args.out}/")
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from binary_batch import HEADER, MAX_DEVICE_ID, BatchError, SequenceFilter, decode_batch, encode_batch, to_rows
+from ingest_gateway import IngestBatcher
+
+
+def batch(device_id=7, boot_id=42, seq=(0, 1, 2), epoch_s=(1_700_000_000, 1_700_000_005, 1_700_000_010)):
+    n = len(seq)
+    return encode_batch(device_id, boot_id, list(seq), list(epoch_s), [25.25, np.nan, -1.5][:n],
+                        [12.3, 0.0, 100.0][:n], [7.12, 6.5, np.nan][:n])
+
+
+def test_round_trip_keeps_firmware_precision_and_missing_values():
+    device_id, boot_id, columns = decode_batch(batch())
+    assert (device_id, boot_id) == (7, 42)
+    assert columns["seq"].tolist() == [0, 1, 2]
+    np.testing.assert_array_equal(columns["temperature"], [25.25, np.nan, -1.5])
+    np.testing.assert_array_equal(columns["turbidity"], [12.3, 0.0, 100.0])
+    np.testing.assert_array_equal(columns["ph"], [7.12, 6.5, np.nan])
+    rows = to_rows(device_id, columns)
+    assert rows[0] == {"cage_id": 7, "timestamp": "2023-11-14T22:13:20.000000+00:00",
+                       "temperature": 25.25, "turbidity": 12.3, "ph": 7.12}
+    assert rows[1]["temperature"] is None and rows[2]["ph"] is None
+
+
+@pytest.mark.parametrize("payload, message", [
+    (b"AQ", "shorter"),
+    (b"XX" + batch()[2:], "magic"),
+    (batch()[:-1], "length"),
+    (batch() + b"\0", "length"),
+])
+def test_malformed_payloads_are_rejected(payload, message):
+    with pytest.raises(BatchError, match=message):
+        decode_batch(payload)
+
+
+def test_corrupt_payload_fails_the_crc():
+    payload = bytearray(batch())
+    payload[HEADER.size] ^= 0xFF
+    with pytest.raises(BatchError, match="crc"):
+        decode_batch(bytes(payload))
+
+
+def test_device_id_must_fit_cage_id():
+    decode_batch(batch(device_id=MAX_DEVICE_ID))
+    with pytest.raises(BatchError, match="device_id"):
+        decode_batch(batch(device_id=MAX_DEVICE_ID + 1))
+
+
+def test_admit_drops_records_already_seen_from_the_same_boot():
+    sequences, accepted = SequenceFilter(), []
+    mask, last = sequences.admit(7, 42, np.array([0, 1, 2]), accepted.append)
+    assert mask.tolist() == [True, True, True] and last == 2
+    # A retry overlapping the first batch, with a duplicate inside the batch itself
+    mask, last = sequences.admit(7, 42, np.array([1, 2, 3, 3, 4]), accepted.append)
+    assert mask.tolist() == [False, False, True, False, True] and last == 4
+    # A new boot starts its own sequence
+    mask, _ = sequences.admit(7, 43, np.array([0]), accepted.append)
+    assert mask.tolist() == [True]
+    assert len(accepted) == 3 and sequences.last_seq(7, 42) == 4
+
+
+def test_failed_accept_does_not_advance_the_sequence():
+    sequences = SequenceFilter()
+
+    def refuse(mask):
+        raise RuntimeError("buffer full")
+
+    with pytest.raises(RuntimeError):
+        sequences.admit(7, 42, np.array([0, 1]), refuse)
+    assert sequences.last_seq(7, 42) is None
+    mask, _ = sequences.admit(7, 42, np.array([0, 1]), lambda mask: None)
+    assert mask.all()
+
+
+def test_readings_without_a_clock_are_stamped_on_receipt():
+    device_id, _, columns = decode_batch(batch(epoch_s=(0, 1_700_000_005, 0)))
+    rows = to_rows(device_id, columns)
+    assert "timestamp" not in rows[0] and "timestamp" not in rows[2]
+    queued = IngestBatcher(client=None).add("lakefishcage", rows)
+    assert all(r["timestamp"] for r in queued)
+    assert queued[1]["timestamp"] == "2023-11-14T22:13:25.000000+00:00"
+    assert queued[0]["timestamp"] > queued[1]["timestamp"]
@@ -0,0 +1,47 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from forest_engine import compile_forest
+
+MODEL_PATH = "water_quality_model.pkl"
+
+
+@pytest.fixture(scope="module")
+def models():
+    clf = joblib.load(MODEL_PATH)
+    return clf, compile_forest(clf)
+
+
+@pytest.fixture(scope="module")
+def readings():
+    rng = np.random.default_rng(0)
+    data = pd.read_csv("WQD_selected.csv").iloc[:, :3].to_numpy(dtype=np.float64)
+    # Firmware-resolution readings across the sensor ranges, plus the training rows themselves
+    grid = np.column_stack([np.round(rng.uniform(0, 40, 20_000), 2), np.round(rng.uniform(0, 100, 20_000), 1),
+                            np.round(rng.uniform(0, 14, 20_000), 2)])
+    return np.vstack([data, grid])
+
+
+def test_predict_proba_matches_sklearn(models, readings):
+    clf, forest = models
+    np.testing.assert_allclose(forest.predict_proba(readings), clf.predict_proba(readings), rtol=0, atol=1e-12)
+
+
+def test_predict_matches_sklearn(models, readings):
+    clf, forest = models
+    np.testing.assert_array_equal(forest.predict(readings), clf.predict(readings))
+    np.testing.assert_array_equal(forest.classes_, clf.classes_)
+
+
+def test_early_exit_matches_full_vote(models, readings):
+    _, forest = models
+    labels, used = forest.predict_early_exit(readings)
+    np.testing.assert_array_equal(labels, forest.predict(readings))
+    assert used.max() <= forest.n_estimators
+
+
+def test_single_row(models, readings):
+    clf, forest = models
+    assert forest.predict(readings[0]).tolist() == clf.predict(readings[:1]).tolist()
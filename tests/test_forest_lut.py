@@ -0,0 +1,58 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from forest_engine import load_compiled_forest
+from forest_lut import FEATURES, LookupPredictor, build_lookup_table, load_lookup_predictor
+
+# A slice of the firmware grid, so the table builds in a moment
+GRID = {
+    "temperature": (24.0, 28.0, 100),
+    "turbidity": (0.0, 50.0, 10),
+    "ph": (6.5, 8.5, 100),
+}
+
+
+@pytest.fixture(scope="module")
+def forest():
+    return load_compiled_forest("water_quality_model.pkl")
+
+
+@pytest.fixture(scope="module")
+def table(forest, tmp_path_factory):
+    path = tmp_path_factory.mktemp("lut")
+    build_lookup_table(forest, str(path), grid=GRID, verbose=False)
+    return str(path)
+
+
+def grid_readings(n, seed=0):
+    rng = np.random.default_rng(seed)
+    cols = []
+    for name in FEATURES:
+        low, high, steps = GRID[name]
+        cols.append(rng.integers(round(low * steps), round(high * steps) + 1, n) / steps)
+    return np.column_stack(cols)
+
+
+def test_table_matches_forest_on_grid(forest, table):
+    X = grid_readings(50_000)
+    np.testing.assert_array_equal(LookupPredictor(forest, table).predict(X), forest.predict(X))
+
+
+def test_off_grid_rows_fall_back_to_forest(forest, table):
+    X = grid_readings(1000, seed=1)
+    X = np.vstack([X + 0.001, [[45.0, 10.0, 7.0]]])  # between grid steps, and outside the table
+    np.testing.assert_array_equal(LookupPredictor(forest, table).predict(X), forest.predict(X))
+
+
+def test_table_for_another_model_is_ignored(forest, table):
+    class Other:
+        def fingerprint(self):
+            return "not this model"
+
+    other = Other()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        assert load_lookup_predictor(other, table) is other
+    assert isinstance(load_lookup_predictor(forest, table), LookupPredictor)
@@ -0,0 +1,114 @@
+import json
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+from supabase import create_client
+
+from ingest_gateway import IngestBatcher, serve_in_thread
+from local_supabase import LOCAL_KEY, LocalStore
+from local_supabase import serve_in_thread as serve_store
+from security_intervals import IntervalFolder
+
+FLUSH_INTERVAL_S = 0.2
+
+
+@pytest.fixture
+def gateway(tmp_path):
+    store = LocalStore()
+    store_server, url = serve_store(store)
+    batcher = IngestBatcher(create_client(url, LOCAL_KEY), flush_interval=FLUSH_INTERVAL_S,
+                            dead_letter=str(tmp_path / "dead.jsonl")).start()
+    server, gateway_url = serve_in_thread(batcher)
+    yield store, batcher, gateway_url
+    server.shutdown()
+    batcher.stop()
+    store_server.shutdown()
+
+
+def post(url, table, body):
+    request = urllib.request.Request(f"{url}/rest/v1/{table}", data=json.dumps(body).encode(), method="POST",
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def test_single_row_flushes_within_interval(gateway):
+    store, batcher, url = gateway
+    assert post(url, "lakefishcage", {"temperature": 26.5, "ph": 7.1, "turbidity": 12.0}) == 201
+    assert wait_for(lambda: store.count("lakefishcage") == 1, FLUSH_INTERVAL_S + 0.5)
+    assert batcher.stats()["lakefishcage"]["upstream_requests"] == 1
+
+
+def test_unknown_column_is_rejected_before_ack(gateway):
+    store, batcher, url = gateway
+    assert post(url, "lakefishcage", [{"temperature": 26.5, "humidity": 80}]) == 400
+    assert post(url, "lakefishcage", {"temperature": "warm"}) == 400
+    assert post(url, "lakefishcage", {"temperature": 26.5, "ph": 7.1, "turbidity": 12.0}) == 201
+    assert wait_for(lambda: store.count("lakefishcage") == 1, FLUSH_INTERVAL_S + 0.5)
+    assert batcher.stats()["lakefishcage"]["received"] == 1
+
+
+def test_rejected_batch_is_dead_lettered_not_retried(gateway, tmp_path):
+    store, batcher, url = gateway
+    # Passes the gateway's checks, but the stand-in refuses a row without a timestamp column value
+    with batcher._lock:
+        batcher._queues["lakefishcage"].append((0.0, None, {"timestamp": None, "temperature": 1.0}))
+        batcher._ready.notify_all()
+    assert wait_for(lambda: batcher.stats()["lakefishcage"]["dead_lettered"] == 1, FLUSH_INTERVAL_S + 0.5)
+    assert post(url, "lakefishcage", {"temperature": 26.5, "ph": 7.1, "turbidity": 12.0}) == 201
+    assert wait_for(lambda: store.count("lakefishcage") == 1, FLUSH_INTERVAL_S + 0.5)
+    lines = (tmp_path / "dead.jsonl").read_text().splitlines()
+    assert [json.loads(line)["row"]["temperature"] for line in lines] == [1.0]
+
+
+def test_bad_timestamp_and_out_of_range_int_are_rejected_before_ack(gateway):
+    store, batcher, url = gateway
+    assert post(url, "security_alerts", {"status": 1, "timestamp": "not a time"}) == 400
+    assert post(url, "lakefishcage", {"temperature": 26.5, "cage_id": 2 ** 31}) == 400
+    assert post(url, "lakefishcage", {"temperature": 26.5, "timestamp": "2025-01-01T00:00:00Z"}) == 201
+    assert batcher.stats()["security_alerts"]["received"] == 0
+    assert batcher.stats()["lakefishcage"]["received"] == 1
+
+
+def test_only_refused_rows_of_a_batch_are_dead_lettered(gateway, tmp_path):
+    store, batcher, url = gateway
+    rows = [{"timestamp": f"2025-01-01T00:00:{i:02d}+00:00", "cage_id": i, "temperature": 25.0} for i in range(8)]
+    rows[5]["timestamp"] = None  # refused upstream: timestamp is NOT NULL
+    with batcher._lock:
+        batcher._queues["lakefishcage"].extend((0.0, None, r) for r in rows)
+        batcher._ready.notify_all()
+    assert wait_for(lambda: store.count("lakefishcage") == 7, FLUSH_INTERVAL_S + 0.5)
+    assert batcher.stats()["lakefishcage"]["dead_lettered"] == 1
+    lines = (tmp_path / "dead.jsonl").read_text().splitlines()
+    assert [json.loads(line)["row"]["cage_id"] for line in lines] == [5]
+
+
+def test_writer_value_error_is_isolated_not_retried(tmp_path):
+    store = LocalStore()
+    store_server, url = serve_store(store)
+    batcher = IngestBatcher(create_client(url, LOCAL_KEY), writers={"security_alerts": IntervalFolder().write},
+                            dead_letter=str(tmp_path / "dead.jsonl"))
+    rows = [{"timestamp": f"2025-01-01T00:00:{5 * i:02d}+00:00", "status": 1} for i in range(4)]
+    rows[2]["timestamp"] = "not a time"  # fold() raises ValueError
+    batcher._queues["security_alerts"].extend((0.0, None, r) for r in rows)
+    try:
+        assert batcher._flush("security_alerts")
+    finally:
+        store_server.shutdown()
+    assert batcher.stats()["security_alerts"]["dead_lettered"] == 1
+    assert batcher.stats()["security_alerts"]["buffered"] == 0
+    assert [i["samples"] for i in store.select("security_intervals", [])] == [3]
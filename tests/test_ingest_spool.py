@@ -0,0 +1,104 @@
+import os
+import time
+
+import pytest
+from supabase import create_client
+
+from ingest_gateway import IngestBatcher
+from ingest_spool import WriteAheadSpool
+from local_supabase import LOCAL_KEY, LocalStore, serve_in_thread
+
+
+def reading(i):
+    return {"timestamp": f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}+00:00", "cage_id": i % 3, "temperature": 25.0}
+
+
+def segments(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".wal"))
+
+
+def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def test_torn_tail_is_cut_off_on_open(tmp_path):
+    spool = WriteAheadSpool(str(tmp_path))
+    spool.write("lakefishcage", [reading(i) for i in range(3)])
+    spool.close()
+    path = tmp_path / segments(tmp_path)[-1]
+    intact = path.stat().st_size
+    with open(path, "ab") as f:
+        f.write(b'0badc0de [4,"lakefishcage",{"temp')  # a crash mid-write
+    spool = WriteAheadSpool(str(tmp_path))
+    assert path.stat().st_size == intact
+    assert [seq for seq, _, _ in spool.read(0, 10)] == [1, 2, 3]
+    assert spool.write("lakefishcage", [reading(3)]) == [4]
+    spool.close()
+
+
+def test_replay_after_restart_is_in_order_and_skips_acked(tmp_path):
+    spool = WriteAheadSpool(str(tmp_path))
+    for i in range(6):
+        spool.write("lakefishcage" if i % 2 else "security_alerts", [reading(i)])
+    spool.ack("security_alerts", 3)
+    spool.close()
+    spool = WriteAheadSpool(str(tmp_path))
+    assert spool.replay_from() == 0  # lakefishcage has nothing acknowledged yet
+    records = spool.read(spool.replay_from(), 10)
+    assert [(seq, table) for seq, table, _ in records] == [
+        (2, "lakefishcage"), (4, "lakefishcage"), (5, "security_alerts"), (6, "lakefishcage")]
+    assert records[0][2] == reading(1)
+    spool.close()
+
+
+def test_segments_are_deleted_below_the_low_water_mark_of_every_table(tmp_path):
+    spool = WriteAheadSpool(str(tmp_path), segment_bytes=1)  # one record per segment
+    for i in range(4):
+        spool.write("lakefishcage", [reading(i)])
+        spool.write("security_alerts", [reading(i)])
+    assert len(segments(tmp_path)) == 8
+    spool.ack("lakefishcage", 7)
+    assert len(segments(tmp_path)) == 8  # security_alerts still holds the oldest segment
+    spool.ack("security_alerts", 4)
+    # Records 1-4 are acknowledged by both tables; the open segment is never deleted
+    assert [int(name[:-4]) for name in segments(tmp_path)] == [5, 6, 7, 8]
+    spool.ack("security_alerts", 8)
+    spool.ack("lakefishcage", 7)
+    assert [int(name[:-4]) for name in segments(tmp_path)] == [8]
+    spool.close()
+    spool = WriteAheadSpool(str(tmp_path))
+    assert spool.read(0, 10) == []
+    spool.close()
+
+
+def test_gateway_spills_to_disk_and_refills_in_order(tmp_path):
+    store = LocalStore()
+    server, url = serve_in_thread(store)
+    spool = WriteAheadSpool(str(tmp_path / "spool"))
+    batcher = IngestBatcher(create_client(url, LOCAL_KEY), flush_rows=10, flush_interval=0.05, max_buffer=20,
+                            spool=spool, dead_letter=str(tmp_path / "dead.jsonl"))
+    try:
+        for i in range(100):  # more than max_buffer: most of it waits on disk only
+            batcher.add("lakefishcage", [reading(i)])
+        assert batcher.stats()["lakefishcage"]["spilled"]
+        assert batcher.stats()["lakefishcage"]["buffered"] <= 20
+        batcher.start()
+        assert wait_for(lambda: store.count("lakefishcage") == 100, 10)
+        assert wait_for(lambda: not batcher.stats()["lakefishcage"]["spilled"], 5)
+        # Caught up: new posts go straight to memory again
+        batcher.add("lakefishcage", [reading(100)])
+        assert wait_for(lambda: store.count("lakefishcage") == 101, 5)
+    finally:
+        batcher.stop()
+        spool.close()
+        server.shutdown()
+    stored = [r["timestamp"] for r in store.select("lakefishcage", [("order", "id")])]
+    assert stored == [reading(i)["timestamp"] for i in range(101)]
+    spool = WriteAheadSpool(str(tmp_path / "spool"))
+    assert spool.read(0, 10) == []
+    spool.close()
@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from supabase import create_client
+
+import local_replica
+from local_replica import LocalReplica
+from local_supabase import LOCAL_KEY, LocalStore, now_iso, serve_in_thread
+
+
+@pytest.fixture
+def replica(tmp_path):
+    store = LocalStore()
+    server, url = serve_in_thread(store)
+    yield store, LocalReplica(create_client(url, LOCAL_KEY), str(tmp_path / "replica.db"), sync_interval=0)
+    server.shutdown()
+
+
+def readings(n, at):
+    return [{"timestamp": now_iso(at), "cage_id": i, "temperature": 25.0} for i in range(n)]
+
+
+def test_sync_fetches_only_rows_above_the_cursor(replica):
+    store, replica = replica
+    now = datetime.now(timezone.utc)
+    store.insert("lakefishcage", readings(20, now))
+    replica.sync("lakefishcage")
+    store.insert("lakefishcage", readings(3, now + timedelta(seconds=5)))
+    fetched = replica.stats()["lakefishcage"]["rows_fetched"]
+    assert replica.sync("lakefishcage") == 3
+    assert replica.stats()["lakefishcage"]["rows_fetched"] - fetched == 3
+
+
+def test_late_rows_and_tied_timestamps_are_all_replicated(replica, monkeypatch):
+    store, replica = replica
+    monkeypatch.setattr(local_replica, "PAGE_ROWS", 7)
+    now = datetime.now(timezone.utc)
+    store.insert("lakefishcage", readings(5, now))
+    replica.sync("lakefishcage")
+    # 30 cages at one tick (more than a page) and a spool replay an hour behind the newest row
+    store.insert("lakefishcage", readings(30, now + timedelta(seconds=5)))
+    store.insert("lakefishcage", readings(2, now - timedelta(hours=1)))
+    assert replica.sync("lakefishcage") == 32
+    assert replica.stats()["lakefishcage"]["rows"] == store.count("lakefishcage") == 37
@@ -0,0 +1,24 @@
+from supabase import create_client
+
+from local_supabase import LOCAL_KEY, LocalStore, now_iso, serve_in_thread
+from online_model import iter_supabase_labelled
+
+
+def test_labelled_rows_are_followed_in_label_order():
+    store = LocalStore()
+    server, url = serve_in_thread(store)
+    client = create_client(url, LOCAL_KEY)
+    try:
+        stamp = now_iso()  # many cages on one tick
+        store.insert("lakefishcage", [{"timestamp": stamp, "cage_id": i, "temperature": 25.0, "turbidity": 10.0,
+                                       "ph": 7.0} for i in range(6)])
+        stream = iter_supabase_labelled(client, batch=2, poll_seconds=0)
+        client.table("lakefishcage").update({"water_quality": 0}, returning="minimal").gt("id", 2).execute()
+        seen = [next(stream)[2].tolist(), next(stream)[2].tolist()]
+        # Rows labelled after newer rows were consumed, and a relabel, still come through
+        client.table("lakefishcage").update({"water_quality": 1}, returning="minimal").lte("id", 3).execute()
+        seen += [next(stream)[2].tolist(), next(stream)[2].tolist()]
+        assert seen == [[0, 0], [0, 0], [1, 1], [1]]
+        assert store.count("lakefishcage") == 6
+    finally:
+        server.shutdown()
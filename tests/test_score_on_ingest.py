@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from supabase import create_client
+
+from local_supabase import LOCAL_KEY, LocalStore, serve_in_thread
+from model_registry import get_versioned_model
+from score_on_ingest import FEATURES, iter_stale, rescore, score_rows, write_scores
+
+
+@pytest.fixture(scope="module")
+def versioned_model():
+    return get_versioned_model()
+
+
+@pytest.fixture
+def client():
+    store = LocalStore()
+    server, url = serve_in_thread(store)
+    yield store, create_client(url, LOCAL_KEY)
+    server.shutdown()
+
+
+def firmware_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([np.round(rng.uniform(15, 35, n), 2), np.round(rng.uniform(0, 100, n), 1),
+                         np.round(rng.uniform(4, 10, n), 2)])
+    return X, [dict(zip(FEATURES, x)) for x in X.tolist()]
+
+
+def test_stored_code_matches_predict(versioned_model):
+    _, model = versioned_model
+    X, rows = firmware_rows(20_000)
+    # A near-tie: rounding the probabilities to PROBA_DIGITS used to flip its class
+    X = np.vstack([X, [[31.11, 22.9, 5.77]]])
+    rows.append(dict(zip(FEATURES, [31.11, 22.9, 5.77])))
+    stored = [r["predicted_quality"] for r in score_rows(rows, versioned_model)]
+    assert stored == model.predict(X).tolist()
+
+
+def test_missing_reading_is_left_unscored(versioned_model):
+    scored = score_rows([{"temperature": 25.0, "turbidity": None, "ph": 7.0}], versioned_model)
+    assert "predicted_quality" not in scored[0]
+
+
+def test_rescore_writes_only_score_columns(client, versioned_model):
+    store, client = client
+    _, rows = firmware_rows(50, seed=1)
+    client.table("lakefishcage").insert(rows, returning="minimal").execute()
+    page = next(iter_stale(client, versioned_model[0]))
+    # A label written after rescore read the page must survive the write-back
+    client.table("lakefishcage").update({"water_quality": 1}, returning="minimal").gt("id", 0).execute()
+    before = {r["id"]: r["timestamp"] for r in page}
+    writes = []
+    insert = store.insert
+    store.insert = lambda *args, **kwargs: writes.append(args[0]) or insert(*args, **kwargs)
+    write_scores(client, score_rows(page, versioned_model))
+    assert writes == ["lakefishcage"]  # the whole page in one request
+    stored = client.table("lakefishcage").select("*").execute().data
+    assert all(r["water_quality"] == 1 and r["model_version"] == versioned_model[0] for r in stored)
+    assert {r["id"]: r["timestamp"] for r in stored} == before
+    assert rescore(client, versioned_model) == 0
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from supabase import create_client
+
+from local_replica import LocalReplica
+from local_supabase import LOCAL_KEY, LocalStore, now_iso, serve_in_thread
+from security_intervals import DEFAULT_CAGE, IntervalFolder, recent_intervals
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def beat(seconds, status, cage=None):
+    row = {"timestamp": now_iso(START + timedelta(seconds=seconds)), "status": status}
+    return row if cage is None else dict(row, cage_id=cage)
+
+
+def runs(intervals):
+    return sorted((i["cage_id"], i["status"], i["samples"]) for i in intervals)
+
+
+@pytest.fixture
+def client():
+    store = LocalStore()
+    server, url = serve_in_thread(store)
+    yield store, create_client(url, LOCAL_KEY)
+    server.shutdown()
+
+
+def test_fold_extends_runs_and_splits_on_change_or_gap():
+    folder = IntervalFolder(max_gap=30)
+    rows = [beat(0, 0), beat(5, 0), beat(10, 1), beat(15, 1), beat(20, 0), beat(60, 0)]  # 40 s offline
+    changed, state = folder.fold(rows[::-1])  # arrival order does not matter
+    assert [(i["status"], i["samples"]) for i in sorted(changed, key=lambda i: i["started_at"])] == \
+        [(0, 2), (1, 2), (0, 1), (0, 1)]
+    assert all(i["cage_id"] == DEFAULT_CAGE for i in changed)
+    assert state[DEFAULT_CAGE]["ended_at"] == rows[-1]["timestamp"]
+
+
+def test_fold_keeps_cages_apart_and_skips_replayed_heartbeats():
+    folder = IntervalFolder(max_gap=30)
+    changed, folder._open = folder.fold([beat(0, 0, cage=1), beat(0, 1, cage=2), beat(5, 0, cage=1)])
+    assert runs(changed) == [(1, 0, 2), (2, 1, 1)]
+    # A retried flush: the same heartbeats again, plus one new one
+    changed, _ = folder.fold([beat(0, 0, cage=1), beat(5, 0, cage=1), beat(10, 0, cage=1)])
+    assert runs(changed) == [(1, 0, 3)]
+
+
+def test_replay_after_a_long_outage_does_not_open_an_overlapping_interval(client):
+    store, client = client
+    IntervalFolder().write(client, [beat(5 * i, 0, cage=3) for i in range(10)])
+    # A restarted gateway replays the same heartbeats an hour later
+    IntervalFolder().write(client, [beat(5 * i, 0, cage=3) for i in range(12)])
+    assert runs(store.select("security_intervals", [])) == [(3, 0, 12)]
+
+
+def test_fallback_folds_only_the_cages_the_table_is_behind_on(client, tmp_path):
+    store, client = client
+    now = datetime.now(timezone.utc)
+    stamp = lambda seconds: now_iso(now - timedelta(seconds=seconds))
+    # Cage 1 posts through the gateway (intervals and no raw rows); cage 2 posts straight to security_alerts
+    IntervalFolder().write(client, [{"cage_id": 1, "timestamp": stamp(s), "status": 0} for s in (20, 15, 10)])
+    store.insert("security_alerts", [{"cage_id": 1, "timestamp": stamp(10), "status": 0}])
+    store.insert("security_alerts", [{"cage_id": 2, "timestamp": stamp(s), "status": int(s < 10)}
+                                     for s in range(3000, 0, -5)])
+    for source in (client, LocalReplica(client, str(tmp_path / "replica.db"), sync_interval=0)):
+        intervals = recent_intervals(source, 10)
+        assert runs(intervals) == [(1, 0, 3), (2, 0, 599), (2, 1, 1)]
+        assert [i["cage_id"] for i in intervals[:2]] == [2, 1]
+
+
+def test_fallback_without_the_table_folds_every_cage(client, monkeypatch):
+    store, client = client
+    now = datetime.now(timezone.utc)
+    store.insert("security_alerts", [{"timestamp": now_iso(now - timedelta(seconds=s)), "status": 0}
+                                     for s in (10, 5)])
+    store.db.execute("DROP TABLE security_intervals")
+    assert runs(recent_intervals(client, 5)) == [(DEFAULT_CAGE, 0, 2)]
@@ -0,0 +1,172 @@
+import argparse
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from forest_engine import compile_forest, merge_forests
+from training_data import FEATURE_COLUMNS, load_training_data
+
+# ======================
+# OUT-OF-CORE TRAINING
+# ======================
+# The labelled history is read from the memory-mapped training cache one chunk
+# at a time; nothing ever holds more than one chunk, the hold-out sample and
+# the kept trees.
+#
+# Hold-out: each row is first held out with probability HOLDOUT_RATE, so
+# held-out rows never reach a tree. Held-out rows then go through one
+# reservoir per class, and at the end every class is cut to its observed
+# share of HOLDOUT_SIZE: a bounded, stratified sample of the whole stream.
+#
+# Chunks: exports are often sorted (by time, or by class as WQD_selected.csv
+# is), so a chunk is assembled from BLOCK_ROWS-sized blocks of the memory
+# map in a random permutation. Reads stay sequential within a block and
+# every chunk sees a mix of the whole history.
+#
+# Forest: every chunk fits TREES_PER_CHUNK trees on its training rows. The
+# trees stream through a reservoir of MAX_TREES, so the merged forest is a
+# uniform sample of trees from all chunks and its size does not grow with
+# the data.
+
+CHUNK_ROWS = 500_000
+BLOCK_ROWS = 4096
+TREES_PER_CHUNK = 10
+MAX_TREES = 100
+HOLDOUT_RATE = 0.02
+HOLDOUT_SIZE = 20_000
+TREE_PARAMS = {"max_depth": 10, "min_samples_leaf": 2}
+
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as fh:
+            return next(int(line.split()[1]) for line in fh if line.startswith("VmHWM")) / 1024
+    except (OSError, StopIteration):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class ClassReservoirs:
+    def __init__(self, classes, capacity, rng):
+        self.capacity = capacity
+        self.rng = rng
+        self.seen = {c: 0 for c in classes}
+        self.rows = {c: np.empty((capacity, len(FEATURE_COLUMNS)), dtype=np.float32) for c in classes}
+
+    def add(self, X, y):
+        for c in self.seen:
+            Xc = X[y == c]
+            if not len(Xc):
+                continue
+            # Algorithm R, vectorised: item i takes slot i while filling,
+            # then slot j ~ U[0, i] if j < capacity
+            i = self.seen[c] + np.arange(len(Xc))
+            slot = np.where(i < self.capacity, i, self.rng.integers(0, i + 1))
+            keep = slot < self.capacity
+            slot, src = slot[keep], np.flatnonzero(keep)
+            # Later items overwrite earlier ones in the same slot, as in the sequential algorithm
+            last = len(slot) - 1 - np.unique(slot[::-1], return_index=True)[1]
+            self.rows[c][slot[last]] = Xc[src[last]]
+            self.seen[c] += len(Xc)
+
+    def sample(self, size):
+        total = sum(self.seen.values())
+        X, y = [], []
+        for c, n in self.seen.items():
+            take = min(n, self.capacity, round(size * n / total)) if total else 0
+            X.append(self.rows[c][:take])
+            y.append(np.full(take, c))
+        return np.concatenate(X), np.concatenate(y)
+
+
+def train_chunked(X, y, classes, chunk_rows=CHUNK_ROWS, trees_per_chunk=TREES_PER_CHUNK,
+                  max_trees=MAX_TREES, holdout_rate=HOLDOUT_RATE, holdout_size=HOLDOUT_SIZE,
+                  seed=42, verbose=True):
+    rng = np.random.default_rng(seed)
+    holdout = ClassReservoirs(classes, holdout_size, rng)
+    kept = []
+    trees_seen = 0
+    rows = 0
+    start = time.perf_counter()
+
+    block_rows = max(min(BLOCK_ROWS, chunk_rows // 64), 1)  # at least ~64 blocks per chunk
+    blocks = rng.permutation(-(-len(y) // block_rows))
+    per_chunk = max(chunk_rows // block_rows, 1)
+
+    for chunk, first in enumerate(range(0, len(blocks), per_chunk)):
+        picked = np.sort(blocks[first:first + per_chunk])
+        Xc = np.concatenate([X[b * block_rows:(b + 1) * block_rows] for b in picked])
+        yc = np.concatenate([y[b * block_rows:(b + 1) * block_rows] for b in picked])
+        held = rng.random(len(yc)) < holdout_rate
+        holdout.add(Xc[held], yc[held])
+
+        clf = RandomForestClassifier(n_estimators=trees_per_chunk, random_state=seed + chunk,
+                                     n_jobs=-1, **TREE_PARAMS)
+        clf.fit(Xc[~held], yc[~held])
+        forest = compile_forest(clf)
+        for t in range(forest.n_estimators):
+            # Reservoir over the stream of trees
+            if len(kept) < max_trees:
+                kept.append(forest.tree(t))
+            else:
+                j = rng.integers(0, trees_seen + 1)
+                if j < max_trees:
+                    kept[j] = forest.tree(t)
+            trees_seen += 1
+        rows += len(yc)
+        del clf, forest, Xc, yc
+
+        if verbose:
+            elapsed = time.perf_counter() - start
+            print(f"… chunk {chunk + 1}: {rows:,} rows, {rows / elapsed:,.0f} rows/s, "
+                  f"{len(kept)} trees kept of {trees_seen}, peak RSS {peak_rss_mb():.0f} MB")
+
+    model = merge_forests(kept, classes)
+    X_hold, y_hold = holdout.sample(holdout_size)
+    stats = {
+        "rows": rows,
+        "seconds": time.perf_counter() - start,
+        "trees_seen": trees_seen,
+        "trees": model.n_estimators,
+        "holdout_rows": len(y_hold),
+        "holdout_accuracy": float(np.mean(model.predict(X_hold) == y_hold)) if len(y_hold) else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    stats["rows_per_second"] = stats["rows"] / stats["seconds"]
+    return model, stats
+
+
+# ======================
+# COMMAND LINE
+# ======================
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the water quality forest out of core, chunk by chunk")
+    parser.add_argument("data", nargs="+", help="training CSVs (converted to the columnar cache first)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--trees-per-chunk", type=int, default=TREES_PER_CHUNK)
+    parser.add_argument("--max-trees", type=int, default=MAX_TREES)
+    parser.add_argument("--holdout-size", type=int, default=HOLDOUT_SIZE)
+    parser.add_argument("--publish", action="store_true", help="publish the merged forest to the model registry")
+    args = parser.parse_args()
+
+    X, y = load_training_data(args.data)
+    classes = np.arange(3)  # Excellent, Good, Poor
+    model, stats = train_chunked(X, y, classes, args.chunk_rows, args.trees_per_chunk,
+                                 args.max_trees, holdout_size=args.holdout_size)
+    print(f"✅ {stats['rows']:,} rows in {stats['seconds']:.1f}s ({stats['rows_per_second']:,.0f} rows/s), "
+          f"{stats['trees']} trees, hold-out accuracy {stats['holdout_accuracy']:.4f} "
+          f"on {stats['holdout_rows']:,} rows, peak RSS {stats['peak_rss_mb']:.0f} MB")
+
+    if args.publish:
+        from model_registry import ModelRegistry, file_sha256
+        version = ModelRegistry().publish(model, {
+            "source": "train_chunked.py",
+            "training_data": args.data,
+            "training_data_sha256": [file_sha256(p) for p in args.data],
+            "feature_order": FEATURE_COLUMNS,
+            "params": dict(TREE_PARAMS, chunk_rows=args.chunk_rows, trees_per_chunk=args.trees_per_chunk,
+                           max_trees=args.max_trees),
+            "metrics": {"accuracy": stats["holdout_accuracy"], "test_rows": stats["holdout_rows"]},
+        })
+        print(f"✅ Published as {version}")
@@ -0,0 +1,170 @@
+import argparse
+import itertools
+import json
+import os
+import time
+
+import numpy as np
+from joblib import Memory, Parallel, delayed
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, train_test_split
+
+from forest_engine import compile_forest
+from model_registry import file_sha256
+from training_data import FEATURE_COLUMNS, load_training_data
+
+# ======================
+# SEARCH SETUP
+# ======================
+# Every (candidate, fold) fit is a cached joblib call keyed on its inputs, so
+# an interrupted or repeated search only fits what it has not seen before.
+# Forests fit single-threaded and the grid is spread over all cores instead.
+
+CACHE_DIR = ".search_cache"
+REPORT_PATH = "search_report.json"
+GRID = {
+    "n_estimators": [50, 100, 200],
+    "max_depth": [None, 6, 10],
+    "min_samples_leaf": [1, 2, 5],
+}
+CV_FOLDS = 5
+
+memory = Memory(CACHE_DIR, verbose=0)
+
+
+@memory.cache
+def fold_splits(y, n_splits, seed):
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    return [(train, test) for train, test in skf.split(np.zeros(len(y)), y)]
+
+
+@memory.cache
+def fit_fold(params, X, y, train, test, seed):
+    clf = RandomForestClassifier(random_state=seed, n_jobs=1, **params)
+    start = time.perf_counter()
+    clf.fit(X[train], y[train])
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score = float(np.mean(clf.predict(X[test]) == y[test]))
+    predict_time = time.perf_counter() - start
+
+    # Latency the dashboards actually see: one row through the compiled forest
+    forest = compile_forest(clf)
+    row = X[test][:1]
+    single = min(_timed(forest.predict, row) for _ in range(50))
+    return {
+        "score": score,
+        "fit_seconds": fit_time,
+        "predict_us_per_row": predict_time / len(test) * 1e6,
+        "single_row_ms": single * 1e3,
+        "nodes": int(forest.n_nodes),
+    }
+
+
+@memory.cache
+def fit_final(params, X, y, seed):
+    return RandomForestClassifier(random_state=seed, n_jobs=1, **params).fit(X, y)
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+# ======================
+# SEARCH
+# ======================
+def run_search(X, y, grid=GRID, folds=CV_FOLDS, seed=42, n_jobs=-1):
+    names = list(grid)
+    candidates = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    splits = fold_splits(y, folds, seed)
+
+    jobs = [(c, f) for c in range(len(candidates)) for f in range(len(splits))]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(fit_fold)(candidates[c], X, y, splits[f][0], splits[f][1], seed) for c, f in jobs
+    )
+
+    report = []
+    for c, params in enumerate(candidates):
+        folds_out = [r for (ci, _), r in zip(jobs, results) if ci == c]
+        scores = [r["score"] for r in folds_out]
+        report.append({
+            "params": params,
+            "mean_score": float(np.mean(scores)),
+            "std_score": float(np.std(scores)),
+            "fit_seconds": float(np.mean([r["fit_seconds"] for r in folds_out])),
+            "predict_us_per_row": float(np.mean([r["predict_us_per_row"] for r in folds_out])),
+            "single_row_ms": float(np.median([r["single_row_ms"] for r in folds_out])),
+            "nodes": int(np.mean([r["nodes"] for r in folds_out])),
+            "folds": folds_out,
+        })
+    report.sort(key=lambda r: (-r["mean_score"], r["single_row_ms"]))
+    return report
+
+
+# ======================
+# COMMAND LINE
+# ======================
+def _grid_arg(text):
+    return [None if v == "None" else int(v) for v in text.split(",")]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-validated hyperparameter search for the water quality forest")
+    parser.add_argument("--data", default="WQD_selected.csv")
+    parser.add_argument("--n-estimators", type=_grid_arg, default=GRID["n_estimators"])
+    parser.add_argument("--max-depth", type=_grid_arg, default=GRID["max_depth"])
+    parser.add_argument("--min-samples-leaf", type=_grid_arg, default=GRID["min_samples_leaf"])
+    parser.add_argument("--folds", type=int, default=CV_FOLDS)
+    parser.add_argument("--jobs", type=int, default=-1)
+    parser.add_argument("--report", default=REPORT_PATH)
+    parser.add_argument("--publish", action="store_true", help="publish the best candidate to the model registry")
+    args = parser.parse_args()
+
+    X, y = load_training_data(args.data)
+    # Same hold-out as water_quality_model.py; the search only sees the training part
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    grid = {"n_estimators": args.n_estimators, "max_depth": args.max_depth,
+            "min_samples_leaf": args.min_samples_leaf}
+    start = time.perf_counter()
+    candidates = run_search(X_train, y_train, grid, args.folds, n_jobs=args.jobs)
+    elapsed = time.perf_counter() - start
+
+    best = candidates[0]
+    final = fit_final(best["params"], X_train, y_train, 42)
+    holdout = float(np.mean(final.predict(X_test) == y_test))
+
+    report = {
+        "data": args.data,
+        "data_sha256": file_sha256(args.data),
+        "grid": grid,
+        "cv_folds": args.folds,
+        "search_seconds": elapsed,
+        "cores": os.cpu_count(),
+        "best": {"params": best["params"], "cv_score": best["mean_score"], "holdout_accuracy": holdout},
+        "candidates": candidates,
+    }
+    with open(args.report, "w") as fh:
+        json.dump(report, fh, indent=2)
+
+    print(f"{'n_estimators':>12} {'max_depth':>9} {'min_leaf':>8} {'cv acc':>8} {'fit (s)':>8} {'1 row (ms)':>10}")
+    for r in candidates:
+        p = r["params"]
+        print(f"{p['n_estimators']:>12} {str(p['max_depth']):>9} {p['min_samples_leaf']:>8} "
+              f"{r['mean_score']:>8.4f} {r['fit_seconds']:>8.2f} {r['single_row_ms']:>10.3f}")
+    print(f"✅ Best {best['params']} (hold-out {holdout:.4f}), report written to {args.report} in {elapsed:.1f}s")
+
+    if args.publish:
+        from model_registry import ModelRegistry
+        version = ModelRegistry().publish(compile_forest(final), {
+            "source": "train_search.py",
+            "training_data": args.data,
+            "training_data_sha256": report["data_sha256"],
+            "feature_order": FEATURE_COLUMNS,
+            "params": best["params"],
+            "metrics": {"accuracy": holdout, "cv_accuracy": best["mean_score"], "test_rows": len(y_test)},
+        })
+        print(f"✅ Best candidate published as {version}")
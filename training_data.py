@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+# ======================
+# COLUMNAR TRAINING CACHE
+# ======================
+# Training CSVs are parsed once into raw column buffers (float32 features,
+# int8 label) next to a JSON header, then memory-mapped on every later load.
+# sklearn trees work in float32 internally, so training on the cache grows
+# exactly the same forest as training on the float64 CSV.
+#
+#   .data_cache/<key>/
+#       meta.json   sources (path, size, mtime, sha256), rows, columns
+#       X.f32       rows x 3, C order
+#       y.i8        rows
+
+CACHE_DIR = ".data_cache"
+FEATURE_COLUMNS = ["Temp", "Turbidity", "pH"]
+LABEL_COLUMN = "Water Quality"
+PARSE_CHUNK = 1_000_000
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 22), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _source_info(path, known=None):
+    st = os.stat(path)
+    info = {"path": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+    # Unchanged size and mtime: reuse the stored hash instead of re-reading the file
+    if known and all(known.get(k) == info[k] for k in ("path", "size", "mtime_ns")):
+        info["sha256"] = known["sha256"]
+    else:
+        info["sha256"] = _sha256(path)
+    return info
+
+
+def _cache_path(paths, cache_dir):
+    key = hashlib.sha256("\n".join(os.path.abspath(p) for p in paths).encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, key)
+
+
+def build_cache(paths, out_dir, sources, features=FEATURE_COLUMNS, label=LABEL_COLUMN):
+    import pandas as pd
+
+    os.makedirs(out_dir, exist_ok=True)
+    rows = 0
+    dtypes = {name: np.float32 for name in features}
+    dtypes[label] = np.int8
+    with open(os.path.join(out_dir, "X.f32.tmp"), "wb") as fx, open(os.path.join(out_dir, "y.i8.tmp"), "wb") as fy:
+        for path in paths:
+            for chunk in pd.read_csv(path, usecols=features + [label], dtype=dtypes, chunksize=PARSE_CHUNK):
+                fx.write(np.ascontiguousarray(chunk[features].to_numpy(dtype=np.float32)).tobytes())
+                fy.write(chunk[label].to_numpy(dtype=np.int8).tobytes())
+                rows += len(chunk)
+    os.replace(os.path.join(out_dir, "X.f32.tmp"), os.path.join(out_dir, "X.f32"))
+    os.replace(os.path.join(out_dir, "y.i8.tmp"), os.path.join(out_dir, "y.i8"))
+
+    meta = {"sources": sources, "rows": rows, "features": features, "label": label,
+            "built_at": time.time()}
+    # meta.json last: its presence marks a complete cache
+    with open(os.path.join(out_dir, "meta.json.tmp"), "w") as fh:
+        json.dump(meta, fh, indent=2)
+    os.replace(os.path.join(out_dir, "meta.json.tmp"), os.path.join(out_dir, "meta.json"))
+    return meta
+
+
+def load_training_data(paths="WQD_selected.csv", cache_dir=CACHE_DIR, verbose=True):
+    """Return memory-mapped (X float32 (rows, 3), y int8), rebuilding the cache
+    only when a source CSV's content hash has changed."""
+    if isinstance(paths, str):
+        paths = [paths]
+    out_dir = _cache_path(paths, cache_dir)
+    meta_path = os.path.join(out_dir, "meta.json")
+
+    meta = None
+    if os.path.exists(meta_path):
+        with open(meta_path) as fh:
+            meta = json.load(fh)
+    known = meta["sources"] if meta else [None] * len(paths)
+    sources = [_source_info(p, k) for p, k in zip(paths, known)]
+
+    if meta is None or [s["sha256"] for s in sources] != [s["sha256"] for s in meta["sources"]]:
+        start = time.perf_counter()
+        meta = build_cache(paths, out_dir, sources)
+        if verbose:
+            print(f"✅ Cached {meta['rows']:,} training rows in {out_dir} ({time.perf_counter() - start:.1f}s)")
+    elif sources != meta["sources"]:
+        # Same content, new mtime (e.g. a fresh checkout): remember the new stat
+        meta["sources"] = sources
+        with open(meta_path, "w") as fh:
+            json.dump(meta, fh, indent=2)
+
+    X = np.memmap(os.path.join(out_dir, "X.f32"), dtype=np.float32, mode="r",
+                  shape=(meta["rows"], len(meta["features"])))
+    y = np.memmap(os.path.join(out_dir, "y.i8"), dtype=np.int8, mode="r", shape=(meta["rows"],))
+    return X, y
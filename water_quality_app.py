@@ -1,8 +1,5 @@
 import streamlit as st
-import joblib
-import numpy as np
 import pandas as pd
-import time
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -10,17 +7,16 @@ from supabase import create_client
 from dotenv import load_dotenv
 import os
 
-# ======================
-# ENVIRONMENT SETUP
-# ======================
-load_dotenv("links.env")
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+from dashboard_data import FetchResult, fetch_all
+from data_broker import get_broker
+from local_replica import get_replica
+from model_registry import get_versioned_model
+from prediction_cache import get_prediction_cache
+from prediction_server import get_prediction_service
+from realtime_feed import get_realtime_feed
+from security_poller import POLL_INTERVAL_S, get_security_poller
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    st.error("🚫 Missing Supabase credentials in links.env file")
-else:
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+LIVE_CHECK_S = 1.0  # how often each session checks the realtime feed for new readings
 
 # ======================
 # PAGE CONFIGURATION
@@ -32,6 +28,31 @@ st.set_page_config(
     initial_sidebar_state="collapsed"  # This ensures sidebar is collapsed by default
 )
 
+# ======================
+# ENVIRONMENT SETUP
+# ======================
+load_dotenv("links.env")
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+if not SUPABASE_URL or not SUPABASE_KEY:
+    st.error("🚫 Missing Supabase credentials in links.env file")
+    supabase = replica = broker = security_poller = feed = None
+else:
+    # One client per process: its httpx session keeps connections alive across reruns
+    @st.cache_resource(show_spinner=False)
+    def get_supabase_client(url, key):
+        return create_client(url, key)
+
+    supabase = get_supabase_client(SUPABASE_URL, SUPABASE_KEY)
+    broker = get_broker(supabase)  # concurrent identical upstream reads share one call
+    replica = get_replica(broker)  # dashboard reads go to the local delta-synced copy
+    security_poller = get_security_poller(replica)  # one background thread for every session
+    # New rows are pushed into the replica as they are inserted; a change of security state wakes the poller
+    feed = get_realtime_feed(SUPABASE_URL, SUPABASE_KEY, replica)
+    feed.subscribe("security_intervals", "security_poller", lambda rows: security_poller.poll_now())
+    feed.subscribe("security_alerts", "security_poller", lambda rows: security_poller.poll_now())
+
 # ======================
 # CUSTOM STYLING (Enhanced)
 # ======================
@@ -115,68 +136,51 @@ st.markdown("""
 # MODEL LOADING
 # ======================
 try:
-    model = joblib.load("water_quality_model.pkl")
+    model_version, model = get_versioned_model()
 except FileNotFoundError:
-    st.error("Error: 'water_quality_model.pkl' not found. Please ensure the model file is in the correct directory.")
-    model = None
+    st.error("Error: no 'water_quality_model/' artifact or 'water_quality_model.pkl' found. Please ensure the model is in the correct directory.")
+    model_version, model = None, None
+prediction_cache = get_prediction_cache()
 
 # ======================
 # DATA FUNCTIONS (Optimized with caching and error handling)
 # ======================
-@st.cache_data(ttl=60)  # Cache for 60 seconds
-def get_latest_record():
-    try:
-        response = supabase.table("lakefishcage").select("*").order("timestamp", desc=True).limit(1).execute()
-        if response.data:
-            data = response.data[0]
-            return data["temperature"], data["turbidity"], data["ph"], pd.to_datetime(data["timestamp"])
-        else:
-            return None, None, None, None
-    except Exception as e:
-        st.error(f"Error fetching latest water quality data: {e}")
-        return None, None, None, None
-
-@st.cache_data(ttl=60)  # Cache for 60 seconds
-def get_last_security_update():
-    try:
-        response = supabase.table("security_alerts").select("*").order("timestamp", desc=True).limit(1).execute()
-        if response.data:
-            data = response.data[0]
-            return data["status"], pd.to_datetime(data["timestamp"])
-        else:
-            return None, None
-    except Exception as e:
-        st.error(f"Error fetching latest security update: {e}")
-        return None, None
+# These raise instead of calling st.error; fetch_all below collects failures
+# so the page reports them per query. `version` is the realtime feed's counter:
+# a pushed reading moves every session to a new cache entry, so nothing has to
+# be cleared and sessions on the same version share one read.
+@st.cache_data(ttl=60, max_entries=8)  # Cache for 60 seconds
+def get_latest_record(version=None):
+    response = replica.table("lakefishcage").select("*").order("timestamp", desc=True).limit(1).execute()
+    if response.data:
+        data = response.data[0]
+        return (data["temperature"], data["turbidity"], data["ph"], pd.to_datetime(data["timestamp"]),
+                data.get("predicted_quality"), data.get("model_version"))
+    else:
+        return None, None, None, None, None, None
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def get_historical_data(limit=50):
-    try:
-        response = supabase.table("lakefishcage").select("*").order("timestamp", desc=True).limit(limit).execute()
-        if response.data:
-            df = pd.DataFrame(response.data)
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-            return df.sort_values("timestamp")
-        else:
-            return pd.DataFrame()
-    except Exception as e:
-        st.error(f"Error fetching historical water quality data: {e}")
+@st.cache_data(ttl=300, max_entries=8)  # Cache for 5 minutes
+def get_historical_data(limit=50, version=None):
+    response = replica.table("lakefishcage").select("*").order("timestamp", desc=True).limit(limit).execute()
+    if response.data:
+        df = pd.DataFrame(response.data)
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        return df.sort_values("timestamp")
+    else:
         return pd.DataFrame()
 
-# Simulate real-time security status (replace with your actual implementation)
-def get_realtime_security_status():
-    # In a real application, this would connect to a WebSocket or a streaming API
-    time.sleep(1)  # Simulate a delay
-    # Example: Randomly change status
-    status = np.random.choice([True, False], p=[0.1, 0.9])
-    return {"status": status, "timestamp": pd.Timestamp.now()}
-
-# State to hold the latest real-time status
-if 'realtime_security_status' not in st.session_state:
-    st.session_state['realtime_security_status'] = get_realtime_security_status()
-
-def update_security_status():
-    st.session_state['realtime_security_status'] = get_realtime_security_status()
+def security_intervals_frame(rows):
+    if rows:
+        df = pd.DataFrame(rows)
+        df["started_at"] = pd.to_datetime(df["started_at"])
+        df["ended_at"] = pd.to_datetime(df["ended_at"])
+        df["status_label"] = df["status"].apply(lambda x: "🚨 Alert" if x else "✅ Normal")
+        # A single heartbeat still covers one posting interval on the timeline
+        df["shown_until"] = df["ended_at"].where(df["ended_at"] > df["started_at"],
+                                                 df["started_at"] + pd.Timedelta(seconds=POLL_INTERVAL_S))
+        return df.sort_values("started_at", ascending=False)
+    else:
+        return pd.DataFrame()
 
 # ======================
 # MAIN CONTENT
@@ -185,19 +189,40 @@ def update_security_status():
 col1, col2 = st.columns([5, 1])
 with col2:
     if st.button("🔄 Refresh Data & Predict"):
-        st.cache_data.clear()  # Clear all cached data
-        update_security_status()
+        get_latest_record.clear()  # only this page's readings; other cached data stays
+        get_historical_data.clear()
+        if security_poller is not None:
+            security_poller.poll_now()
         st.rerun()  # Rerun the app to fetch fresh data
 
 # Tabs
 tabs = st.tabs(["🏠 Overview", "🔒 Security Center", "ℹ️ About"])
 
 # Home Tab (Renamed to Overview, Improved Layout)
-with tabs[0]:
+# With a realtime feed only this fragment re-runs on LIVE_CHECK_S; its reads are
+# cached per feed version, so a tick without a new reading is two cache hits.
+@st.fragment(run_every=LIVE_CHECK_S if feed is not None else None)
+def overview():
+    # This run's queries, with errors collected per query. Both read the local
+    # replica; security status and intervals come from the shared poller instead
+    # (Security tab).
+    if replica is not None:
+        version = feed.version("lakefishcage") if feed is not None else None
+        dashboard = fetch_all({
+            "latest_record": lambda: get_latest_record(version),
+            "historical_data": lambda: get_historical_data(limit=50, version=version),  # Using default value since sidebar control is removed
+        })
+    else:
+        dashboard = FetchResult()
+    st.session_state["dashboard"] = dashboard  # shown by the About tab's debug panel
+
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown('<h2 class="card-header">🌊 Water Quality Overview</h2>', unsafe_allow_html=True)
 
-    latest_temp, latest_turb, latest_ph, latest_ts = get_latest_record()
+    if "latest_record" in dashboard.errors:
+        st.error(f"Error fetching latest water quality data: {dashboard.errors['latest_record']}")
+    latest_temp, latest_turb, latest_ph, latest_ts, stored_pred, stored_version = dashboard.get(
+        "latest_record", (None, None, None, None, None, None))
 
     if latest_temp is not None:
         col1, col2, col3, col4 = st.columns(4)
@@ -215,7 +240,15 @@ with tabs[0]:
                 st.markdown(f'<p class="metric-label">⏱️ Last Updated: {latest_ts.strftime("%Y-%m-%d %H:%M:%S")}</p>', unsafe_allow_html=True)
 
         if model:
-            pred = model.predict(np.array([[latest_temp, latest_turb, latest_ph]]))[0]
+            if stored_pred is not None and stored_version == model_version:
+                pred = stored_pred  # scored at ingest by the current model
+            else:
+                # Memoised per model version, misses go through the shared micro-batcher
+                service = get_prediction_service()
+                pred = prediction_cache.predict(
+                    [[latest_temp, latest_turb, latest_ph]], model_version,
+                    lambda rows: [service.predict(row)["label"] for row in rows.tolist()],
+                )[0]
             label_map = {0: "🌟 Excellent", 1: "👍 Good", 2: "⚠ Poor"}
             st.markdown(f"✨ **Predicted Water Quality:** <span style='font-size:1.2em; font-weight:bold;'>{label_map[pred]}</span>", unsafe_allow_html=True)
 
@@ -236,7 +269,9 @@ with tabs[0]:
     # Historical Trends (Improved Charting)
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown('<h3 class="card-header">📈 Historical Water Quality Trends</h3>', unsafe_allow_html=True)
-    df_historical = get_historical_data(limit=50)  # Using default value since sidebar control is removed
+    if "historical_data" in dashboard.errors:
+        st.error(f"Error fetching historical water quality data: {dashboard.errors['historical_data']}")
+    df_historical = dashboard.get("historical_data", pd.DataFrame())
     if not df_historical.empty:
         fig_trends = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.1,
                                 subplot_titles=('Temperature (°C)', 'Turbidity', 'pH'))
@@ -250,62 +285,53 @@ with tabs[0]:
         st.info("No historical water quality data available.")
     st.markdown('</div>', unsafe_allow_html=True)
 
+with tabs[0]:
+    overview()
+
 # Security Tab (Improved Display with Simulated Real-time Update)
 with tabs[1]:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.markdown('<h2 class="card-header">🔒 Modern Security Center</h2>', unsafe_allow_html=True)
 
-    st.subheader("Current Security Status")
-    realtime_data = st.session_state['realtime_security_status']
-    if realtime_data:
-        ts_str = realtime_data['timestamp'].strftime('%Y-%m-%d %H:%M:%S')
-        if realtime_data['status']:
-            st.error(f"🚨 **REAL-TIME ALERT:** Not Safe (Updated: {ts_str})", unsafe_allow_html=True)
-        else:
-            st.markdown(f"✅ **REAL-TIME STATUS:** Safe (Updated: {ts_str})", unsafe_allow_html=True)
-    else:
-        st.info("Waiting for real-time security updates...")
-
-    def update_status_periodically():
-        while True:
-            time.sleep(5)  # Simulate updates every 5 seconds
-            st.session_state['realtime_security_status'] = get_realtime_security_status()
-            st.experimental_rerun() # Trigger a rerun to update the UI
+    # Only this fragment re-runs on the poller's schedule; it reads the shared
+    # snapshot, so sessions add no threads and no queries of their own
+    @st.fragment(run_every=POLL_INTERVAL_S)
+    def security_panel():
+        snapshot = security_poller.snapshot()
 
-    # Run the update in a separate thread to avoid blocking the main Streamlit app
-    import threading
-    if 'security_updater_started' not in st.session_state:
-        st.session_state['security_updater_started'] = True
-        security_thread = threading.Thread(target=update_status_periodically, daemon=True)
-        security_thread.start()
-
-    st.markdown("---")
-    st.subheader("Recent Security Alerts")
-    def get_security_alerts(limit=20):
-        try:
-            response = supabase.table("security_alerts").select("*").order("timestamp", desc=True).limit(limit).execute()
-            if response.data:
-                df = pd.DataFrame(response.data)
-                df["timestamp"] = pd.to_datetime(df["timestamp"])
-                df["status_label"] = df["status"].apply(lambda x: "🚨 Alert" if x else "✅ Normal")
-                return df.sort_values("timestamp", ascending=False)
+        st.subheader("Current Security Status")
+        if snapshot["timestamp"] is not None:
+            ts_str = pd.to_datetime(snapshot["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+            since_str = pd.to_datetime(snapshot["since"]).strftime('%Y-%m-%d %H:%M:%S')
+            if snapshot["status"]:
+                st.error(f"🚨 **REAL-TIME ALERT:** Not Safe since {since_str} (Updated: {ts_str})", unsafe_allow_html=True)
             else:
-                return pd.DataFrame()
-        except Exception as e:
-            st.error(f"Error fetching security alerts: {e}")
-            return pd.DataFrame()
+                st.markdown(f"✅ **REAL-TIME STATUS:** Safe since {since_str} (Updated: {ts_str})", unsafe_allow_html=True)
+        else:
+            st.info("Waiting for real-time security updates...")
+
+        st.markdown("---")
+        st.subheader("Recent Security Alerts")
+        if snapshot["error"]:
+            st.error(f"Error fetching security alerts: {snapshot['error']}")
+        sec_df = security_intervals_frame(snapshot["intervals"])
+        if not sec_df.empty:
+            st.dataframe(
+                sec_df[["started_at","ended_at","status_label","samples"]].rename(
+                    columns={"started_at":"From","ended_at":"Until","status_label":"Status","samples":"Readings"}),
+                use_container_width=True
+            )
+            fig_alerts = px.timeline(sec_df, x_start="started_at", x_end="shown_until", y="status_label", color="status_label",
+                                     title="Security Alert Timeline", labels={"started_at":"From","shown_until":"Until","status_label":"Status"},
+                                     color_discrete_map={"🚨 Alert": "#ef5350", "✅ Normal": "#66bb6a"})
+            st.plotly_chart(fig_alerts, use_container_width=True)
+        else:
+            st.info("No recent security alerts found.")
 
-    sec_df = get_security_alerts(limit=20)  # Using default value since sidebar control is removed
-    if not sec_df.empty:
-        st.dataframe(
-            sec_df[["timestamp","status_label"]].rename(columns={"timestamp":"Time","status_label":"Status"}), use_container_width=True
-        )
-        fig_alerts = px.scatter(sec_df, x="timestamp", y="status_label", color="status_label",
-                                 title="Security Alert Timeline", labels={"timestamp":"Time","status_label":"Status"},
-                                 color_discrete_map={"🚨 Alert": "#ef5350", "✅ Normal": "#66bb6a"})
-        st.plotly_chart(fig_alerts, use_container_width=True)
+    if security_poller is not None:
+        security_panel()
     else:
-        st.info("No recent security alerts found.")
+        st.info("Security status needs Supabase credentials.")
     st.markdown('</div>', unsafe_allow_html=True)
 
 # About Tab (Improved Content - COMPLETED)
@@ -324,4 +350,21 @@ with tabs[2]:
     st.markdown("- **Real-time Security Status:** Offers an immediate view of the current security status with automatic updates.")
     st.markdown("---")
     st.markdown("Feel free to explore the different tabs to gain insights into the fish cage environment.")
+    cache_stats = prediction_cache.stats()
+    st.caption(f"🧠 Model {model_version} · prediction cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+               f"{cache_stats['evictions']} evictions, ~{cache_stats['saved_seconds'] * 1e3:.0f} ms inference saved")
+    if broker is not None:
+        broker_totals = broker.totals()
+        st.caption(f"🔀 Data broker: {broker_totals['calls']} queries, {broker_totals['upstream']} sent upstream, "
+                   f"{broker_totals['coalesced']} coalesced (~{broker_totals['saved_seconds'] * 1e3:.0f} ms saved)")
+    if feed is not None:
+        feed_stats = feed.stats()["lakefishcage"]
+        latency = feed_stats["last_latency_s"]
+        st.caption(f"📡 Realtime feed: {'connected' if feed_stats['connected'] else 'reconnecting'}, "
+                   f"{feed_stats['rows']} readings pushed"
+                   + (f", last one {latency:.2f} s after its timestamp" if latency is not None else ""))
+    with st.expander("🐞 Debug: query timings for this rerun"):
+        dashboard = st.session_state.get("dashboard", FetchResult())
+        st.caption(f"Wall time {dashboard.wall_seconds * 1e3:.1f} ms")
+        st.dataframe(pd.DataFrame(dashboard.timing_rows()), use_container_width=True, hide_index=True)
     st.markdown('</div>', unsafe_allow_html=True)
\ No newline at end of file
@@ -1,16 +1,16 @@
-import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix
 import seaborn as sns
+import matplotlib
+matplotlib.use('Agg')  # headless: the confusion matrix is written to a file
 import matplotlib.pyplot as plt
 
-# Load the dataset
-df = pd.read_csv('WQD_selected.csv')  
+from training_data import FEATURE_COLUMNS, load_training_data
 
-# Features and target
-X = df[['Temp', 'Turbidity', 'pH']]
-y = df['Water Quality']
+# Load the dataset: float32 features and int8 labels, memory-mapped from a
+# columnar cache that is only rebuilt when the CSV changes
+X, y = load_training_data('WQD_selected.csv')
 
 # Split data
 X_train, X_test, y_train, y_test = train_test_split(
@@ -33,6 +33,20 @@ import joblib
 joblib.dump(clf, 'water_quality_model.pkl')
 print("✅ Model saved as water_quality_model.pkl")
 
+# Publish to the model registry; running dashboards pick it up without a restart
+from sklearn.metrics import accuracy_score
+from forest_engine import compile_forest
+from model_registry import ModelRegistry, file_sha256
+version = ModelRegistry().publish(compile_forest(clf), {
+    "source": "water_quality_model.py",
+    "training_data": "WQD_selected.csv",
+    "training_data_sha256": file_sha256('WQD_selected.csv'),
+    "feature_order": FEATURE_COLUMNS,
+    "params": {k: v for k, v in clf.get_params().items() if isinstance(v, (int, float, str, bool, type(None)))},
+    "metrics": {"accuracy": accuracy_score(y_test, y_pred), "test_rows": len(y_test)},
+})
+print(f"✅ Model published to the registry as {version}")
+
 # Confusion Matrix
 cm = confusion_matrix(y_test, y_pred)
 sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
@@ -41,7 +55,8 @@ sns.heatmap(cm, annot=True, fmt='d', cmap='Blues',
 plt.xlabel('Predicted')
 plt.ylabel('Actual')
 plt.title('Confusion Matrix')
-plt.show()
+plt.savefig('confusion_matrix.png', bbox_inches='tight')
+print("✅ Confusion matrix saved as confusion_matrix.png")
 
 
 